@@ -1,9 +1,16 @@
+import json
 import math
+import base64
 import logging
 from datetime import datetime, timedelta
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from django.db.models.query import ModelIterable
+from django.utils.dateparse import parse_datetime
 from django.utils.functional import cached_property
 
 
@@ -11,12 +18,97 @@ logger = logging.getLogger()
 
 
 class BeaglePagination(PageNumberPagination):
+    """
+    Page number pagination, or keyset pagination on (created_date, id) when the request has a
+    `cursor` query parameter. An empty cursor starts from the newest row. In cursor mode rows are
+    always returned newest first, count is estimated from the query plan unless `exact_count=true`
+    is passed, and querysets which can't be ordered by (created_date, id) fall back to pages.
+    """
+
     page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    exact_count_query_param = "exact_count"
 
     def django_paginator_class(self, queryset, page_size):
         return CountFastPaginator(queryset, page_size)
 
+    def paginate_queryset(self, queryset, request, view=None):
+        self.next_position = None
+        self.keyset = False
+        if self.cursor_query_param in request.query_params and self.supports_keyset(queryset):
+            page_size = self.get_page_size(request)
+            if page_size:
+                return self.paginate_queryset_keyset(queryset, request, page_size)
+        return super().paginate_queryset(queryset, request, view)
+
+    @staticmethod
+    def supports_keyset(queryset):
+        return (
+            isinstance(queryset, QuerySet)
+            and queryset._iterable_class is ModelIterable
+            and not queryset.query.distinct_fields
+        )
+
+    def paginate_queryset_keyset(self, queryset, request, page_size):
+        self.keyset = True
+        self.request = request
+        self.count = self.get_keyset_count(queryset, request)
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+        if position:
+            created_date, pk = position
+            # The redundant upper bound lets the created_date index drive the scan
+            queryset = queryset.filter(
+                Q(created_date__lt=created_date) | Q(created_date=created_date, id__lt=pk),
+                created_date__lte=created_date,
+            )
+        rows = list(queryset.order_by("-created_date", "-id")[: page_size + 1])
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_position = (rows[-1].created_date, rows[-1].id)
+        return rows
+
+    def get_keyset_count(self, queryset, request):
+        if request.query_params.get(self.exact_count_query_param, "").lower() == "true":
+            return queryset.values("id").count()
+        return estimate_count(queryset)
+
+    @staticmethod
+    def encode_cursor(position):
+        created_date, pk = position
+        value = "%s|%s" % (created_date.isoformat(), pk)
+        return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        if not cursor:
+            return None
+        try:
+            created_date, pk = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+            created_date = parse_datetime(created_date)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound("Invalid cursor")
+        if created_date is None:
+            raise NotFound("Invalid cursor")
+        return created_date, pk
+
+    def get_next_link(self):
+        if self.keyset:
+            if not self.next_position:
+                return None
+            url = self.request.build_absolute_uri()
+            return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+        return super().get_next_link()
+
     def get_paginated_response(self, data):
+        if self.keyset:
+            return Response(
+                {
+                    "next": self.get_next_link(),
+                    "previous": None,
+                    "count": self.count,
+                    "results": data,
+                }
+            )
         return Response(
             {
                 "next": self.get_next_link(),
@@ -43,6 +135,18 @@ class CountFastPaginator(Paginator):
         return self.object_list.values("id").count()
 
 
+def estimate_count(queryset):
+    """
+    Row count estimated by the Postgres planner, None if the plan can't be read
+    """
+    try:
+        plan = json.loads(queryset.order_by().explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.error(f"Failed to estimate count {e}")
+        return None
+
+
 def time_filter(model, query_params, time_fields=("created_date", "modified_date"), previous_queryset=None):
     queryset = previous_queryset if previous_queryset is not None else model.objects.all()
 
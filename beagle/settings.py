@@ -183,6 +183,13 @@ DATABASES = {
 
 PAGINATION_DEFAULT_PAGE_SIZE = 10
 
+EXPORT_CHUNK_SIZE = int(os.environ.get("BEAGLE_EXPORT_CHUNK_SIZE", 2000))
+
+REQUEST_SUMMARY_CACHE_TTL = int(os.environ.get("BEAGLE_REQUEST_SUMMARY_CACHE_TTL", 60 * 60))
+
+# Seconds a pipeline resolved from a branch is used before it's resolved again, tags and commits are kept
+PIPELINE_CACHE_BRANCH_TTL = int(os.environ.get("BEAGLE_PIPELINE_CACHE_BRANCH_TTL", 300))
+
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
     "DEFAULT_PAGINATION_CLASS": "beagle.pagination.BeaglePagination",
@@ -388,6 +395,10 @@ NOTIFIER_CC = os.environ.get("BEAGLE_NOTIFIER_CC", "")  # Put "CC [~webbera] and
 NOTIFIER_STORAGE_DIR = os.environ.get("BEAGLE_NOTIFIER_STORAGE_DIR", "/tmp")
 NOTIFIER_FILE_GROUP = os.environ.get("BEAGLE_NOTIFIER_FILE_GROUP")
 NOTIFIER_LOCAL_ATTACHMENTS_DIR = os.environ.get("BEAGLE_NOTIFIER_LOCAL_ATTACHMENTS_DIR", "/tmp")
+# Seconds JIRA labels, description rows and comments of a ticket are buffered to be sent together, 0 to disable
+NOTIFIER_COALESCE_WINDOW = int(os.environ.get("BEAGLE_NOTIFIER_COALESCE_WINDOW", 10))
+# Failed attempts to send buffered events together before they are sent one by one
+NOTIFIER_FLUSH_RETRIES = int(os.environ.get("BEAGLE_NOTIFIER_FLUSH_RETRIES", 3))
 
 JIRA_CLOUD = os.environ.get("JIRA_CLOUD", "True") == "True"
 JIRA_PREFIX = os.environ.get("JIRA_PREFIX", "VADEV-")
@@ -410,8 +421,14 @@ BEAGLE_SHARED_TMPDIR = os.environ.get("BEAGLE_SHARED_TMPDIR", "/juno/work/ci/tem
 BEAGLE_TMPDIR = os.environ.get("BEAGLE_TMPDIR", "/tmp")
 
 PROCESS_SMILE_MESSAGES_PERIOD = os.environ.get("BEAGLE_PROCESS_SMILE_MESSAGES_PERIOD", 90)
+SMILE_IN_FLIGHT_TIMEOUT = int(os.environ.get("BEAGLE_SMILE_IN_FLIGHT_TIMEOUT", 3 * 60 * 60))
 PROCESS_REQUEST_CALLBACK_PERIOD = os.environ.get("BEAGLE_PROCESS_REQUEST_CALLBACK_PERIOD", 900)
-CHECK_JOB_STATUS_PERIOD = os.environ.get("BEAGLE_CHECK_JOB_STATUS_PERIOD", 60)
+# When the executor pushes status events, polling is only a slow reconciliation sweep
+RUN_STATUS_EVENTS_ACTIVE = os.environ.get("BEAGLE_RUN_STATUS_EVENTS_ACTIVE", "False") == "True"
+CHECK_JOB_STATUS_PERIOD = os.environ.get("BEAGLE_CHECK_JOB_STATUS_PERIOD", 900 if RUN_STATUS_EVENTS_ACTIVE else 60)
+CHECK_JOB_STATUS_INCREMENTAL = os.environ.get("BEAGLE_CHECK_JOB_STATUS_INCREMENTAL", "False") == "True"
+CHECK_JOB_STATUS_FULL_SYNC_PERIOD = int(os.environ.get("BEAGLE_CHECK_JOB_STATUS_FULL_SYNC_PERIOD", 3600))
+EXECUTOR_CLIENT = os.environ.get("BEAGLE_EXECUTOR_CLIENT", "runner.run.executor.executor_client.RidgebackClient")
 PROCESS_TRIGGERS_PERIOD = os.environ.get("BEAGLE_PROCESS_TRIGGERS_PERIOD", 120)
 CHECK_JOB_TIMEOUTS = os.environ.get("BEAGLE_CHECK_JOB_TIMEOUTS", 86400.0)
 OLD_REQUEST_TIMEDELTA = os.environ.get("BEAGLE_OLD_REQUEST_TIMEDELTA", 60)
@@ -485,10 +502,15 @@ DEFAULT_MAPPING = json.loads(os.environ.get("BEAGLE_COPY_MAPPING", "{}"))
 MAPPING = json.loads(os.environ.get("BEAGLE_FILE_MAPPING", "{}"))
 COPY_FILE_PERMISSION = 0o644
 COPY_DIR_PERMISSION = 0o750
+COPY_BUFFER_SIZE = int(os.environ.get("BEAGLE_COPY_BUFFER_SIZE", 16 * 1024 * 1024))
+COPY_CONCURRENCY_PER_FILESYSTEM = int(os.environ.get("BEAGLE_COPY_CONCURRENCY_PER_FILESYSTEM", 8))
+CHECKSUM_WORKERS = int(os.environ.get("BEAGLE_CHECKSUM_WORKERS", 4))
+COPY_SLOT_RETRY_COUNTDOWN = int(os.environ.get("BEAGLE_COPY_SLOT_RETRY_COUNTDOWN", 30))
 STAGE_DAYS = int(os.environ.get("BEAGLE_STAGE_DAYS", 30))
 
 FASTQ_DEFAULT_LOCATION_PREFIX = os.environ.get("BEAGLE_FASTQ_DEFAULT_LOCATION_PREFIX")
 FASTQ_IRIS_LOCATION_PREFIX = os.environ.get("BEAGLE_FASTQ_IRIS_LOCATION_PREFIX")
+FASTQ_PREFLIGHT_WORKERS = int(os.environ.get("BEAGLE_FASTQ_PREFLIGHT_WORKERS", 16))
 
 DEFAULT_LOG_PREFIX = os.environ.get("BEAGLE_DEFAULT_LOG_PREFIX", "")
 DEFAULT_LOG_PATH = os.environ.get("BEAGLE_DEFAULT_LOG_PATH", "/tmp")
@@ -514,6 +536,13 @@ MANUAL_RESTART_REPORT_PATH = os.environ.get("MANUAL_RESTART_REPORT_PATH", "/tmp/
 
 MISSING_FILES_REPORT_PATH = os.environ.get("BEAGLE_MISSING_FILES_REPORT_PATH")
 MISSING_FILES_REPORT_COUNT = int(os.environ.get("BEAGLE_MISSING_FILES_REPORT_COUNT", 10))
+# Reports of the daily scans of changed directories, kept apart from the weekly full scan reports
+MISSING_FILES_CHANGED_REPORT_COUNT = int(os.environ.get("BEAGLE_MISSING_FILES_CHANGED_REPORT_COUNT", 14))
+CHECK_FILES_WORKERS = int(os.environ.get("BEAGLE_CHECK_FILES_WORKERS", 16))
+CHECK_FILES_BATCH_SIZE = int(os.environ.get("BEAGLE_CHECK_FILES_BATCH_SIZE", 10000))
+STAT_CACHE_TTL = int(os.environ.get("BEAGLE_STAT_CACHE_TTL", 300))
+STAT_WORKERS = int(os.environ.get("BEAGLE_STAT_WORKERS", 16))
+RESOLVE_FILE_SIZES_BATCH_SIZE = int(os.environ.get("BEAGLE_RESOLVE_FILE_SIZES_BATCH_SIZE", 5000))
 
 GENE_PANEL_TABLE = {
     "IMPACT341": {
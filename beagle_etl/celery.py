@@ -44,9 +44,15 @@ app.conf.task_routes = {
     "runner.tasks.terminate_job": {"queue": settings.BEAGLE_RUNNER_QUEUE},
     "runner.tasks.complete_job": {"queue": settings.BEAGLE_RUNNER_QUEUE},
     "runner.tasks.fail_job": {"queue": settings.BEAGLE_RUNNER_QUEUE},
+    "runner.tasks.complete_jobs": {"queue": settings.BEAGLE_RUNNER_QUEUE},
+    "runner.tasks.fail_jobs": {"queue": settings.BEAGLE_RUNNER_QUEUE},
+    "runner.tasks.terminate_jobs": {"queue": settings.BEAGLE_RUNNER_QUEUE},
+    "runner.tasks.process_run_status_events": {"queue": settings.BEAGLE_RUNNER_QUEUE},
     "notifier.tasks.send_notification": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
+    "notifier.tasks.flush_notifications": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
     "file_system.tasks.populate_job_group_notifier_metadata": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
     "file_system.tasks.check_fastq_files": {"queue": settings.BEAGLE_CHECK_FILES_QUEUE},
+    "file_system.tasks.resolve_file_sizes": {"queue": settings.BEAGLE_CHECK_FILES_QUEUE},
     "beagle_etl.tasks.job_processor": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
     "beagle_etl.tasks.process_smile_events": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
     "beagle_etl.tasks.process_job_with_lock": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
@@ -54,6 +60,7 @@ app.conf.task_routes = {
     "beagle_etl.jobs.metadb_jobs.not_supported": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
     "beagle_etl.jobs.metadb_jobs.request_callback": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
     "beagle_etl.jobs.metadb_jobs.calculate_checksum": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
+    "beagle_etl.jobs.helper_jobs.calculate_checksums": {"queue": settings.BEAGLE_DEFAULT_QUEUE},
     "file_manager.tasks.stage_samples_job": {"queue": settings.BEAGLE_FILE_MANAGER_QUEUE},
     "file_manager.tasks.stage_file_job": {"queue": settings.BEAGLE_FILE_MANAGER_QUEUE},
     "file_manager.tasks.check_for_clean_up": {"queue": settings.BEAGLE_FILE_MANAGER_QUEUE},
@@ -101,6 +108,17 @@ app.conf.beat_schedule = {
         "schedule": crontab(day_of_week=1, hour=0, minute=0),
         "options": {"queue": settings.BEAGLE_CHECK_FILES_QUEUE},
     },
+    "check_missing_files_changed": {
+        "task": "file_system.tasks.check_fastq_files",
+        "schedule": crontab(day_of_week="tue-sun", hour=0, minute=0),
+        "kwargs": {"changed_only": True},
+        "options": {"queue": settings.BEAGLE_CHECK_FILES_QUEUE},
+    },
+    "resolve_file_sizes": {
+        "task": "file_system.tasks.resolve_file_sizes",
+        "schedule": crontab(minute="*/15"),
+        "options": {"queue": settings.BEAGLE_CHECK_FILES_QUEUE},
+    },
     "check_staged_file_cleanup": {
         "task": "file_manager.tasks.check_for_clean_up",
         "schedule": crontab(hour=2, minute=0),
@@ -0,0 +1,166 @@
+import os
+import time
+import logging
+from django.conf import settings
+from django.db import transaction
+from file_system.models import (
+    File,
+    FileType,
+    FileMetadata,
+    FileMetadataProjection,
+    Request,
+    Sample,
+    Patient,
+    RequestModelManager,
+    SampleModelManager,
+    PatientModelManager,
+)
+from beagle_etl.smile_message.metadata_validator import get_metadata_validator
+from file_system.helper.stat_service import stat_service
+from beagle_etl.jobs.helper_jobs import calculate_checksums
+
+
+logger = logging.getLogger(__name__)
+
+
+class BulkFileImporter(object):
+    """
+    Register a batch of files with a constant number of queries.
+
+    New files are validated in memory and inserted with bulk_create together with their
+    FileMetadata. Request, Sample and Patient objects are upserted once per distinct
+    metadata, and checksums are calculated in a single task. Files already registered
+    under the same original_path are not touched and are returned in `existing`, so the
+    caller can run them through the versioned update path.
+    """
+
+    def __init__(self, file_group=None, file_type="fastq", user=None, batch_size=1000):
+        self.file_group = file_group or settings.IMPORT_FILE_GROUP
+        self.file_type = file_type
+        self.user = user
+        self.batch_size = batch_size
+        self.metadata = dict()
+        self.created = dict()
+        self.existing = dict()
+        self.errors = dict()
+        self.timings = dict()
+
+    def add(self, path, metadata):
+        self.metadata[path] = metadata
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            file_type = FileType.objects.get_by_name(self.file_type)
+        except FileType.DoesNotExist:
+            for path in self.metadata:
+                self.errors[path] = f"Unknown file_type: {self.file_type}"
+            return self.created
+        valid = self._validate()
+        self.timings["validate"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = self._split_existing(valid)
+        with transaction.atomic():
+            self._create_files(new, file_type)
+        self.timings["create"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._update_versioned_instances([self.metadata[path] for path in self.created])
+        self.timings["versioned_instances"] = time.perf_counter() - start
+
+        if self.created:
+            calculate_checksums.delay([str(f.id) for f in self.created.values()])
+        logger.info(
+            "Bulk import: %s created, %s existing, %s failed. Timings: %s"
+            % (len(self.created), len(self.existing), len(self.errors), self.timings)
+        )
+        return self.created
+
+    def _validate(self):
+        valid = dict()
+        for path, metadata in self.metadata.items():
+            if len(path) > 400:
+                self.errors[path] = f"Path {path} longer than 400 characters"
+                continue
+            valid[path] = metadata
+        errors = get_metadata_validator().validate_many(valid.values())
+        for path, error in zip(list(valid.keys()), errors):
+            if error is not None:
+                self.errors[path] = str(error)
+                del valid[path]
+        return valid
+
+    def _split_existing(self, valid):
+        paths = list(valid.keys())
+        registered = File.objects.filter(file_group_id=self.file_group, original_path__in=paths)
+        for file_obj in registered:
+            self.existing[file_obj.original_path] = file_obj
+        path_conflicts = set(
+            File.objects.filter(file_group_id=self.file_group, path__in=paths)
+            .exclude(original_path__in=paths)
+            .values_list("path", flat=True)
+        )
+        new = dict()
+        for path, metadata in valid.items():
+            if path in self.existing:
+                continue
+            if path in path_conflicts:
+                self.errors[path] = f"File with path: {path} already exists in file_group: {self.file_group}"
+                continue
+            new[path] = metadata
+        return new
+
+    def _create_files(self, new, file_type):
+        files = []
+        file_metadata = []
+        sizes = stat_service.sizes(new.keys())
+        for path, metadata in new.items():
+            file_obj = File(
+                file_name=os.path.basename(path),
+                original_path=path,
+                path=path,
+                file_type=file_type,
+                file_group_id=self.file_group,
+                size=sizes[path],
+                request_id=metadata.get(settings.REQUEST_ID_METADATA_KEY),
+                samples=[metadata.get(settings.SAMPLE_ID_METADATA_KEY)],
+                patient_id=metadata.get(settings.PATIENT_ID_METADATA_KEY),
+                available=False,
+            )
+            files.append(file_obj)
+            file_metadata.append(FileMetadata(file=file_obj, metadata=metadata, user=self.user, version=0, latest=True))
+            self.created[path] = file_obj
+        File.objects.bulk_create(files, batch_size=self.batch_size)
+        FileMetadata.objects.bulk_create(file_metadata, batch_size=self.batch_size)
+        FileMetadataProjection.objects.sync_many(file_metadata)
+
+    @staticmethod
+    def _distinct(values):
+        distinct = dict()
+        for value in values:
+            distinct[tuple(sorted(value.items()))] = value
+        return distinct.values()
+
+    def _update_versioned_instances(self, metadata_list):
+        requests = [
+            RequestModelManager.extract_from_metadata(metadata)
+            for metadata in metadata_list
+            if metadata.get(settings.REQUEST_ID_METADATA_KEY)
+        ]
+        samples = [
+            SampleModelManager.extract_from_metadata(metadata)
+            for metadata in metadata_list
+            if metadata.get(settings.SAMPLE_ID_METADATA_KEY)
+        ]
+        patients = [
+            PatientModelManager.extract_from_metadata(metadata)
+            for metadata in metadata_list
+            if metadata.get(settings.PATIENT_ID_METADATA_KEY)
+        ]
+        for request in self._distinct(requests):
+            Request.objects.create_or_update_instance(**request, from_file=True)
+        for sample in self._distinct(samples):
+            Sample.objects.create_or_update_instance(**sample, from_file=True)
+        for patient in self._distinct(patients):
+            Patient.objects.create_or_update_instance(**patient, from_file=True)
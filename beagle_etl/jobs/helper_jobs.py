@@ -5,7 +5,8 @@ from celery import shared_task
 from django.conf import settings
 from file_system.models import File
 from file_system.repository import FileRepository
-from file_system.helper.checksum import sha1, FailedToCalculateChecksum
+from file_system.helper.checksum import sha1, sha1_many, fingerprint, FailedToCalculateChecksum
+from file_system.helper.stat_service import stat_service
 from beagle_etl.exceptions import (
     FailedToCopyFilePermissionDeniedException,
     DuplicatedFilesException,
@@ -65,10 +66,52 @@ def calculate_checksum(file_id):
     except File.DoesNotExist:
         logger.error("Failed to calculate checksum. Error: File %s not found", file_id)
         raise FailedToCalculateChecksum("Failed to calculate checksum. Error: File %s not found", file_id)
+    if f.size is None:
+        f.size = stat_service.size(f.original_path)
+        if f.size is not None:
+            f.save(update_fields=["size"])
+    current = fingerprint(f.original_path)
+    if f.checksum and current and current == f.checksum_fingerprint:
+        return
     try:
         checksum = sha1(f.original_path)
     except FailedToCalculateChecksum as e:
         logger.error(f"Failed to calculate checksum for file: {file_id}: {f.original_path}")
         raise FailedToCalculateChecksum("Failed to calculate checksum. Error: File %s not found", file_id)
     f.checksum = checksum
-    f.save(update_fields=["checksum"])
+    f.checksum_fingerprint = current
+    f.save(update_fields=["checksum", "checksum_fingerprint"])
+
+
+@shared_task
+def calculate_checksums(file_ids):
+    """
+    Calculate checksums for a batch of files in a single task, and the sizes which are still unknown.
+    Files are hashed concurrently, files unchanged since their checksum was recorded are skipped
+    """
+    files = list(
+        File.objects.filter(id__in=file_ids).only("id", "original_path", "size", "checksum", "checksum_fingerprint")
+    )
+    unknown_size = [f for f in files if f.size is None]
+    sizes = stat_service.sizes([f.original_path for f in unknown_size])
+    for f in unknown_size:
+        f.size = sizes[f.original_path]
+    File.objects.bulk_update([f for f in unknown_size if f.size is not None], ["size"], batch_size=1000)
+    fingerprints = dict()
+    to_hash = []
+    for f in files:
+        fingerprints[f.id] = fingerprint(f.original_path)
+        if not (f.checksum and fingerprints[f.id] and fingerprints[f.id] == f.checksum_fingerprint):
+            to_hash.append(f)
+    checksums = sha1_many({f.original_path for f in to_hash}, workers=settings.CHECKSUM_WORKERS)
+    updated = []
+    for f in to_hash:
+        checksum = checksums[f.original_path]
+        if isinstance(checksum, FailedToCalculateChecksum):
+            logger.error(f"Failed to calculate checksum for file: {f.id}: {f.original_path}")
+            continue
+        f.checksum = checksum
+        f.checksum_fingerprint = fingerprints[f.id]
+        updated.append(f)
+    File.objects.bulk_update(updated, ["checksum", "checksum_fingerprint"], batch_size=1000)
+    logger.info(f"Calculated {len(updated)} checksums, {len(files) - len(to_hash)} files unchanged")
@@ -35,7 +35,7 @@ from notifier.helper import get_emails_to_notify
 from beagle_etl.models import Operator, ETLConfiguration, SMILEMessage, RequestCallbackJob, RequestCallbackJobStatus
 from file_system.serializers import UpdateFileSerializer
 from file_system.repository.file_repository import FileRepository
-from file_system.models import File
+from file_system.models import File, Sample, Request
 from beagle_etl.exceptions import (
     FailedToSubmitToOperatorException,
     FailedToRegisterFileException,
@@ -46,6 +46,7 @@ from beagle_etl.exceptions import (
 from runner.tasks import create_jobs_from_request
 from file_system.serializers import CreateFileSerializer
 from beagle_etl.jobs.helper_jobs import fix_path_iris, calculate_checksum
+from beagle_etl.jobs.bulk_import import BulkFileImporter
 from django.contrib.auth.models import User
 from study.models import Study
 from study.objects import StudyObject
@@ -216,7 +217,8 @@ def new_request(message_id):
     valid_samples = {k for k, v in status.items() if v.status == "COMPLETED"}
     request_metadata = data.request_metadata()
 
-    import_status = True
+    importer = BulkFileImporter(file_group=settings.IMPORT_FILE_GROUP)
+    fastq_samples = dict()
     for sample in data.samples:
         if sample.primaryId in valid_samples:
             for library in sample.libraries:
@@ -226,22 +228,31 @@ def new_request(message_id):
                         metadata = copy.deepcopy(request_metadata)
                         metadata.update(sample_metadata)
                         fastq_location = fix_path_iris(fastq)
-                        try:
-                            file_obj = create_or_update_file(fastq_location, metadata, job_group_id=jgn_id)
-                        except FailedToRegisterFileException as e:
-                            logger.error(f"Failed to register file {fastq_location}")
-                            message.add_log(f"Failed to register file {fastq_location}")
-                            # Update sample status
-                            status[sample.primaryId].status = "FAILED"
-                            status[sample.primaryId].message += f"{str(e)}\n"
-                            import_status = False
-                        else:
-                            sample_objs = file_obj.get_samples()
-                            request_obj = file_obj.get_request()
-                            if sample_objs:
-                                [study.samples.add(sample_obj) for sample_obj in sample_objs]
-                            if request_obj:
-                                study.requests.add(request_obj)
+                        importer.add(fastq_location, metadata)
+                        fastq_samples[fastq_location] = sample.primaryId
+    importer.run()
+
+    file_objs = list(importer.created.values())
+    for fastq_location, file_obj in importer.existing.items():
+        try:
+            file_objs.append(update_file_object(file_obj, fastq_location, importer.metadata[fastq_location], jgn_id))
+        except FailedToRegisterFileException as e:
+            importer.errors[fastq_location] = str(e)
+
+    import_status = True
+    for fastq_location, error in importer.errors.items():
+        logger.error(f"Failed to register file {fastq_location}")
+        message.add_log(f"Failed to register file {fastq_location}")
+        # Update sample status
+        sample_id = fastq_samples[fastq_location]
+        status[sample_id].status = "FAILED"
+        status[sample_id].message += f"{error}\n"
+        import_status = False
+
+    sample_ids = {sample_id for file_obj in file_objs for sample_id in file_obj.samples}
+    request_ids = {file_obj.request_id for file_obj in file_objs if file_obj.request_id}
+    study.samples.add(*Sample.objects.filter(sample_id__in=sample_ids, latest=True))
+    study.requests.add(*Request.objects.filter(request_id__in=request_ids, latest=True))
 
     sample_status = sorted([sample.to_dict() for sample in status.values()], key=lambda d: d["sample"])
     message.set_sample_status(sample_status)
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.4 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import beagle_etl.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("beagle_etl", "0046_delete_skipproject"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="smilemessage",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="smilemessage",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    status__in=[
+                        beagle_etl.models.SmileMessageStatus(0),
+                        beagle_etl.models.SmileMessageStatus(1),
+                        beagle_etl.models.SmileMessageStatus(2),
+                    ]
+                ),
+                fields=("content_hash",),
+                name="unique_active_smile_message_content",
+            ),
+        ),
+    ]
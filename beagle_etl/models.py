@@ -52,6 +52,7 @@ class SMILEMessage(BaseModel):
     request_id = models.CharField(max_length=100)
     gene_panel = models.CharField(max_length=100, null=True, blank=True)
     message = models.TextField()
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
     log = models.TextField(blank=True, null=True, default="")
     sample_status = JSONField(blank=True, default=dict)
     job_group = models.ForeignKey(JobGroup, null=True, blank=True, on_delete=models.SET_NULL)
@@ -62,6 +63,21 @@ class SMILEMessage(BaseModel):
         db_index=True,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_hash"],
+                condition=models.Q(
+                    status__in=[
+                        SmileMessageStatus.PENDING,
+                        SmileMessageStatus.IN_PROGRESS,
+                        SmileMessageStatus.COPY_FILES,
+                    ]
+                ),
+                name="unique_active_smile_message_content",
+            )
+        ]
+
     def in_progress(self):
         self.status = SmileMessageStatus.IN_PROGRESS
         job_group = JobGroup.objects.create()
@@ -1,7 +1,10 @@
 import re
-from jsonschema import validate
+import json
+import hashlib
+import functools
+from jsonschema import validators
 from django.conf import settings
-from jsonschema.exceptions import ValidationError
+from jsonschema.exceptions import best_match
 from file_system.exceptions import MetadataValidationException
 
 
@@ -74,9 +77,38 @@ METADATA_SCHEMA = {
 }
 
 
+WHITESPACE_REGEX = re.compile("[\t\r\n]")
+NON_ALPHANUMERIC_REGEX = re.compile("[^a-zA-Z0-9 ]")
+
+_COMPILED_VALIDATORS = dict()
+
+
+def compiled_validator(schema):
+    """
+    Validator for a schema, checked against its meta-schema and built once per process.
+    Validators are keyed by the schema $id and a digest of the schema content
+    """
+    key = (schema.get("$id"), hashlib.sha1(json.dumps(schema, sort_keys=True).encode()).hexdigest())
+    validator = _COMPILED_VALIDATORS.get(key)
+    if validator is None:
+        cls = validators.validator_for(schema)
+        cls.check_schema(schema)
+        validator = _COMPILED_VALIDATORS[key] = cls(schema)
+    return validator
+
+
+@functools.lru_cache(maxsize=None)
+def get_metadata_validator():
+    """
+    Shared MetadataValidator for METADATA_SCHEMA
+    """
+    return MetadataValidator()
+
+
 class MetadataValidator(object):
     def __init__(self, schema=METADATA_SCHEMA):
         self.schema = schema
+        self.validator = compiled_validator(schema)
 
     @staticmethod
     def clean(metadata):
@@ -100,19 +132,33 @@ class MetadataValidator(object):
     @staticmethod
     def clean_value(val):
         if val:
-            regex = re.compile("[\t\r\n]")
-            result = regex.sub(" ", val)
+            result = WHITESPACE_REGEX.sub(" ", val)
             result = result.strip()
-            regex = re.compile("[^a-zA-Z0-9 ]")
-            result = regex.sub("", result)
+            result = NON_ALPHANUMERIC_REGEX.sub("", result)
             return result
         return None
 
+    def error(self, data):
+        """
+        Most relevant ValidationError of data, same as raised by jsonschema.validate, or None if data is valid
+        """
+        return best_match(self.validator.iter_errors(data))
+
     def validate(self, data):
-        try:
-            validate(instance=data, schema=self.schema)
-        except ValidationError as e:
-            raise MetadataValidationException(e)
+        error = self.error(data)
+        if error is not None:
+            raise MetadataValidationException(error)
+
+    def validate_many(self, items):
+        """
+        Validate a batch of metadata
+        :return: list with a MetadataValidationException for every invalid item and None for valid ones
+        """
+        errors = []
+        for data in items:
+            error = self.error(data)
+            errors.append(MetadataValidationException(error) if error is not None else None)
+        return errors
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from beagle_etl.smile_message.objects.sample_object import SampleMetadata
+from beagle_etl.smile_message.objects.validation.fastq_preflight import FastqPreflight
 from beagle_etl.exceptions import MissingDataException, ErrorInconsistentDataException
 
 
@@ -202,8 +203,9 @@ class RequestMetadata:
         """
         log = ""
         status = dict()
+        preflight = FastqPreflight.for_samples([sample for sample in self.samples if sample.igoComplete])
         for sample in self.samples:
-            sample_log, sample_status = sample.validate_with_file_checks(redelivery=redelivery)
+            sample_log, sample_status = sample.validate_with_file_checks(redelivery=redelivery, preflight=preflight)
             log += sample_log
             status[sample_status.sample_id] = sample_status
         return log, status
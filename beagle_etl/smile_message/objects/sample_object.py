@@ -13,8 +13,7 @@ from beagle_etl.exceptions import (
 )
 from runner.operator.helper import format_sample_name
 from beagle_etl.smile_message.objects.validation import SampleStatus
-from file_system.models import File
-from beagle_etl.jobs.helper_jobs import check_file_permissions, fix_path_iris
+from beagle_etl.smile_message.objects.validation.fastq_preflight import FastqPreflight
 
 logger = logging.getLogger(__name__)
 
@@ -469,7 +468,9 @@ class SampleMetadata:
             return False
         return self.additionalProperties.get("isCmoSample", "false").lower() == "true"
 
-    def validate_with_file_checks(self, redelivery: bool = False, log: str = "") -> (str, SampleStatus):
+    def validate_with_file_checks(
+        self, redelivery: bool = False, log: str = "", preflight: Optional[FastqPreflight] = None
+    ) -> (str, SampleStatus):
         """
         Comprehensive validation including file permission checks.
 
@@ -479,6 +480,7 @@ class SampleMetadata:
         Args:
             redelivery: If True, skip file conflict checks
             log: Existing log string to append to
+            preflight: File checks resolved for the whole request, computed for this sample if None
 
         Returns:
             Updated log string, SampleError
@@ -503,7 +505,7 @@ class SampleMetadata:
         try:
             log = self._validate_primary_id_format(log)
             log = self._validate_libraries_structure(log)
-            validation_results = self._validate_all_fastq_files()
+            validation_results = self._validate_all_fastq_files(preflight or FastqPreflight.for_samples([self]))
             log = self._process_validation_results(validation_results, log, redelivery)
         except Exception as e:
             if isinstance(e, ETLExceptions):
@@ -556,10 +558,13 @@ class SampleMetadata:
 
         return log
 
-    def _validate_all_fastq_files(self) -> Dict[str, Any]:
+    def _validate_all_fastq_files(self, preflight: FastqPreflight) -> Dict[str, Any]:
         """
         Validate all fastq files across all libraries.
 
+        Args:
+            preflight: File checks of the fastqs
+
         Returns:
             Dict containing validation results with keys:
                 - missing_fastq: bool
@@ -582,17 +587,18 @@ class SampleMetadata:
             run_dict = self._convert_runs_to_dict(library.runs)
 
             for run in run_dict.values():
-                self._validate_run_fastqs(run, results)
+                self._validate_run_fastqs(run, results, preflight)
 
         return results
 
-    def _validate_run_fastqs(self, run: Run, results: Dict[str, Any]) -> None:
+    def _validate_run_fastqs(self, run: Run, results: Dict[str, Any], preflight: FastqPreflight) -> None:
         """
         Validate fastq files for a single run.
 
         Args:
             run: Run object to validate
             results: Validation results dict to update
+            preflight: File checks of the fastqs
         """
         if not run.fastqs:
             logger.error(f"Failed to fetch SampleManifest for sampleId:{self.primaryId}. Fastqs empty.")
@@ -602,30 +608,26 @@ class SampleMetadata:
             return
 
         for fastq in run.fastqs:
-            self._validate_single_fastq(fastq, results)
+            self._validate_single_fastq(fastq, results, preflight)
 
-    def _validate_single_fastq(self, fastq: str, results: Dict[str, Any]) -> None:
+    def _validate_single_fastq(self, fastq: str, results: Dict[str, Any], preflight: FastqPreflight) -> None:
         """
         Validate a single fastq file.
 
         Args:
             fastq: Path to fastq file
             results: Validation results dict to update
+            preflight: File checks of the fastqs
         """
-        fastq_location = fix_path_iris(fastq)
-        try:
-            check_file_permissions(fastq_location)
-        except FailedToCopyFilePermissionDeniedException:
+        if not preflight.is_readable(fastq):
             results["permission_error"] = True
             results["permission_error_files"].append(fastq)
             return
-        try:
-            file_search = File.objects.get(original_path=fastq_location, file_group=settings.IMPORT_FILE_GROUP)
+        registered = preflight.registered_file(fastq)
+        if registered:
             logger.info(f"Processing {fastq}")
             results["conflict"] = True
-            results["conflict_files"].append((file_search.path, str(file_search.id)))
-        except File.DoesNotExist:
-            pass
+            results["conflict_files"].append(registered)
 
     def _process_validation_results(self, results: Dict[str, Any], log: str, redelivery: bool) -> str:
         """
@@ -0,0 +1,78 @@
+import os
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from file_system.models import File
+from beagle_etl.jobs.helper_jobs import check_file_permissions, fix_path_iris
+from beagle_etl.exceptions import FailedToCopyFilePermissionDeniedException
+
+
+logger = logging.getLogger(__name__)
+
+
+class FastqPreflight(object):
+    """
+    File checks for every fastq of a request, resolved up front.
+
+    Registered fastqs are found with one `original_path__in` query. Permissions are checked
+    in a thread pool, one task per directory, and fastqs in a directory which can't be
+    traversed are unreadable without checking them.
+    """
+
+    def __init__(self, fastqs, workers=None):
+        self.locations = {fastq: fix_path_iris(fastq) for fastq in fastqs}
+        self.workers = workers or settings.FASTQ_PREFLIGHT_WORKERS
+        self.readable = self._check_permissions()
+        self.registered = self._find_registered()
+
+    @classmethod
+    def for_samples(cls, samples, workers=None):
+        fastqs = []
+        for sample in samples:
+            for library in sample.libraries or []:
+                for run in library.runs or []:
+                    fastqs.extend(run.fastqs or [])
+        return cls(fastqs, workers)
+
+    def _check_permissions(self):
+        by_directory = defaultdict(list)
+        for location in set(self.locations.values()):
+            by_directory[os.path.dirname(location)].append(location)
+
+        def check_directory(item):
+            directory, locations = item
+            if not os.access(directory, os.X_OK):
+                return []
+            readable = []
+            for location in locations:
+                try:
+                    check_file_permissions(location)
+                except FailedToCopyFilePermissionDeniedException:
+                    continue
+                readable.append(location)
+            return readable
+
+        readable = set()
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            for locations in executor.map(check_directory, by_directory.items()):
+                readable.update(locations)
+        return readable
+
+    def _find_registered(self):
+        registered = dict()
+        files = File.objects.filter(
+            original_path__in=list(set(self.locations.values())), file_group=settings.IMPORT_FILE_GROUP
+        ).values_list("original_path", "path", "id")
+        for original_path, path, file_id in files:
+            registered[original_path] = (path, str(file_id))
+        return registered
+
+    def is_readable(self, fastq):
+        return self.locations.get(fastq, fix_path_iris(fastq)) in self.readable
+
+    def registered_file(self, fastq):
+        """
+        (path, id) of the file already registered for the fastq, or None
+        """
+        return self.registered.get(self.locations.get(fastq, fix_path_iris(fastq)))
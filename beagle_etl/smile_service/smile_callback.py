@@ -1,4 +1,5 @@
 import json
+import hashlib
 import logging
 from django.conf import settings
 from beagle_etl.models import SMILEMessage
@@ -7,14 +8,26 @@ from beagle_etl.models import SMILEMessage
 logger = logging.getLogger("smile_client")
 
 
-def persist_message(message):
+def content_hash(topic, data):
+    if isinstance(data, str):
+        data = data.encode()
+    hasher = hashlib.sha256(topic.encode())
+    hasher.update(b"\n")
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def build_message(topic, data):
+    """
+    SMILEMessage for a NATS message, with request_id and gene_panel read from the payload parsed once
+    """
+    msg = SMILEMessage(topic=topic, message=data, content_hash=content_hash(topic, data))
     try:
-        msg = SMILEMessage.objects.create(topic=message.subject, message=message.data)
-        data_dict = json.loads(message.data)
-        if message.subject == settings.METADB_NATS_NEW_REQUEST:
+        data_dict = json.loads(data)
+        if topic == settings.METADB_NATS_NEW_REQUEST:
             msg.request_id = data_dict.get(settings.REQUEST_ID_METADATA_KEY)
             msg.gene_panel = data_dict.get(settings.RECIPE_METADATA_KEY)
-        elif message.subject == settings.METADB_NATS_REQUEST_UPDATE:
+        elif topic == settings.METADB_NATS_REQUEST_UPDATE:
             if isinstance(data_dict, list) and len(data_dict) > 0:
                 last_item = data_dict[-1]
                 msg.request_id = last_item.get(settings.REQUEST_ID_METADATA_KEY)
@@ -26,9 +39,35 @@ def persist_message(message):
                         msg.gene_panel = request_metadata.get(settings.RECIPE_METADATA_KEY)
                     except:
                         pass  # If parsing fails, gene_panel remains None
-        elif message.subject == settings.METADB_NATS_SAMPLE_UPDATE:
+        elif topic == settings.METADB_NATS_SAMPLE_UPDATE:
             msg.request_id = data_dict["latestSampleMetadata"][settings.REQUEST_ID_METADATA_KEY]
             msg.gene_panel = data_dict["latestSampleMetadata"][settings.RECIPE_METADATA_KEY]
-        msg.save()
+    except Exception as e:
+        # Persist the message anyway, process_smile_events reports it when processing fails
+        logger.error(e)
+    if msg.request_id is None:
+        msg.request_id = ""
+    return msg
+
+
+def persist_messages(messages):
+    """
+    Insert a batch of NATS messages with one INSERT.
+    A message identical (topic and payload) to one which is still pending or in progress is a redelivery
+    and is skipped by the unique index on content_hash. Once the original is processed, the same content
+    is accepted again so a request can be redelivered on purpose.
+    :return: number of distinct messages in the batch
+    """
+    batch = dict()
+    for message in messages:
+        msg = build_message(message.subject, message.data)
+        batch.setdefault(msg.content_hash, msg)
+    SMILEMessage.objects.bulk_create(batch.values(), ignore_conflicts=True)
+    return len(batch)
+
+
+def persist_message(message):
+    try:
+        persist_messages([message])
     except Exception as e:
         logger.error(e)
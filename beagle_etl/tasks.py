@@ -10,6 +10,7 @@ from beagle_etl.jobs.metadb_jobs import (
     update_sample_job,
     request_callback,
 )
+from django.core.cache import cache
 from lib.memcache_lock import memcache_task_lock
 from ddtrace.trace import tracer
 from django.db.models import Case, When, IntegerField
@@ -18,10 +19,28 @@ from django.db.models import Case, When, IntegerField
 logger = logging.getLogger(__name__)
 
 
+JOB_FUNCTIONS = {
+    settings.METADB_NATS_NEW_REQUEST: "new_request",
+    settings.METADB_NATS_SAMPLE_UPDATE: "update_sample_job",
+    settings.METADB_NATS_REQUEST_UPDATE: "update_request_job",
+}
+
+
+def _in_flight_key(request_id):
+    return f"smile_in_flight_{request_id}"
+
+
+def _release_in_flight(request_id, message_id):
+    key = _in_flight_key(request_id)
+    if cache.get(key) == message_id:
+        cache.delete(key)
+
+
 @shared_task
 def process_job_with_lock(job_func_name, message_id):
     """
     Wrapper task that acquires a lock before executing the actual job.
+    When the job is done the next pending message of the same request is dispatched.
 
     Args:
         job_func_name: Name of the job function to execute ('new_request', 'update_request_job', 'update_sample_job')
@@ -34,91 +53,93 @@ def process_job_with_lock(job_func_name, message_id):
         if not acquired:
             print(f"Could not acquire lock for request {message.request_id}, skipping job {job_func_name}")
             logger.info(f"Could not acquire lock for request {message.request_id}, skipping job {job_func_name}")
+            _release_in_flight(message.request_id, message_id)
             return
 
-        message.in_progress()
-        if job_func_name == "new_request":
-            new_request(message_id)
-        elif job_func_name == "update_request_job":
-            update_request_job(message_id)
-        elif job_func_name == "update_sample_job":
-            update_sample_job(message_id)
-        else:
-            logger.error(f"Unknown job function: {job_func_name}")
-            raise ValueError(f"Unknown job function: {job_func_name}")
+        try:
+            message.in_progress()
+            if job_func_name == "new_request":
+                new_request(message_id)
+            elif job_func_name == "update_request_job":
+                update_request_job(message_id)
+            elif job_func_name == "update_sample_job":
+                update_sample_job(message_id)
+            else:
+                logger.error(f"Unknown job function: {job_func_name}")
+                raise ValueError(f"Unknown job function: {job_func_name}")
+        finally:
+            _release_in_flight(message.request_id, message_id)
 
+    dispatch_smile_messages(request_id=message.request_id)
 
-def get_pending_smile_messages():
+
+def get_pending_smile_messages(request_id=None):
     """
     Get the highest priority pending SMILE message for each request_id.
 
     For each request_id with pending messages, returns only the message with
-    the highest priority (NEW_REQUEST > SAMPLE_UPDATE > REQUEST_UPDATE).
+    the highest priority (NEW_REQUEST > SAMPLE_UPDATE > REQUEST_UPDATE),
+    the earliest one if several have the same priority.
 
     This ensures that within a request_id, messages are processed sequentially
     in priority order, while different request_ids can process in parallel.
 
+    Args:
+        request_id: Only return the head message of this request
+
     Returns:
-        QuerySet of SMILEMessage objects
+        QuerySet of SMILEMessage objects, selected with one DISTINCT ON (request_id) query
     """
-    from django.db.models import Min
-
-    # Get all pending messages with priority
     pending_messages = SMILEMessage.objects.filter(
         status=SmileMessageStatus.PENDING,
-        topic__in=[
-            settings.METADB_NATS_NEW_REQUEST,
-            settings.METADB_NATS_SAMPLE_UPDATE,
-            settings.METADB_NATS_REQUEST_UPDATE,
-        ],
-    ).annotate(
-        topic_priority=Case(
-            When(topic=settings.METADB_NATS_NEW_REQUEST, then=0),
-            When(topic=settings.METADB_NATS_SAMPLE_UPDATE, then=1),
-            When(topic=settings.METADB_NATS_REQUEST_UPDATE, then=2),
-            default=3,
-            output_field=IntegerField(),
+        topic__in=list(JOB_FUNCTIONS.keys()),
+    )
+    if request_id is not None:
+        pending_messages = pending_messages.filter(request_id=request_id)
+    return (
+        pending_messages.annotate(
+            topic_priority=Case(
+                When(topic=settings.METADB_NATS_NEW_REQUEST, then=0),
+                When(topic=settings.METADB_NATS_SAMPLE_UPDATE, then=1),
+                When(topic=settings.METADB_NATS_REQUEST_UPDATE, then=2),
+                default=3,
+                output_field=IntegerField(),
+            )
         )
+        .order_by("request_id", "topic_priority", "created_date")
+        .distinct("request_id")
+        .defer("message", "log", "sample_status")
     )
 
-    # For each request_id, find the minimum priority (highest priority message)
-    min_priorities = pending_messages.values("request_id").annotate(min_priority=Min("topic_priority"))
 
-    # Build a dict of request_id -> min_priority
-    min_priority_map = {item["request_id"]: item["min_priority"] for item in min_priorities}
-
-    # Filter to only return the highest priority message per request_id
-    result = []
-    for request_id, min_priority in min_priority_map.items():
-        highest_priority_msg = (
-            pending_messages.filter(request_id=request_id, topic_priority=min_priority).order_by("created_date").first()
-        )
-        if highest_priority_msg:
-            result.append(highest_priority_msg)
+def dispatch_smile_messages(request_id=None):
+    """
+    Dispatch the head message of every request which isn't already in flight.
+    A request is claimed in the cache when its message is dispatched and released when the job finishes,
+    so each request has at most one job queued or running.
 
-    return result
+    Returns:
+        Number of dispatched messages
+    """
+    messages = list(get_pending_smile_messages(request_id=request_id))
+    in_flight = cache.get_many([_in_flight_key(msg.request_id) for msg in messages])
+    dispatched = 0
+    for msg in messages:
+        key = _in_flight_key(msg.request_id)
+        if key in in_flight or not cache.add(key, str(msg.id), settings.SMILE_IN_FLIGHT_TIMEOUT):
+            continue
+        logger.info(f"Submitting {JOB_FUNCTIONS[msg.topic]} {str(msg.id)} for igoRequestId={msg.request_id}")
+        process_job_with_lock.delay(JOB_FUNCTIONS[msg.topic], str(msg.id))
+        dispatched += 1
+    return dispatched
 
 
 @shared_task
 @tracer.wrap(service="beagle")
 def process_smile_events():
     """Process pending SMILE messages in priority order."""
-    messages = get_pending_smile_messages()
-    logger.debug(f"Submitting {len(messages)} jobs")
-
-    for msg in messages:
-        current_span = tracer.current_span()
-        current_span.set_tag("request.id", msg.request_id)
-        logger.info(f"Processing {str(msg.id)} with igoRequestId={msg.request_id} received on topic={msg.topic}")
-        if msg.topic == settings.METADB_NATS_NEW_REQUEST:
-            logger.info(f"Submitting New Request {str(msg.id)}")
-            process_job_with_lock.delay("new_request", str(msg.id))
-        elif msg.topic == settings.METADB_NATS_SAMPLE_UPDATE:
-            logger.info(f"Submitting Update Sample {str(msg.id)}")
-            process_job_with_lock.delay("update_sample_job", str(msg.id))
-        elif msg.topic == settings.METADB_NATS_REQUEST_UPDATE:
-            logger.info(f"Submitting Update Request {str(msg.id)}")
-            process_job_with_lock.delay("update_request_job", str(msg.id))
+    dispatched = dispatch_smile_messages()
+    logger.debug(f"Submitted {dispatched} jobs")
 
     unknown_topics = SMILEMessage.objects.filter(status=SmileMessageStatus.PENDING).exclude(
         topic__in=(
@@ -0,0 +1,61 @@
+from mock import patch
+from django.conf import settings
+from django.test import TestCase, override_settings
+from beagle_etl.jobs.bulk_import import BulkFileImporter
+from file_system.models import File, FileMetadata, FileMetadataProjection, Request, Sample, Patient
+
+
+class TestBulkFileImporter(TestCase):
+    fixtures = [
+        "file_system.filegroup.json",
+        "file_system.filetype.json",
+        "file_system.storage.json",
+    ]
+
+    def setUp(self):
+        self.file_group_id = "1a1b29cf-3bc2-4f6c-b376-d4c5d701166a"
+
+    def _metadata(self, sample_id, patient_id):
+        return {
+            settings.REQUEST_ID_METADATA_KEY: "10000_A",
+            settings.SAMPLE_ID_METADATA_KEY: sample_id,
+            settings.PATIENT_ID_METADATA_KEY: patient_id,
+            settings.LAB_HEAD_NAME_METADATA_KEY: "Lab Head",
+        }
+
+    @patch("beagle_etl.jobs.helper_jobs.calculate_checksums.delay")
+    @override_settings(IMPORT_FILE_GROUP="1a1b29cf-3bc2-4f6c-b376-d4c5d701166a")
+    def test_bulk_import_new_files(self, calculate_checksums):
+        importer = BulkFileImporter()
+        for sample in range(3):
+            for read in ("R1", "R2"):
+                importer.add(
+                    f"/path/to/10000_A_{sample}_{read}.fastq.gz", self._metadata(f"10000_A_{sample}", "C-000001")
+                )
+        created = importer.run()
+        self.assertEqual(len(created), 6)
+        self.assertFalse(importer.errors)
+        self.assertEqual(File.objects.filter(file_group_id=self.file_group_id, available=False).count(), 6)
+        self.assertEqual(FileMetadata.objects.filter(latest=True, version=0).count(), 6)
+        self.assertEqual(FileMetadataProjection.objects.filter(request_id="10000_A").count(), 6)
+        self.assertEqual(Request.objects.filter(request_id="10000_A").count(), 1)
+        self.assertEqual(Sample.objects.filter(request_id="10000_A").count(), 3)
+        self.assertEqual(Patient.objects.filter(patient_id="C-000001").count(), 1)
+        calculate_checksums.assert_called_once()
+        self.assertEqual(len(calculate_checksums.call_args[0][0]), 6)
+
+    @patch("beagle_etl.jobs.helper_jobs.calculate_checksums.delay")
+    @override_settings(IMPORT_FILE_GROUP="1a1b29cf-3bc2-4f6c-b376-d4c5d701166a")
+    def test_bulk_import_existing_and_invalid_files(self, calculate_checksums):
+        importer = BulkFileImporter()
+        importer.add("/path/to/10000_A_1_R1.fastq.gz", self._metadata("10000_A_1", "C-000001"))
+        importer.run()
+
+        importer = BulkFileImporter()
+        importer.add("/path/to/10000_A_1_R1.fastq.gz", self._metadata("10000_A_1", "C-000001"))
+        importer.add("/path/to/10000_A_2_R1.fastq.gz", self._metadata("10000_A_2" * 10, "C-000001"))
+        created = importer.run()
+        self.assertEqual(len(created), 0)
+        self.assertIn("/path/to/10000_A_1_R1.fastq.gz", importer.existing)
+        self.assertIn("/path/to/10000_A_2_R1.fastq.gz", importer.errors)
+        self.assertEqual(File.objects.count(), 1)
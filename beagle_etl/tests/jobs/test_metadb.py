@@ -94,6 +94,9 @@ class TestSmileMessages(TestCase):
         self.file_group_id = "1a1b29cf-3bc2-4f6c-b376-d4c5d701166a"
         settings.ETL_USER = self.etl_user.username
         settings.NOTIFIER_ACTIVE = False
+        calculate_checksums = patch("beagle_etl.jobs.helper_jobs.calculate_checksums.delay")
+        calculate_checksums.start()
+        self.addCleanup(calculate_checksums.stop)
 
     @patch("os.access")
     @patch("notifier.tasks.notifier_start")
@@ -0,0 +1,41 @@
+import os
+import tempfile
+from django.test import TestCase, override_settings
+from file_system.models import File, FileGroup, FileType, Storage, StorageType
+from beagle_etl.smile_message.objects.validation.fastq_preflight import FastqPreflight
+
+
+class TestFastqPreflight(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        storage = Storage.objects.create(name="test_storage", type=StorageType.LOCAL)
+        self.file_group = FileGroup.objects.create(name="test_group", storage=storage)
+        self.fastqs = []
+        for name in ("R1.fastq.gz", "R2.fastq.gz"):
+            path = os.path.join(self.tmp.name, name)
+            open(path, "w").close()
+            self.fastqs.append(path)
+        self.registered = File.objects.create(
+            file_name="R1.fastq.gz",
+            path=self.fastqs[0],
+            original_path=self.fastqs[0],
+            file_type=FileType.objects.create(name="fastq"),
+            file_group=self.file_group,
+            size=0,
+        )
+
+    def test_preflight(self):
+        missing = os.path.join(self.tmp.name, "missing", "R1.fastq.gz")
+        with override_settings(
+            IMPORT_FILE_GROUP=str(self.file_group.id),
+            FASTQ_DEFAULT_LOCATION_PREFIX="/igo/delivery",
+            FASTQ_IRIS_LOCATION_PREFIX="/igo/delivery",
+        ):
+            with self.assertNumQueries(1):
+                preflight = FastqPreflight(self.fastqs + [missing], workers=2)
+        self.assertTrue(preflight.is_readable(self.fastqs[0]))
+        self.assertTrue(preflight.is_readable(self.fastqs[1]))
+        self.assertFalse(preflight.is_readable(missing))
+        self.assertEqual(preflight.registered_file(self.fastqs[0]), (self.fastqs[0], str(self.registered.id)))
+        self.assertIsNone(preflight.registered_file(self.fastqs[1]))
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.test import SimpleTestCase
+from file_system.exceptions import MetadataValidationException
+from beagle_etl.smile_message.metadata_validator import (
+    METADATA_SCHEMA,
+    MetadataValidator,
+    compiled_validator,
+    get_metadata_validator,
+)
+
+
+class TestMetadataValidator(SimpleTestCase):
+    def test_validator_is_compiled_once(self):
+        self.assertIs(MetadataValidator().validator, compiled_validator(dict(METADATA_SCHEMA)))
+        self.assertIs(get_metadata_validator(), get_metadata_validator())
+
+    def test_validate_many(self):
+        valid = {settings.REQUEST_ID_METADATA_KEY: "10000_A", settings.SAMPLE_ID_METADATA_KEY: "10000_A_1"}
+        invalid = {settings.REQUEST_ID_METADATA_KEY: 10000, settings.SAMPLE_ID_METADATA_KEY: "10000_A_1"}
+        errors = get_metadata_validator().validate_many([valid, invalid, valid])
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], MetadataValidationException)
+        self.assertIsNone(errors[2])
+        with self.assertRaises(MetadataValidationException):
+            get_metadata_validator().validate(invalid)
@@ -0,0 +1,31 @@
+import json
+from collections import namedtuple
+from django.conf import settings
+from django.test import TestCase
+from beagle_etl.models import SMILEMessage, SmileMessageStatus
+from beagle_etl.smile_service.smile_callback import persist_message, persist_messages
+
+
+NatsMessage = namedtuple("NatsMessage", ["subject", "data"])
+
+
+class TestSmileCallback(TestCase):
+    def _message(self, request_id):
+        data = json.dumps({settings.REQUEST_ID_METADATA_KEY: request_id, settings.RECIPE_METADATA_KEY: "IMPACT505"})
+        return NatsMessage(settings.METADB_NATS_NEW_REQUEST, data)
+
+    def test_persist_messages_skips_redeliveries(self):
+        first = self._message("10000_A")
+        second = self._message("10000_B")
+        persist_messages([first, first, second])
+        persist_message(first)
+        self.assertEqual(SMILEMessage.objects.count(), 2)
+        msg = SMILEMessage.objects.get(request_id="10000_A")
+        self.assertEqual(msg.gene_panel, "IMPACT505")
+        self.assertEqual(msg.status, SmileMessageStatus.PENDING)
+
+        # A processed message can be delivered again
+        msg.status = SmileMessageStatus.COMPLETED
+        msg.save(update_fields=["status"])
+        persist_message(first)
+        self.assertEqual(SMILEMessage.objects.filter(request_id="10000_A").count(), 2)
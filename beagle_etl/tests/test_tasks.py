@@ -1,11 +1,13 @@
 """
 Tests for beagle_etl.tasks module
 """
+from unittest.mock import patch
 from django.test import TestCase
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from beagle_etl.models import SMILEMessage, SmileMessageStatus
-from beagle_etl.tasks import get_pending_smile_messages
+from beagle_etl.tasks import get_pending_smile_messages, dispatch_smile_messages, process_job_with_lock
 from datetime import timedelta
 
 
@@ -206,3 +208,46 @@ class TestGetPendingSmileMessages(TestCase):
         self.assertEqual(len(completed_test_messages), 1)
         self.assertEqual(completed_test_messages[0].id, pending_msg.id)
         self.assertEqual(completed_test_messages[0].status, SmileMessageStatus.PENDING)
+
+
+class TestDispatchSmileMessages(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.new_request = SMILEMessage.objects.create(
+            topic=settings.METADB_NATS_NEW_REQUEST, request_id="REQ_001", message="{}"
+        )
+        self.request_update = SMILEMessage.objects.create(
+            topic=settings.METADB_NATS_REQUEST_UPDATE, request_id="REQ_001", message="{}"
+        )
+        self.other_request = SMILEMessage.objects.create(
+            topic=settings.METADB_NATS_SAMPLE_UPDATE, request_id="REQ_002", message="{}"
+        )
+
+    def test_get_pending_smile_messages_single_query(self):
+        with self.assertNumQueries(1):
+            messages = list(get_pending_smile_messages())
+        self.assertEqual({msg.id for msg in messages}, {self.new_request.id, self.other_request.id})
+
+    @patch("beagle_etl.tasks.process_job_with_lock.delay")
+    def test_dispatch_skips_requests_in_flight(self, delay):
+        self.assertEqual(dispatch_smile_messages(), 2)
+        delay.assert_any_call("new_request", str(self.new_request.id))
+        delay.assert_any_call("update_sample_job", str(self.other_request.id))
+
+        # Both requests are in flight until their jobs finish
+        self.assertEqual(dispatch_smile_messages(), 0)
+
+    @patch("beagle_etl.tasks.new_request")
+    @patch("beagle_etl.tasks.SMILEMessage.in_progress")
+    @patch("beagle_etl.tasks.process_job_with_lock.delay")
+    def test_finished_job_dispatches_next_message(self, delay, in_progress, new_request):
+        dispatch_smile_messages(request_id="REQ_001")
+        delay.reset_mock()
+
+        def complete(message_id):
+            SMILEMessage.objects.filter(id=message_id).update(status=SmileMessageStatus.COMPLETED)
+
+        new_request.side_effect = complete
+        process_job_with_lock("new_request", str(self.new_request.id))
+        delay.assert_called_once_with("update_request_job", str(self.request_update.id))
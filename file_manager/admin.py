@@ -17,6 +17,7 @@ class SampleProviderJobAdmin(admin.ModelAdmin):
         "completed_files",
         "total_files",
         "progress_percentage",
+        "copy_throughput",
         "created_date",
         "modified_date",
     )
@@ -121,6 +122,13 @@ class SampleProviderJobAdmin(admin.ModelAdmin):
 
     progress_percentage.short_description = "Progress"
 
+    def copy_throughput(self, obj):
+        if obj.throughput is None:
+            return "-"
+        return f"{obj.throughput / (1024 * 1024):.1f} MiB/s"
+
+    copy_throughput.short_description = "Throughput"
+
 
 @admin.register(FileProviderJob)
 class FileProviderJobAdmin(admin.ModelAdmin):
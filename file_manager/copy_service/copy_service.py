@@ -1,15 +1,27 @@
 import os
+import errno
+import hashlib
 import logging
-from shutil import copyfile
 from django.conf import settings
 
 
 logger = logging.getLogger(__name__)
 
 
+PARTIAL_SUFFIX = ".part"
+SOURCE_SUFFIX = ".source"
+
+
 class CopyService(object):
     @staticmethod
-    def copy(path_from, path_to):
+    def copy(path_from, path_to, hasher=None):
+        """
+        Copy path_from to path_to through a path_to.part file which is renamed when the copy is complete.
+        A .part file left by an interrupted copy is resumed instead of copied again, if the source has the same
+        inode, size and mtime as when the interrupted copy started. Otherwise it is copied from the start.
+        :param hasher: optional hashlib object updated with the content while copying, forces a buffered copy
+        :return: number of bytes copied
+        """
         logger.info("Copy path from {path_from} to {path_to}".format(path_from=path_from, path_to=path_to))
 
         dirname = os.path.dirname(path_to)
@@ -21,8 +33,128 @@ class CopyService(object):
                 os.makedirs(dirname, mode=settings.COPY_DIR_PERMISSION, exist_ok=True)
                 break
 
-        copyfile(path_from, path_to)
+        partial_path = path_to + PARTIAL_SUFFIX
+        copied = CopyService._transfer(path_from, partial_path, hasher)
+        os.replace(partial_path, path_to)
         os.chmod(path_to, settings.COPY_FILE_PERMISSION)
+        try:
+            os.remove(partial_path + SOURCE_SUFFIX)
+        except FileNotFoundError:
+            pass
+        return copied
+
+    @staticmethod
+    def source_fingerprint(path):
+        """
+        inode, size and mtime of the source of a copy, a .part file is resumed only while it stays the same
+        """
+        return CopyService._fingerprint(os.stat(path))
+
+    @staticmethod
+    def _fingerprint(stat):
+        return "%s:%s:%s" % (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _read_source(partial_path):
+        try:
+            with open(partial_path + SOURCE_SUFFIX) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write_source(partial_path, source):
+        with open(partial_path + SOURCE_SUFFIX, "w") as f:
+            f.write(source)
+
+    @staticmethod
+    def _transfer(path_from, partial_path, hasher=None):
+        src = os.open(path_from, os.O_RDONLY)
+        try:
+            dst = os.open(partial_path, os.O_WRONLY | os.O_CREAT, settings.COPY_FILE_PERMISSION)
+            try:
+                src_stat = os.fstat(src)
+                size = src_stat.st_size
+                source = CopyService._fingerprint(src_stat)
+                offset = os.fstat(dst).st_size
+                if offset > size or (offset and CopyService._read_source(partial_path) != source):
+                    # the source changed since the interrupted copy, its prefix is stale
+                    offset = 0
+                os.ftruncate(dst, offset)
+                CopyService._write_source(partial_path, source)
+                if offset:
+                    logger.info("Resuming copy of {path} at {offset} bytes".format(path=path_from, offset=offset))
+                if hasher is not None:
+                    if offset:
+                        CopyService._hash_range(partial_path, offset, hasher)
+                    CopyService._buffered_copy(src, dst, offset, hasher)
+                else:
+                    CopyService._zero_copy(src, dst, offset, size)
+                return size - offset
+            finally:
+                os.close(dst)
+        finally:
+            os.close(src)
+
+    @staticmethod
+    def _zero_copy(src, dst, offset, size):
+        """
+        Copy inside the kernel with copy_file_range, falling back to a buffered copy
+        when the filesystems do not support it
+        """
+        if not hasattr(os, "copy_file_range"):
+            return CopyService._buffered_copy(src, dst, offset)
+        while offset < size:
+            try:
+                copied = os.copy_file_range(
+                    src, dst, min(size - offset, settings.COPY_BUFFER_SIZE), offset_src=offset, offset_dst=offset
+                )
+            except OSError as e:
+                if e.errno in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    return CopyService._buffered_copy(src, dst, offset)
+                raise
+            if copied == 0:
+                break
+            offset += copied
+
+    @staticmethod
+    def _buffered_copy(src, dst, offset, hasher=None):
+        os.lseek(src, offset, os.SEEK_SET)
+        os.lseek(dst, offset, os.SEEK_SET)
+        buffer = bytearray(settings.COPY_BUFFER_SIZE)
+        view = memoryview(buffer)
+        with open(src, "rb", buffering=0, closefd=False) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                chunk = view[:n]
+                if hasher is not None:
+                    hasher.update(chunk)
+                while chunk:
+                    written = os.write(dst, chunk)
+                    chunk = chunk[written:]
+
+    @staticmethod
+    def _hash_range(path, length, hasher):
+        with open(path, "rb") as f:
+            while length > 0:
+                contents = f.read(min(length, settings.COPY_BUFFER_SIZE))
+                if not contents:
+                    break
+                hasher.update(contents)
+                length -= len(contents)
+
+    @staticmethod
+    def filesystem_key(gene_panel, path):
+        """
+        Source and destination root of the mapping used to stage path.
+        Copies with the same key read from and write to the same filesystems.
+        """
+        prefix, dst = CopyService._get_mapping(gene_panel, path)
+        if not prefix:
+            return None
+        return hashlib.md5(("%s>%s" % (prefix, dst)).encode()).hexdigest()
 
     @staticmethod
     def remap(gene_panel, path, mapping=settings.DEFAULT_MAPPING):
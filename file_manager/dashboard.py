@@ -47,6 +47,8 @@ def build_dashboard_payload():
                 "status": FileProviderStatus(sample.status).name,
                 "completed": sample.completed_files,
                 "total": sample.total_files,
+                "bytes_copied": sample.bytes_copied,
+                "throughput": sample.throughput,
                 "files": _bucket_files(sample.file_jobs.all()),
             }
         )
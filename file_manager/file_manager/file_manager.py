@@ -1,4 +1,7 @@
+from itertools import zip_longest
+from collections import defaultdict
 from django.conf import settings
+from django.db.models import F
 from file_system.repository import FileRepository
 from file_manager.copy_service.copy_service import CopyService
 from file_manager.tasks import stage_file_job
@@ -17,37 +20,59 @@ class FileManager(object):
         Stage files for a sample.
         Returns (SampleProviderJob, list of task signatures)
         """
-        sample_job, created = SampleProviderJob.objects.get_or_create_for_sample(sample_id)
+        sample_jobs, task_signatures = self.stage_samples([sample_id])
+        return sample_jobs[sample_id], task_signatures
 
-        files = FileRepository.filter(metadata={settings.SAMPLE_ID_METADATA_KEY: sample_id}, file_group=self.file_group)
-        gene_panel = FileRepository.filter(
-            metadata={settings.SAMPLE_ID_METADATA_KEY: sample_id},
-            file_group=self.file_group,
-            values_metadata=settings.RECIPE_METADATA_KEY,
-        ).first()
-
-        files_to_stage = 0
+    def stage_samples(self, sample_ids):
+        """
+        Stage files for a list of samples. Files of all samples are planned with one query.
+        Returns (dict of sample_id to SampleProviderJob, list of task signatures).
+        Signatures are interleaved by filesystem, so copies are spread across filesystems
+        instead of queueing behind the busiest one.
+        """
+        sample_ids = list(dict.fromkeys(sample_ids))
+        files = (
+            FileRepository.all()
+            .filter(file__file_group=self.file_group, projection__sample_id__in=sample_ids)
+            .select_related("file")
+            .annotate(plan_sample_id=F("projection__sample_id"), plan_recipe=F("projection__recipe"))
+        )
+        sample_files = defaultdict(list)
+        gene_panels = dict()
         for f in files:
-            if not f.file.is_available:
-                new_path = CopyService.remap(gene_panel, f.file.path)
-                if new_path != f.file.path:
-                    files_to_stage += 1
+            sample_files[f.plan_sample_id].append(f.file)
+            if f.plan_recipe and f.plan_sample_id not in gene_panels:
+                gene_panels[f.plan_sample_id] = f.plan_recipe
 
-        sample_job.total_files = files_to_stage
+        sample_jobs = dict()
+        by_filesystem = defaultdict(list)
+        for sample_id in sample_ids:
+            gene_panel = gene_panels.get(sample_id)
+            sample_job, created = SampleProviderJob.objects.get_or_create_for_sample(sample_id)
 
-        # Mark as completed immediately if no files need staging
-        if files_to_stage == 0:
-            sample_job.status = FileProviderStatus.COMPLETED
+            files_to_stage = [
+                file_obj
+                for file_obj in sample_files[sample_id]
+                if not file_obj.is_available and CopyService.remap(gene_panel, file_obj.path) != file_obj.path
+            ]
+            sample_job.total_files = len(files_to_stage)
 
-        sample_job.save()
+            # Mark as completed immediately if no files need staging
+            if not files_to_stage:
+                sample_job.status = FileProviderStatus.COMPLETED
 
-        task_signatures = []
-        for f in files:
-            task_sig = self.stage_file(f.file, gene_panel, str(sample_job.id))
-            if task_sig:
-                task_signatures.append(task_sig)
+            sample_job.save()
+            sample_jobs[sample_id] = sample_job
+
+            for file_obj in files_to_stage:
+                task_sig = self.stage_file(file_obj, gene_panel, str(sample_job.id))
+                if task_sig:
+                    by_filesystem[task_sig.kwargs.get("filesystem")].append(task_sig)
 
-        return sample_job, task_signatures
+        task_signatures = [
+            task_sig for batch in zip_longest(*by_filesystem.values()) for task_sig in batch if task_sig is not None
+        ]
+        return sample_jobs, task_signatures
 
     def stage_file(self, file_obj, gene_panel, sample_job=None):
         """
@@ -62,5 +87,7 @@ class FileManager(object):
                 )
                 if created:
                     # Return signature for chord
-                    return stage_file_job.si(str(fp_job.id), sample_job)
+                    return stage_file_job.si(
+                        str(fp_job.id), sample_job, filesystem=CopyService.filesystem_key(gene_panel, file_obj.path)
+                    )
         return None
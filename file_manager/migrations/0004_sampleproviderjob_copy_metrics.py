@@ -0,0 +1,23 @@
+# Generated by Django 6.0.4 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("file_manager", "0003_fileproviderjob_sample_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sampleproviderjob",
+            name="bytes_copied",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="sampleproviderjob",
+            name="copy_seconds",
+            field=models.FloatField(default=0),
+        ),
+    ]
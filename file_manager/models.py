@@ -53,9 +53,18 @@ class SampleProviderJob(BaseModel):
     )
     total_files = models.IntegerField(default=0)
     completed_files = models.IntegerField(default=0)
+    bytes_copied = models.BigIntegerField(default=0)
+    copy_seconds = models.FloatField(default=0)
 
     objects = SampleProviderJobManager()
 
+    @property
+    def throughput(self):
+        """Average copy throughput of the staged files in bytes per second."""
+        if not self.copy_seconds:
+            return None
+        return self.bytes_copied / self.copy_seconds
+
     def is_completed(self):
         """Check if all files for this request are completed."""
         return self.total_files > 0 and self.completed_files >= self.total_files
@@ -73,6 +82,12 @@ class SampleProviderJob(BaseModel):
                 job.status = FileProviderStatus.IN_PROGRESS
             job.save()
 
+    def record_copy(self, size, seconds):
+        """Add a finished copy to the throughput counters (thread-safe)."""
+        SampleProviderJob.objects.filter(id=self.id).update(
+            bytes_copied=F("bytes_copied") + size, copy_seconds=F("copy_seconds") + seconds
+        )
+
 
 class FileProviderManager(models.Manager):
     def provide_file(self, file_object, original_path, staged_path, sample_job=None):
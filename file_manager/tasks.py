@@ -1,8 +1,12 @@
 import os
+import time
+import hashlib
 import logging
 from celery import shared_task
 from django.conf import settings
 from datetime import date, datetime, timedelta
+from lib.memcache_lock import memcache_semaphore
+from file_system.helper.checksum import fingerprint, format_sha1
 from file_manager.copy_service.copy_service import CopyService
 from .models import FileProviderStatus, FileProviderJob, SampleProviderJob, CleanupFileJob
 
@@ -10,15 +14,42 @@ from .models import FileProviderStatus, FileProviderJob, SampleProviderJob, Clea
 logger = logging.getLogger()
 
 
-@shared_task
-def stage_file_job(file_provide_job_id, sample_job=None):
+@shared_task(bind=True)
+def stage_file_job(self, file_provide_job_id, sample_job=None, filesystem=None):
+    """
+    Copy a file to its staged path. At most COPY_CONCURRENCY_PER_FILESYSTEM copies run at the same time
+    for a filesystem, the task is retried later when all slots are taken.
+    """
+    if filesystem is None:
+        _stage_file(file_provide_job_id, sample_job)
+        return
+    with memcache_semaphore(
+        "copy_slots_%s" % filesystem, settings.COPY_CONCURRENCY_PER_FILESYSTEM, expiration=60 * 60 * 6
+    ) as acquired:
+        if not acquired:
+            raise self.retry(countdown=settings.COPY_SLOT_RETRY_COUNTDOWN, max_retries=None)
+        _stage_file(file_provide_job_id, sample_job)
+
+
+def _stage_file(file_provide_job_id, sample_job=None):
     file_provide_job = FileProviderJob.objects.get(id=file_provide_job_id)
     file_provide_job.in_progress()
 
     try:
-        CopyService.copy(file_provide_job.original_path, file_provide_job.staged_path)
-        file_provide_job.file_object.path = file_provide_job.staged_path
-        file_provide_job.file_object.set_available()
+        file_object = file_provide_job.file_object
+        # Checksum the file in the copy pass unless the recorded checksum is still valid
+        original_fingerprint = fingerprint(file_provide_job.original_path)
+        hasher = None
+        if not file_object.checksum or original_fingerprint != file_object.checksum_fingerprint:
+            hasher = hashlib.sha1()
+        start = time.monotonic()
+        copied = CopyService.copy(file_provide_job.original_path, file_provide_job.staged_path, hasher=hasher)
+        elapsed = time.monotonic() - start
+        if hasher is not None and original_fingerprint:
+            file_object.checksum = format_sha1(hasher)
+            file_object.checksum_fingerprint = original_fingerprint
+        file_object.path = file_provide_job.staged_path
+        file_object.set_available(update_fields=["path", "checksum", "checksum_fingerprint"])
     except Exception as e:
         logger.error(f"Failed to copy file {str(e)}")
         file_provide_job.set_failed()
@@ -27,6 +58,7 @@ def stage_file_job(file_provide_job_id, sample_job=None):
         if sample_job:
             try:
                 sample_job = SampleProviderJob.objects.get(id=sample_job)
+                sample_job.record_copy(copied, elapsed)
                 sample_job.increment_completed()
             except SampleProviderJob.DoesNotExist:
                 logger.warning(f"SampleProviderJob for id {sample_job} not found")
@@ -44,8 +76,9 @@ def stage_samples_job(sample_ids, file_group=None):
     """
     Stage files for a list of samples in the background.
 
-    For each sample, creates the SampleProviderJob and FileProviderJob records
-    and dispatches a stage_file_job task per file that needs staging.
+    Files of all samples are planned with one FileManager.stage_samples call, which creates the
+    SampleProviderJob and FileProviderJob records. A stage_file_job task is dispatched per file that
+    needs staging, interleaved by filesystem.
     """
     from file_manager.file_manager.file_manager import FileManager
 
@@ -54,25 +87,20 @@ def stage_samples_job(sample_ids, file_group=None):
 
     file_manager = FileManager(file_group=file_group)
 
-    for sample_id in sample_ids:
-        try:
-            sample_job, task_sigs = file_manager.stage_sample(sample_id)
-        except Exception as e:
-            logger.error(f"Error staging sample {sample_id}: {str(e)}")
-            continue
+    try:
+        sample_jobs, task_sigs = file_manager.stage_samples(sample_ids)
+    except Exception as e:
+        logger.error(f"Error staging samples {sample_ids}: {str(e)}")
+        return
 
+    for sample_id, sample_job in sample_jobs.items():
         if sample_job.total_files > 0:
-            if task_sigs:
-                for task in task_sigs:
-                    task.delay()
-                logger.info(f"Staged {len(task_sigs)} files for sample {sample_id}")
-            else:
-                logger.warning(
-                    f"Sample {sample_id} has {sample_job.total_files} files to stage, "
-                    f"but no tasks were created (files may already be staging)"
-                )
+            logger.info(f"Sample {sample_id} requires staging of {sample_job.total_files} files")
         else:
             logger.info(f"No files need staging for sample {sample_id}")
+    for task in task_sigs:
+        task.delay()
+    logger.info(f"Staged {len(task_sigs)} files for {len(sample_jobs)} samples")
 
 
 @shared_task
@@ -105,5 +133,5 @@ def clean_up_file(clean_up_file_job_id):
         return
 
     clean_up_file_job.file_object.path = clean_up_file_job.original_path
-    clean_up_file_job.file_object.set_unavailable()
+    clean_up_file_job.file_object.set_unavailable(update_fields=["path"])
     clean_up_file_job.set_completed()
@@ -1,5 +1,8 @@
-from django.test import TestCase
-from file_manager.copy_service.copy_service import CopyService
+import os
+import hashlib
+import tempfile
+from django.test import TestCase, override_settings
+from file_manager.copy_service.copy_service import CopyService, PARTIAL_SUFFIX, SOURCE_SUFFIX
 
 
 class CopyServiceTest(TestCase):
@@ -92,3 +95,72 @@ class CopyServiceTest(TestCase):
         # Reconstruct original
         reconstructed = staged_path.replace(dst, prefix)
         self.assertEqual(reconstructed, original_path)
+
+    @override_settings(COPY_BUFFER_SIZE=1024)
+    def test_copy_resumes_partial_file(self):
+        """An interrupted copy continues from the .part file and the checksum covers the whole file"""
+        content = os.urandom(10 * 1024 + 7)
+        with tempfile.TemporaryDirectory() as tmp:
+            path_from = os.path.join(tmp, "source.fastq")
+            path_to = os.path.join(tmp, "staged", "file.fastq")
+            with open(path_from, "wb") as f:
+                f.write(content)
+            os.makedirs(os.path.dirname(path_to))
+            with open(path_to + PARTIAL_SUFFIX, "wb") as f:
+                f.write(content[:4096])
+            with open(path_to + PARTIAL_SUFFIX + SOURCE_SUFFIX, "w") as f:
+                f.write(CopyService.source_fingerprint(path_from))
+
+            hasher = hashlib.sha1()
+            copied = CopyService.copy(path_from, path_to, hasher=hasher)
+
+            self.assertEqual(copied, len(content) - 4096)
+            self.assertFalse(os.path.exists(path_to + PARTIAL_SUFFIX))
+            self.assertFalse(os.path.exists(path_to + PARTIAL_SUFFIX + SOURCE_SUFFIX))
+            with open(path_to, "rb") as f:
+                self.assertEqual(f.read(), content)
+            self.assertEqual(hasher.hexdigest(), hashlib.sha1(content).hexdigest())
+
+            os.remove(path_to)
+            self.assertEqual(CopyService.copy(path_from, path_to), len(content))
+            with open(path_to, "rb") as f:
+                self.assertEqual(f.read(), content)
+
+    @override_settings(COPY_BUFFER_SIZE=1024)
+    def test_copy_restarts_when_source_changed(self):
+        """A .part file of a source which was rewritten since the interrupted copy is not resumed"""
+        old_content = os.urandom(4096)
+        content = os.urandom(10 * 1024 + 7)
+        with tempfile.TemporaryDirectory() as tmp:
+            path_from = os.path.join(tmp, "source.fastq")
+            path_to = os.path.join(tmp, "staged", "file.fastq")
+            with open(path_from, "wb") as f:
+                f.write(old_content)
+            os.makedirs(os.path.dirname(path_to))
+            with open(path_to + PARTIAL_SUFFIX, "wb") as f:
+                f.write(old_content)
+            with open(path_to + PARTIAL_SUFFIX + SOURCE_SUFFIX, "w") as f:
+                f.write(CopyService.source_fingerprint(path_from))
+            with open(path_from, "wb") as f:
+                f.write(content)
+
+            hasher = hashlib.sha1()
+            self.assertEqual(CopyService.copy(path_from, path_to, hasher=hasher), len(content))
+            with open(path_to, "rb") as f:
+                self.assertEqual(f.read(), content)
+            self.assertEqual(hasher.hexdigest(), hashlib.sha1(content).hexdigest())
+
+    def test_copy_restarts_without_source_fingerprint(self):
+        """A .part file without the fingerprint of its source is copied again"""
+        content = os.urandom(8192)
+        with tempfile.TemporaryDirectory() as tmp:
+            path_from = os.path.join(tmp, "source.fastq")
+            path_to = os.path.join(tmp, "file.fastq")
+            with open(path_from, "wb") as f:
+                f.write(content)
+            with open(path_to + PARTIAL_SUFFIX, "wb") as f:
+                f.write(b"x" * 4096)
+
+            self.assertEqual(CopyService.copy(path_from, path_to), len(content))
+            with open(path_to, "rb") as f:
+                self.assertEqual(f.read(), content)
@@ -1,6 +1,7 @@
 from unittest.mock import patch
+from django.conf import settings
 from django.test import TestCase
-from file_system.models import File, FileGroup, FileType, Storage, StorageType
+from file_system.models import File, FileGroup, FileMetadata, FileType, Storage, StorageType
 from file_manager.models import FileProviderJob, SampleProviderJob
 from file_manager.file_manager.file_manager import FileManager
 
@@ -29,3 +30,37 @@ class StageFileTest(TestCase):
 
         job = FileProviderJob.objects.get(file_object=self.file)
         self.assertEqual(job.sample_job, self.sample_job)
+
+    @patch("file_manager.file_manager.file_manager.CopyService.remap")
+    def test_stage_samples(self, mock_remap):
+        """stage_samples plans the files of all samples and creates one SampleProviderJob per sample"""
+        mock_remap.side_effect = lambda gene_panel, path: path.replace("/original", "/staged")
+        output_group = FileGroup.objects.create(name="output_group", storage=self.storage)
+        for sample_id, available, file_group in (
+            ("Sample_001", False, self.file_group),
+            ("Sample_002", False, self.file_group),
+            ("Sample_003", True, self.file_group),
+            ("Sample_002", False, output_group),
+        ):
+            file_obj = File.objects.create(
+                file_name=f"{sample_id}.fastq",
+                path=f"/original/{file_group.name}/{sample_id}.fastq",
+                file_type=self.file_type,
+                file_group=file_group,
+                available=available,
+            )
+            FileMetadata.objects.create(
+                file=file_obj,
+                metadata={settings.SAMPLE_ID_METADATA_KEY: sample_id, settings.RECIPE_METADATA_KEY: "IMPACT468"},
+            )
+
+        file_manager = FileManager(file_group=self.file_group)
+        sample_jobs, task_sigs = file_manager.stage_samples(["Sample_001", "Sample_002", "Sample_003"])
+
+        self.assertEqual(len(task_sigs), 2)
+        self.assertEqual(sample_jobs["Sample_001"].total_files, 1)
+        self.assertEqual(sample_jobs["Sample_002"].total_files, 1)
+        self.assertEqual(sample_jobs["Sample_003"].total_files, 0)
+        self.assertEqual(FileProviderJob.objects.filter(sample_job__sample_id="Sample_002").count(), 1)
+        mock_remap.assert_any_call("IMPACT468", "/original/test_group/Sample_001.fastq")
+        self.assertFalse(FileProviderJob.objects.filter(file_object__file_group=output_group).exists())
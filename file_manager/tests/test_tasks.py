@@ -1,8 +1,9 @@
 import os
 import tempfile
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 from django.test import TestCase, override_settings
 from django.conf import settings
+from django.core.cache import cache
 from datetime import date, timedelta
 from file_system.models import File, FileGroup, FileType, Storage, StorageType
 from file_manager.models import (
@@ -11,7 +12,8 @@ from file_manager.models import (
     SampleProviderJob,
     CleanupFileJob,
 )
-from file_manager.tasks import stage_file_job, check_for_clean_up, clean_up_file
+from file_manager.tasks import stage_file_job, stage_samples_job, check_for_clean_up, clean_up_file
+from lib.memcache_lock import memcache_semaphore
 
 
 class StageFileJobTest(TestCase):
@@ -37,10 +39,11 @@ class StageFileJobTest(TestCase):
     @patch("file_manager.tasks.CopyService.copy")
     def test_stage_file_job_success(self, mock_copy):
         """Test successful file staging"""
+        mock_copy.return_value = 1024
         stage_file_job(str(self.file_provider_job.id), str(self.sample_job.id))
 
         # Verify copy was called
-        mock_copy.assert_called_once_with("/original/path/test.fastq", "/staged/path/test.fastq")
+        mock_copy.assert_called_once_with("/original/path/test.fastq", "/staged/path/test.fastq", hasher=ANY)
 
         # Verify job status updated
         self.file_provider_job.refresh_from_db()
@@ -54,6 +57,7 @@ class StageFileJobTest(TestCase):
         # Verify sample job progress
         self.sample_job.refresh_from_db()
         self.assertEqual(self.sample_job.completed_files, 1)
+        self.assertEqual(self.sample_job.bytes_copied, 1024)
 
         # Verify cleanup job created
         cleanup_jobs = CleanupFileJob.objects.filter(file_object=self.file)
@@ -92,6 +96,23 @@ class StageFileJobTest(TestCase):
         self.assertEqual(cleanup_job.cleanup_date, expected_cleanup_date)
 
 
+class StageSamplesJobTest(TestCase):
+    @patch("file_manager.file_manager.file_manager.FileManager.stage_samples")
+    def test_samples_are_planned_together(self, mock_stage_samples):
+        first_task, second_task = MagicMock(), MagicMock()
+        mock_stage_samples.return_value = (
+            {
+                "Sample_001": SampleProviderJob(sample_id="Sample_001", total_files=2),
+                "Sample_002": SampleProviderJob(sample_id="Sample_002", total_files=0),
+            },
+            [first_task, second_task],
+        )
+        stage_samples_job(["Sample_001", "Sample_002"])
+        mock_stage_samples.assert_called_once_with(["Sample_001", "Sample_002"])
+        first_task.delay.assert_called_once()
+        second_task.delay.assert_called_once()
+
+
 class CheckForCleanUpTest(TestCase):
     def setUp(self):
         self.storage = Storage.objects.create(name="test_storage", type=StorageType.LOCAL)
@@ -240,3 +261,25 @@ class CleanUpFileTest(TestCase):
         # Original job should be unchanged
         self.cleanup_job.refresh_from_db()
         self.assertEqual(self.cleanup_job.status, FileProviderStatus.SCHEDULED)
+
+
+class MemcacheSemaphoreTest(TestCase):
+    def setUp(self):
+        cache.delete("copy_slots_test")
+
+    def test_slots_are_limited(self):
+        with memcache_semaphore("copy_slots_test", 1) as first:
+            with memcache_semaphore("copy_slots_test", 1) as second:
+                self.assertTrue(first)
+                self.assertFalse(second)
+        with memcache_semaphore("copy_slots_test", 1) as third:
+            self.assertTrue(third)
+
+    @patch("lib.memcache_lock.cache.touch")
+    def test_acquire_extends_expiration(self, touch):
+        with memcache_semaphore("copy_slots_test", 2, expiration=60):
+            with memcache_semaphore("copy_slots_test", 2, expiration=60):
+                with memcache_semaphore("copy_slots_test", 2, expiration=60) as acquired:
+                    self.assertFalse(acquired)
+        self.assertEqual(touch.call_count, 2)
+        touch.assert_called_with("copy_slots_test", 60)
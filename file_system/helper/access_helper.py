@@ -1,8 +1,7 @@
 from file_system.models import Request, FileMetadata, File
 from file_system.repository import FileRepository
 from django.conf import settings
-import csv
-from django.http import HttpResponse
+from file_system.helper.export import CSV, export_response
 import re
 
 
@@ -95,15 +94,17 @@ class CmoDMPManifest:
         cmoPatientId_trim = [c.replace("C-", "") for c in cmoPatientId]
         # subset DMP BAM file group to patients in the provided requests
         pDmps = dmp_bams.filter(metadata__patient__cmo__in=cmoPatientId_trim)
-        # set up HTTP response
-        response = HttpResponse(content_type="text/csv")
         if len(self.request_ids) > 1:
             request_type = "multiple_requests"
         else:
             request_type = self.request_ids[0]
-        response["Content-Disposition"] = 'attachment; filename="{request_type}.csv"'.format(request_type=request_type)
-        writer = csv.DictWriter(response, fieldnames=self.manifest_header)
-        writer.writeheader()
+        rows = self.construct_rows(fastq_metadata, pDmps)
+        return export_response(rows, self.manifest_header, CSV, "%s.csv" % request_type, streaming=False)
+
+    def construct_rows(self, fastq_metadata, pDmps):
+        """
+        Yield one manifest row per primaryId
+        """
         primaryIds = set()  # we only want to look at fastq metdata for a PrimaryId once
         # for each fastq in the request query
         for fastq in fastq_metadata:
@@ -131,5 +132,4 @@ class CmoDMPManifest:
                     fastq_meta["dmpImpactSamples"] = dmpImpactSamples
                     fastq_meta["dmpAccessSamples"] = dmpAccessSamples
                     fastq_meta["dmpPatientId"] = dmppatientid
-                writer.writerow(fastq_meta)
-        return response
+                yield fastq_meta
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.utils import timezone
+from file_system.models import File
+
+
+logger = logging.getLogger(__name__)
+
+
+STATE_FILE_NAME = "check_fastq_files_state.json"
+
+
+class DirectoryListing(object):
+    """
+    File names and mtime of a directory, listed once with os.scandir
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.names = None
+        self.mtime = None
+        try:
+            self.mtime = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                self.names = {entry.name for entry in entries}
+        except OSError:
+            # Missing or unreadable directory, none of its files are available
+            self.names = set()
+
+
+class AvailabilityScanner(object):
+    """
+    Update File.available for a file group, listing every directory once instead of checking every path.
+
+    Files are read ordered by path and grouped by directory. Directories of a batch are listed in parallel
+    threads and `available` is flipped with one UPDATE per batch and value. After each batch the last
+    path and the mtimes of the directories listed so far are written to the state file, so an interrupted scan
+    resumes where it stopped. With `changed_only`, directories whose mtime didn't change since the previous
+    complete scan are not listed, files in them keep their current status. Files of a directory can be split
+    between batches, so mtimes listed by a scan replace those of the previous one only when it finishes.
+
+    Missing files are written to the report as they are found.
+    """
+
+    def __init__(self, file_group, report_path, state_path, changed_only=False, workers=16, batch_size=10000):
+        self.file_group = file_group
+        self.report_path = report_path
+        self.state_path = state_path
+        self.changed_only = changed_only
+        self.workers = workers
+        self.batch_size = batch_size
+        self.state = self._load_state()
+        self.listed = dict()
+        self.stats = {"files": 0, "missing": 0, "flipped": 0, "listed": 0, "skipped": 0}
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"directories": {}, "checkpoint": None}
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def run(self):
+        start = time.perf_counter()
+        checkpoint = self.state.get("checkpoint")
+        if checkpoint and checkpoint.get("report") != self.report_path:
+            checkpoint = None
+        last_path = checkpoint["path"] if checkpoint else None
+        self.listed = dict(checkpoint.get("directories", {})) if checkpoint else {}
+        if last_path:
+            logger.info(f"Resuming availability scan after {last_path}")
+
+        with open(self.report_path, "a" if last_path else "w") as report:
+            batch = []
+            for row in self._files(last_path):
+                batch.append(row)
+                # never split a directory between batches
+                if len(batch) > self.batch_size and os.path.dirname(row[1]) != os.path.dirname(batch[-2][1]):
+                    self._process_batch(batch[:-1], report)
+                    batch = batch[-1:]
+            if batch:
+                self._process_batch(batch, report)
+
+        recorded = self.state["directories"]
+        for directory, mtime in self.listed.items():
+            if mtime is None:
+                recorded.pop(directory, None)
+            else:
+                recorded[directory] = mtime
+        self.state["checkpoint"] = None
+        self._save_state()
+        self.stats["seconds"] = round(time.perf_counter() - start, 1)
+        logger.info(f"Availability scan finished: {self.stats}")
+        return self.stats
+
+    def _files(self, last_path):
+        files = File.objects.filter(file_group=self.file_group)
+        if last_path:
+            files = files.filter(path__gt=last_path)
+        return files.order_by("path").values_list("id", "path", "available").iterator(chunk_size=self.batch_size)
+
+    def _process_batch(self, batch, report):
+        directories = list(dict.fromkeys(os.path.dirname(path) for _, path, _ in batch))
+        # mtimes of the previous complete scan
+        recorded = self.state["directories"]
+        to_list = directories
+        if self.changed_only:
+            to_list = [d for d in directories if not self._unchanged(d, recorded.get(d))]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            listings = {listing.directory: listing for listing in executor.map(DirectoryListing, to_list)}
+        self.stats["listed"] += len(listings)
+        self.stats["skipped"] += len(directories) - len(listings)
+
+        now_available = []
+        now_missing = []
+        for file_id, path, available in batch:
+            listing = listings.get(os.path.dirname(path))
+            exists = bool(available) if listing is None else os.path.basename(path) in listing.names
+            if not exists:
+                report.write(f"{path}\n")
+                self.stats["missing"] += 1
+            if listing is not None and exists != bool(available):
+                (now_available if exists else now_missing).append(file_id)
+
+        # update() skips auto_now, set modified_date like File.save does
+        if now_available:
+            File.objects.filter(id__in=now_available).update(available=True, modified_date=timezone.now())
+        if now_missing:
+            File.objects.filter(id__in=now_missing).update(available=False, modified_date=timezone.now())
+        self.stats["files"] += len(batch)
+        self.stats["flipped"] += len(now_available) + len(now_missing)
+
+        for directory, listing in listings.items():
+            self.listed[directory] = listing.mtime
+        report.flush()
+        self.state["checkpoint"] = {"report": self.report_path, "path": batch[-1][1], "directories": self.listed}
+        self._save_state()
+
+    @staticmethod
+    def _unchanged(directory, recorded_mtime):
+        if recorded_mtime is None:
+            return False
+        try:
+            return os.stat(directory).st_mtime_ns == recorded_mtime
+        except OSError:
+            return False
+
+
+def scan_file_group(file_group, report_path, changed_only=False):
+    scanner = AvailabilityScanner(
+        file_group,
+        report_path,
+        os.path.join(os.path.dirname(report_path), STATE_FILE_NAME),
+        changed_only=changed_only,
+        workers=settings.CHECK_FILES_WORKERS,
+        batch_size=settings.CHECK_FILES_BATCH_SIZE,
+    )
+    return scanner.run()
@@ -1,18 +1,83 @@
+import os
+import mmap
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 
-def sha1(file_path, buffersize=1024 * 1024):
+BUFFER_SIZE = 8 * 1024 * 1024
+
+
+def sha1(file_path, buffersize=BUFFER_SIZE, use_mmap=False):
+    """
+    sha1 checksum of a file in the format stored in File.checksum
+    :param buffersize: size of the chunks passed to the hasher
+    :param use_mmap: hash a memory map of the file instead of reading it into a buffer
+    """
     try:
         hasher = hashlib.sha1()
-        with open(file_path, "rb") as f:
-            contents = f.read(buffersize)
-            while contents != b"":
-                hasher.update(contents)
-                contents = f.read(buffersize)
-        return "sha1$%s" % hasher.hexdigest().lower()
+        with open(file_path, "rb", buffering=0) as f:
+            if use_mmap:
+                _update_mmap(hasher, f, buffersize)
+            else:
+                _update_buffered(hasher, f, buffersize)
+        return format_sha1(hasher)
     except Exception as e:
         raise FailedToCalculateChecksum(e)
 
 
+def format_sha1(hasher):
+    return "sha1$%s" % hasher.hexdigest().lower()
+
+
+def _update_buffered(hasher, f, buffersize):
+    buffer = bytearray(buffersize)
+    view = memoryview(buffer)
+    n = f.readinto(buffer)
+    while n:
+        hasher.update(view[:n])
+        n = f.readinto(buffer)
+
+
+def _update_mmap(hasher, f, buffersize):
+    if os.fstat(f.fileno()).st_size == 0:
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        view = memoryview(m)
+        try:
+            for offset in range(0, len(m), buffersize):
+                hasher.update(view[offset : offset + buffersize])
+        finally:
+            view.release()
+
+
+def sha1_many(file_paths, workers=4, buffersize=BUFFER_SIZE):
+    """
+    Hash files concurrently. hashlib releases the GIL while hashing, so threads hash in parallel.
+    :return: dict of path to checksum, or to FailedToCalculateChecksum if the file could not be read
+    """
+
+    def _sha1(path):
+        try:
+            return sha1(path, buffersize)
+        except FailedToCalculateChecksum as e:
+            return e
+
+    file_paths = list(file_paths)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return dict(zip(file_paths, executor.map(_sha1, file_paths)))
+
+
+def fingerprint(file_path):
+    """
+    (inode, size, mtime) of a file. The checksum recorded for a fingerprint is reused while it stays the same
+    :return: fingerprint string or None if the file can't be accessed
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return "%s:%s:%s" % (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
 class FailedToCalculateChecksum(Exception):
     pass
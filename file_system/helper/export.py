@@ -0,0 +1,51 @@
+import csv
+import json
+from django.http import HttpResponse, StreamingHttpResponse
+
+
+NDJSON = "ndjson"
+CSV = "csv"
+EXPORT_FORMATS = (NDJSON, CSV)
+CONTENT_TYPES = {NDJSON: "application/x-ndjson", CSV: "text/csv"}
+
+
+class Echo(object):
+    """
+    File-like object which returns what is written to it, so csv.writer can be used as a generator
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, fieldnames):
+    writer = csv.DictWriter(Echo(), fieldnames=fieldnames, extrasaction="ignore")
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+
+def export_response(rows, fieldnames, export_format, filename, streaming=True):
+    """
+    Write rows (dicts) as CSV or NDJSON
+    :param rows: iterable of dicts, consumed lazily when streaming
+    :param fieldnames: CSV columns, keys missing from a row are written empty
+    :param export_format: csv or ndjson
+    :param filename: attachment filename
+    :param streaming: return StreamingHttpResponse, otherwise the content is written to a HttpResponse
+    """
+    if export_format == CSV:
+        lines = csv_lines(rows, fieldnames)
+    else:
+        lines = ndjson_lines(rows)
+    if streaming:
+        response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[export_format])
+    else:
+        response = HttpResponse("".join(lines), content_type=CONTENT_TYPES[export_format])
+    response["Content-Disposition"] = 'attachment; filename="{filename}"'.format(filename=filename)
+    return response
@@ -0,0 +1,69 @@
+import json
+from collections import namedtuple
+
+
+class MetadataDiff(namedtuple("MetadataDiff", ["changed", "added", "removed"])):
+    """
+    Keys whose values differ between two flat metadata dicts
+    """
+
+    def __bool__(self):
+        return bool(self.changed or self.added or self.removed)
+
+    @property
+    def keys(self):
+        return self.changed | self.added | self.removed
+
+
+def _canonical(value):
+    """
+    JSON representation of a value with every nested list sorted
+    """
+    if isinstance(value, dict):
+        return "{%s}" % ",".join("%s:%s" % (json.dumps(k), _canonical(v)) for k, v in sorted(value.items()))
+    if isinstance(value, list):
+        return "[%s]" % ",".join(sorted(_canonical(v) for v in value))
+    return json.dumps(value, default=str)
+
+
+def values_equal(first, second):
+    """
+    Compare two metadata values. Lists are compared regardless of order, like
+    DeepDiff(ignore_order=True), and values of different types are never equal
+    """
+    if type(first) is not type(second):
+        return False
+    if isinstance(first, dict):
+        if first.keys() != second.keys():
+            return False
+        return all(values_equal(v, second[k]) for k, v in first.items())
+    if isinstance(first, list):
+        if len(first) != len(second):
+            return False
+        if all(values_equal(a, b) for a, b in zip(first, second)):
+            return True
+        return sorted(_canonical(v) for v in first) == sorted(_canonical(v) for v in second)
+    return first == second
+
+
+def flat_diff(new, old):
+    """
+    Diff the top level keys of two metadata dicts
+    :return: MetadataDiff with the changed, added and removed keys of new compared to old
+    """
+    changed = set()
+    added = set()
+    for k, v in new.items():
+        if k not in old:
+            added.add(k)
+        elif not values_equal(v, old[k]):
+            changed.add(k)
+    removed = {k for k in old if k not in new}
+    return MetadataDiff(changed, added, removed)
+
+
+def is_unchanged(current, updates):
+    """
+    True when merging updates into current would not change any value
+    """
+    return all(k in current and values_equal(v, current[k]) for k, v in updates.items())
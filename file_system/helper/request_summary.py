@@ -0,0 +1,104 @@
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import Count, Min, Q
+from django.db.models.fields.json import KT
+
+
+CONTACT_KEYS = (
+    "dataAnalystName",
+    "dataAnalystEmail",
+    "investigatorName",
+    "investigatorEmail",
+    "labHeadName",
+    "labHeadEmail",
+    "piEmail",
+    "projectManagerName",
+    "qcAccessEmails",
+    "dataAccessEmails",
+    "otherContactEmails",
+)
+
+
+RequestSummary = namedtuple(
+    "RequestSummary",
+    [
+        "request_id",
+        "file_count",
+        "complete_files",
+        "recipe",
+        "samples",
+        "tumor_samples",
+        "complete_samples",
+        "complete_tumors",
+        "complete_normals",
+        "contacts",
+    ],
+)
+
+
+def _cache_key(request_id):
+    return "request_summary_%s" % request_id
+
+
+def invalidate_request_summary(*request_ids):
+    keys = [_cache_key(request_id) for request_id in set(request_ids) if request_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_request_summary_on_commit(*request_ids):
+    """
+    Invalidate summaries of requests whose files are changed in the current transaction. They are deleted
+    now for readers in the transaction and again after the commit, other workers reading before it get the
+    old rows and would cache them until REQUEST_SUMMARY_CACHE_TTL.
+    """
+    request_ids = set(request_ids)
+    invalidate_request_summary(*request_ids)
+    transaction.on_commit(lambda: invalidate_request_summary(*request_ids))
+
+
+def get_request_summary(request_id):
+    """
+    Recipe, contacts and sample counts of a request, computed from the latest metadata of its files
+    in one aggregate query. Cached until metadata of a file in the request is updated.
+    Contacts and recipe are request level fields, the smallest value is taken if files disagree.
+    """
+    summary = cache.get(_cache_key(request_id))
+    if summary is None:
+        summary = _compute_request_summary(request_id)
+        cache.set(_cache_key(request_id), summary, settings.REQUEST_SUMMARY_CACHE_TTL)
+    return RequestSummary(**summary)
+
+
+def _compute_request_summary(request_id):
+    # FileRepository imports file_system.models, which imports this module
+    from file_system.repository.file_repository import FileRepository
+
+    files = FileRepository.filter(metadata={settings.REQUEST_ID_METADATA_KEY: request_id})
+    complete = Q(projection__igo_complete=True)
+    ci_tag = KT(f"metadata__{settings.CMO_SAMPLE_TAG_METADATA_KEY}")
+    aggregates = {
+        "file_count": Count("id"),
+        "complete_files": Count("id", filter=complete),
+        "recipe": Min(KT(f"metadata__{settings.RECIPE_METADATA_KEY}")),
+        "samples": ArrayAgg(
+            "projection__sample_id",
+            distinct=True,
+            filter=Q(projection__sample_id__isnull=False),
+            ordering="projection__sample_id",
+            default=[],
+        ),
+        "tumor_samples": Count("projection__sample_id", distinct=True, filter=Q(projection__tumor_or_normal="Tumor")),
+        "complete_samples": Count(ci_tag, distinct=True, filter=complete),
+        "complete_tumors": Count(ci_tag, distinct=True, filter=complete & Q(projection__tumor_or_normal="Tumor")),
+        "complete_normals": Count(ci_tag, distinct=True, filter=complete & Q(projection__tumor_or_normal="Normal")),
+    }
+    for i, key in enumerate(CONTACT_KEYS):
+        aggregates[f"contact_{i}"] = Min(KT(f"metadata__{key}"))
+    result = files.order_by().aggregate(**aggregates)
+    result["contacts"] = {key: result.pop(f"contact_{i}") for i, key in enumerate(CONTACT_KEYS)}
+    result["request_id"] = request_id
+    return result
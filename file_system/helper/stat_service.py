@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+
+
+class StatService(object):
+    """
+    Batched file size lookups.
+
+    Paths are grouped by directory and every directory is listed once with os.scandir in a
+    thread pool, directories with only a few requested files are stat-ed file by file.
+    Results, including missing files, are cached in memory for `ttl` seconds.
+    """
+
+    SCANDIR_THRESHOLD = 8
+
+    def __init__(self, ttl=300, workers=16, max_entries=100000):
+        self.ttl = ttl
+        self.workers = workers
+        self.max_entries = max_entries
+        self._cache = dict()
+        self._lock = threading.Lock()
+
+    def sizes(self, paths):
+        """
+        :return: dict of path to size in bytes, None for files which don't exist or can't be accessed
+        """
+        now = time.monotonic()
+        result = dict()
+        by_directory = defaultdict(set)
+        with self._lock:
+            for path in paths:
+                cached = self._cache.get(path)
+                if cached and cached[0] > now:
+                    result[path] = cached[1]
+                else:
+                    by_directory[os.path.dirname(path)].add(os.path.basename(path))
+        if not by_directory:
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(by_directory)))) as executor:
+            listed = list(executor.map(self._stat_directory, by_directory.items()))
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            if len(self._cache) > self.max_entries:
+                self._cache.clear()
+            for directory_sizes in listed:
+                for path, size in directory_sizes.items():
+                    self._cache[path] = (expires, size)
+                    result[path] = size
+        return result
+
+    def size(self, path):
+        return self.sizes([path])[path]
+
+    def invalidate(self, *paths):
+        with self._lock:
+            for path in paths:
+                self._cache.pop(path, None)
+
+    def _stat_directory(self, item):
+        directory, names = item
+        sizes = {os.path.join(directory, name): None for name in names}
+        if len(names) <= self.SCANDIR_THRESHOLD:
+            for path in sizes:
+                try:
+                    sizes[path] = os.stat(path).st_size
+                except OSError:
+                    pass
+            return sizes
+        try:
+            with os.scandir(directory or ".") as entries:
+                for entry in entries:
+                    if entry.name in names:
+                        try:
+                            sizes[os.path.join(directory, entry.name)] = entry.stat().st_size
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        return sizes
+
+
+stat_service = StatService(ttl=settings.STAT_CACHE_TTL, workers=settings.STAT_WORKERS)
@@ -0,0 +1,13 @@
+from file_system.models import FileMetadataProjection
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Rebuild FileMetadataProjection from the latest FileMetadata"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = FileMetadataProjection.objects.rebuild(chunk_size=options["chunk_size"])
+        print("Projected %s files" % count)
@@ -0,0 +1,93 @@
+# Generated by Django 6.0.4 on 2026-10-18 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+# Metadata key -> (column, type, max_length) when the projection was created
+PROJECTED_KEYS = {
+    "igoRequestId": ("request_id", str, 100),
+    "primaryId": ("sample_id", str, 100),
+    "cmoPatientId": ("patient_id", str, 100),
+    "genePanel": ("recipe", str, 100),
+    "baitSet": ("bait_set", str, 200),
+    "tumorOrNormal": ("tumor_or_normal", str, 30),
+    "igoComplete": ("igo_complete", bool, None),
+    "ciTag": ("ci_tag", str, 100),
+}
+
+
+def columns_from_metadata(metadata):
+    columns = {}
+    for key, (name, value_type, max_length) in PROJECTED_KEYS.items():
+        value = (metadata or {}).get(key)
+        if type(value) is not value_type or (max_length and len(value) > max_length):
+            value = None
+        columns[name] = value
+    return columns
+
+
+def populate_projection(apps, schema_editor):
+    FileMetadata = apps.get_model("file_system", "FileMetadata")
+    FileMetadataProjection = apps.get_model("file_system", "FileMetadataProjection")
+    batch = []
+    for fm in FileMetadata.objects.filter(latest=True).only("id", "file_id", "metadata").iterator(chunk_size=2000):
+        batch.append(
+            FileMetadataProjection(
+                file_id=fm.file_id,
+                file_metadata_id=fm.id,
+                **columns_from_metadata(fm.metadata),
+            )
+        )
+        if len(batch) == 2000:
+            FileMetadataProjection.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FileMetadataProjection.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("file_system", "0047_auto_20260210_0939"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FileMetadataProjection",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_date", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("modified_date", models.DateTimeField(auto_now=True)),
+                ("request_id", models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ("sample_id", models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ("patient_id", models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ("recipe", models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ("bait_set", models.CharField(blank=True, db_index=True, max_length=200, null=True)),
+                ("tumor_or_normal", models.CharField(blank=True, db_index=True, max_length=30, null=True)),
+                ("igo_complete", models.BooleanField(blank=True, db_index=True, null=True)),
+                ("ci_tag", models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                (
+                    "file",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="projection",
+                        to="file_system.file",
+                    ),
+                ),
+                (
+                    "file_metadata",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="projection",
+                        to="file_system.filemetadata",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.RunPython(populate_projection, migrations.RunPython.noop),
+    ]
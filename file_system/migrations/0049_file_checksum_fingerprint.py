@@ -0,0 +1,18 @@
+# Generated by Django 6.0.4 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("file_system", "0048_filemetadataprojection"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="file",
+            name="checksum_fingerprint",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.4 on 2026-10-18 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("file_system", "0049_file_checksum_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="file",
+            name="size",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
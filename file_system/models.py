@@ -1,10 +1,10 @@
-import os
+import time
 import uuid
-import copy
 import logging
 from datetime import datetime
 from enum import IntEnum
-from deepdiff import DeepDiff
+from file_system.helper.metadata_diff import flat_diff, is_unchanged
+from file_system.helper.request_summary import invalidate_request_summary_on_commit
 from django.db import models
 from django.db import transaction, IntegrityError
 from django.db.models import JSONField
@@ -14,6 +14,9 @@ from django.template.defaultfilters import slugify
 from django.contrib.auth.models import User
 from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
 
 
 logger = logging.getLogger(__name__)
@@ -44,8 +47,79 @@ class Storage(BaseModel):
         return "{}".format(self.name)
 
 
+class FileTypeManager(models.Manager):
+    """
+    Process-local index of FileTypes by name and by FileExtension suffix. It is rebuilt when a
+    FileType or FileExtension is saved or deleted in this process, or when another process bumps
+    the version kept in the cache.
+    """
+
+    VERSION_CACHE_KEY = "file_type_index_version"
+    CHECK_INTERVAL = 30
+    _index = None
+    _by_name = None
+    _version = None
+    _checked = 0
+
+    def get_by_filename(self, filename):
+        """
+        Return the FileType with the longest extension matching the end of filename, or the
+        "unknown" FileType
+        """
+        suffixes, by_name = self._get_index()
+        node = suffixes
+        file_type = None
+        for char in reversed(filename):
+            node = node.get(char)
+            if node is None:
+                break
+            file_type = node.get("", file_type)
+        if file_type:
+            return file_type
+        return self.get_by_name("unknown")
+
+    def get_by_name(self, name):
+        _, by_name = self._get_index()
+        if name not in by_name:
+            raise FileType.DoesNotExist("FileType %s does not exist" % name)
+        return by_name[name]
+
+    def invalidate(self):
+        FileTypeManager._index = None
+        cache.add(self.VERSION_CACHE_KEY, 0, None)
+        try:
+            FileTypeManager._version = cache.incr(self.VERSION_CACHE_KEY)
+        except ValueError:
+            FileTypeManager._version = None
+
+    def _get_index(self):
+        now = time.monotonic()
+        if FileTypeManager._index is not None and now - FileTypeManager._checked > self.CHECK_INTERVAL:
+            FileTypeManager._checked = now
+            if cache.get(self.VERSION_CACHE_KEY) != FileTypeManager._version:
+                FileTypeManager._index = None
+        if FileTypeManager._index is None:
+            FileTypeManager._version = cache.get(self.VERSION_CACHE_KEY)
+            FileTypeManager._checked = now
+            by_name = dict()
+            by_id = dict()
+            for file_type in self.get_queryset():
+                by_name.setdefault(file_type.name, file_type)
+                by_id[file_type.id] = file_type
+            suffixes = dict()
+            for extension, file_type_id in FileExtension.objects.values_list("extension", "file_type_id"):
+                node = suffixes
+                for char in reversed(extension):
+                    node = node.setdefault(char, dict())
+                node[""] = by_id[file_type_id]
+            FileTypeManager._by_name = by_name
+            FileTypeManager._index = suffixes
+        return FileTypeManager._index, FileTypeManager._by_name
+
+
 class FileType(models.Model):
     name = models.CharField(max_length=20)
+    objects = FileTypeManager()
 
     def __str__(self):
         return "{}".format(self.name)
@@ -73,7 +147,7 @@ class FileGroupMetadata(BaseModel):
 
 
 def update_dict(current, new):
-    updated = copy.deepcopy(current)
+    updated = dict(current)
     for k, v in updated.items():
         if new.get(k):
             updated[k] = new[k]
@@ -93,7 +167,6 @@ class RequestModelManager(models.Manager):
 
     def _update_files(self, request_id, updated_metadata, user):
         query = {f"metadata__{settings.REQUEST_ID_METADATA_KEY}": request_id}
-        files = FileMetadata.objects.select_for_update().filter(**query)
         metadata = {
             settings.LAB_HEAD_NAME_METADATA_KEY: updated_metadata.get("lab_head_name", None),
             settings.LAB_HEAD_EMAIL_METADATA_KEY: updated_metadata.get("lab_head_email", None),
@@ -101,28 +174,36 @@ class RequestModelManager(models.Manager):
             settings.INVESTIGATOR_NAME_METADATA_KEY: updated_metadata.get("investigator_name", None),
         }
         metadata = {k: v for k, v in metadata.items() if v is not None}
-        for f in files:
-            update_body = {"file": f.file.id, "metadata": metadata, "user": user}
-            FileMetadata.objects.create_or_update(from_file=False, **update_body)
+        FileMetadata.objects.bulk_update_metadata(query, metadata, user)
+
+    @staticmethod
+    def _as_dict(obj):
+        return {
+            "request_id": obj.request_id,
+            "delivery_date": obj.delivery_date,
+            "lab_head_name": obj.lab_head_name,
+            "lab_head_email": obj.lab_head_email,
+            "investigator_email": obj.investigator_email,
+            "investigator_name": obj.investigator_name,
+        }
 
     def _update_versioned_instance(self, updates, from_file=False, user=None):
+        latest = Request.objects.filter(request_id=updates["request_id"], latest=True).first()
+        if latest:
+            latest_metadata = self._as_dict(latest)
+            if not flat_diff(update_dict(latest_metadata, updates), latest_metadata):
+                logger.debug(f"No updates {str(latest)}")
+                return latest
         try:
             with transaction.atomic():
                 request_id = updates["request_id"]
                 objs = Request.objects.select_for_update().filter(request_id=request_id).order_by("-version").all()
                 obj = objs.first()
-                latest_metadata = {
-                    "request_id": obj.request_id,
-                    "delivery_date": obj.delivery_date,
-                    "lab_head_name": obj.lab_head_name,
-                    "lab_head_email": obj.lab_head_email,
-                    "investigator_email": obj.investigator_email,
-                    "investigator_name": obj.investigator_name,
-                }
+                latest_metadata = self._as_dict(obj)
                 # Filter out null values
                 updates = {k: v for k, v in updates.items() if v is not None}
                 updated_metadata = update_dict(latest_metadata, updates)
-                if DeepDiff(updated_metadata, latest_metadata, ignore_order=True):
+                if flat_diff(updated_metadata, latest_metadata):
                     version = obj.version + 1
                     obj.latest = False
                     obj.save()
@@ -198,7 +279,6 @@ class SampleModelManager(models.Manager):
 
     def _update_files(self, sample_id, updated_metadata, user):
         query = {f"metadata__{settings.SAMPLE_ID_METADATA_KEY}": sample_id}
-        files = FileMetadata.objects.select_for_update().filter(**query)
         metadata = {
             settings.CMO_SAMPLE_NAME_METADATA_KEY: updated_metadata.get("sample_name", None),
             settings.SAMPLE_NAME_METADATA_KEY: updated_metadata.get("cmo_sample_name", None),
@@ -208,30 +288,38 @@ class SampleModelManager(models.Manager):
             settings.REQUEST_ID_METADATA_KEY: updated_metadata.get("request_id", None),
         }
         metadata = {k: v for k, v in metadata.items() if v is not None}
-        for f in files:
-            update_body = {"file": f.file.id, "metadata": metadata, "user": user}
-            FileMetadata.objects.create_or_update(from_file=False, **update_body)
+        FileMetadata.objects.bulk_update_metadata(query, metadata, user)
+
+    @staticmethod
+    def _as_dict(obj):
+        return {
+            "sample_id": obj.sample_id,
+            "sample_name": obj.sample_name,
+            "cmo_sample_name": obj.cmo_sample_name,
+            "sample_type": obj.sample_type,
+            "tumor_or_normal": obj.tumor_or_normal,
+            "sample_class": obj.sample_class,
+            "igo_qc_notes": obj.igo_qc_notes,
+            "cas_qc_notes": obj.cas_qc_notes,
+            "request_id": obj.request_id,
+            "redact": obj.redact,
+        }
 
     def _update_versioned_instance(self, updates, from_file=False, user=None):
+        latest = Sample.objects.filter(sample_id=updates["sample_id"], latest=True).first()
+        if latest:
+            latest_metadata = self._as_dict(latest)
+            if not flat_diff(update_dict(latest_metadata, updates), latest_metadata):
+                logger.debug(f"No updates {str(latest)}")
+                return latest
         try:
             with transaction.atomic():
                 sample_id = updates["sample_id"]
                 objs = Sample.objects.select_for_update().filter(sample_id=sample_id).order_by("-version").all()
                 obj = objs.first()
-                latest_metadata = {
-                    "sample_id": obj.sample_id,
-                    "sample_name": obj.sample_name,
-                    "cmo_sample_name": obj.cmo_sample_name,
-                    "sample_type": obj.sample_type,
-                    "tumor_or_normal": obj.tumor_or_normal,
-                    "sample_class": obj.sample_class,
-                    "igo_qc_notes": obj.igo_qc_notes,
-                    "cas_qc_notes": obj.cas_qc_notes,
-                    "request_id": obj.request_id,
-                    "redact": obj.redact,
-                }
+                latest_metadata = self._as_dict(obj)
                 updated_metadata = update_dict(latest_metadata, updates)
-                if DeepDiff(updated_metadata, latest_metadata, ignore_order=True):
+                if flat_diff(updated_metadata, latest_metadata):
                     version = obj.version + 1
                     obj.latest = False
                     obj.save()
@@ -314,25 +402,32 @@ class PatientModelManager(models.Manager):
 
     def _update_files(self, patient_id, updated_metadata, user):
         query = {f"metadata__{settings.PATIENT_ID_METADATA_KEY}": patient_id}
-        files = FileMetadata.objects.filter(**query)
         metadata = {
             settings.PATIENT_ID_METADATA_KEY: updated_metadata.get("patient_id", None),
             settings.SEX_METADATA_KEY: updated_metadata.get("sex", None),
         }
         metadata = {k: v for k, v in metadata.items() if v is not None}
-        for f in files:
-            update_body = {"file": f.file.id, "metadata": metadata, "user": user}
-            FileMetadata.objects.create_or_update(from_file=False, **update_body)
+        FileMetadata.objects.bulk_update_metadata(query, metadata, user)
+
+    @staticmethod
+    def _as_dict(obj):
+        return {"patient_id": obj.patient_id, "sex": obj.sex, "samples": obj.samples}
 
     def _update_versioned_instance(self, updates, from_file=False, user=None):
+        latest = Patient.objects.filter(patient_id=updates["patient_id"], latest=True).first()
+        if latest:
+            latest_metadata = self._as_dict(latest)
+            if not flat_diff(update_dict(latest_metadata, updates), latest_metadata):
+                logger.debug(f"No updates {str(latest)}")
+                return latest
         try:
             with transaction.atomic():
                 patient_id = updates["patient_id"]
                 objs = Patient.objects.select_for_update().filter(patient_id=patient_id).order_by("-version").all()
                 obj = objs.first()
-                latest_metadata = {"patient_id": obj.patient_id, "sex": obj.sex, "samples": obj.samples}
+                latest_metadata = self._as_dict(obj)
                 updated_metadata = update_dict(latest_metadata, updates)
-                if DeepDiff(updated_metadata, latest_metadata, ignore_order=True):
+                if flat_diff(updated_metadata, latest_metadata):
                     version = obj.version + 1
                     obj.latest = False
                     obj.save()
@@ -378,14 +473,22 @@ class FileExtension(models.Model):
         return "{}".format(self.extension)
 
 
+@receiver([post_save, post_delete], sender=FileType)
+@receiver([post_save, post_delete], sender=FileExtension)
+def invalidate_file_type_index(sender, **kwargs):
+    FileType.objects.invalidate()
+
+
 class File(BaseModel):
     file_name = models.CharField(max_length=500)
     original_path = models.CharField(max_length=1500)
     path = models.CharField(max_length=1500, db_index=True)
     file_type = models.ForeignKey(FileType, null=True, on_delete=models.SET_NULL)
-    size = models.BigIntegerField()
+    # None until the size is known, filled in by file_system.tasks.resolve_file_sizes
+    size = models.BigIntegerField(null=True, blank=True)
     file_group = models.ForeignKey(FileGroup, on_delete=models.CASCADE)
     checksum = models.CharField(max_length=50, blank=True, null=True)
+    checksum_fingerprint = models.CharField(max_length=100, blank=True, null=True)
     request_id = models.CharField(max_length=100, null=True, blank=True)
     samples = ArrayField(models.CharField(max_length=100), default=list)
     patient_id = models.CharField(max_length=100, null=True, blank=True)
@@ -404,21 +507,16 @@ class File(BaseModel):
     def is_available(self):
         return self.available
 
-    def set_available(self):
+    def set_available(self, update_fields=()):
+        """
+        :param update_fields: other changed fields to write with `available`
+        """
         self.available = True
-        self.save()
+        self.save(update_fields=["available", "modified_date", *update_fields])
 
-    def set_unavailable(self):
+    def set_unavailable(self, update_fields=()):
         self.available = False
-        self.save()
-
-    def save(self, *args, **kwargs):
-        if not self.size:
-            try:
-                self.size = os.path.getsize(self.path)
-            except Exception as e:
-                self.size = 0
-        super(File, self).save(*args, **kwargs)
+        self.save(update_fields=["available", "modified_date", *update_fields])
 
 
 class FileMetadataManager(models.Manager):
@@ -438,15 +536,19 @@ class FileMetadataManager(models.Manager):
         )
 
     def _update_versioned_instance(self, updates, from_file=True):
+        latest = FileMetadata.objects.filter(file_id=updates["file"], latest=True).first()
+        if latest and is_unchanged(latest.metadata, updates["metadata"]):
+            logger.debug(f"No updates {str(latest)}")
+            return latest
         try:
             with transaction.atomic():
-                file_id = updates.pop("file")
+                file_id = updates["file"]
                 objs = FileMetadata.objects.select_for_update().filter(file_id=file_id).order_by("-version").all()
                 obj = objs.first()
                 latest_metadata = obj.metadata
-                updated_metadata = copy.deepcopy(latest_metadata)
+                updated_metadata = dict(latest_metadata)
                 updated_metadata.update(updates["metadata"])
-                diff = DeepDiff(updated_metadata, latest_metadata, ignore_order=True)
+                diff = flat_diff(updated_metadata, latest_metadata)
                 if diff:
                     version = obj.version + 1
                     obj.latest = False
@@ -454,9 +556,7 @@ class FileMetadataManager(models.Manager):
                     new_file_metadata = FileMetadata.objects.create(
                         file=obj.file, metadata=updated_metadata, user=updates["user"], version=version
                     )
-                    updated_keys = [
-                        key.replace("root['", "").replace("']", "") for key in diff.get("values_changed", {}).keys()
-                    ]
+                    updated_keys = diff.keys
                     file_obj_changed = False
                     if settings.REQUEST_ID_METADATA_KEY in updated_keys:
                         new_file_metadata.file.request_id = updated_metadata[settings.REQUEST_ID_METADATA_KEY]
@@ -506,6 +606,59 @@ class FileMetadataManager(models.Manager):
         else:
             return self._update_versioned_instance(current, from_file)
 
+    def bulk_update_metadata(self, query, metadata, user=None, batch_size=1000):
+        """
+        Merge metadata into the latest FileMetadata of every file matching query.
+        New versions are created with a single bulk_create, and the previous versions
+        and denormalized File fields are updated with one statement each. Request, Sample
+        and Patient objects are not updated from here.
+        :return: list of new FileMetadata versions
+        """
+        new_versions = []
+        previous_ids = []
+        file_ids = []
+        with transaction.atomic():
+            latest = (
+                FileMetadata.objects.select_for_update()
+                .filter(latest=True, **query)
+                .only("id", "file_id", "version", "metadata")
+                .order_by("file_id")
+            )
+            for obj in latest:
+                updated_metadata = dict(obj.metadata)
+                updated_metadata.update(metadata)
+                diff = flat_diff(updated_metadata, obj.metadata)
+                if not diff:
+                    continue
+                previous_ids.append(obj.id)
+                new_versions.append(
+                    FileMetadata(
+                        file_id=obj.file_id, metadata=updated_metadata, user=user, version=obj.version + 1, latest=True
+                    )
+                )
+                if diff.keys & {
+                    settings.REQUEST_ID_METADATA_KEY,
+                    settings.SAMPLE_ID_METADATA_KEY,
+                    settings.PATIENT_ID_METADATA_KEY,
+                }:
+                    file_ids.append(obj.file_id)
+            if not new_versions:
+                return new_versions
+            FileMetadata.objects.filter(id__in=previous_ids).update(latest=False)
+            self.bulk_create(new_versions, batch_size=batch_size)
+            file_updates = dict()
+            if settings.REQUEST_ID_METADATA_KEY in metadata:
+                file_updates["request_id"] = metadata[settings.REQUEST_ID_METADATA_KEY]
+            if settings.SAMPLE_ID_METADATA_KEY in metadata:
+                file_updates["samples"] = [metadata[settings.SAMPLE_ID_METADATA_KEY]]
+            if settings.PATIENT_ID_METADATA_KEY in metadata:
+                file_updates["patient_id"] = metadata[settings.PATIENT_ID_METADATA_KEY]
+            if file_ids and file_updates:
+                File.objects.filter(id__in=file_ids).update(**file_updates)
+            FileMetadataProjection.objects.sync_many(new_versions)
+        logger.info(f"Updated metadata of {len(new_versions)} files with {list(metadata.keys())}")
+        return new_versions
+
 
 class FileMetadata(BaseModel):
     file = models.ForeignKey(File, on_delete=models.CASCADE)
@@ -519,6 +672,11 @@ class FileMetadata(BaseModel):
     def __str__(self):
         return f"{self.id} {self.version} {self.latest} {self.user}"
 
+    def save(self, *args, **kwargs):
+        super(FileMetadata, self).save(*args, **kwargs)
+        if self.latest:
+            FileMetadataProjection.objects.sync(self)
+
     class Meta:
         unique_together = ("file", "version")
         indexes = [
@@ -537,6 +695,144 @@ class FileMetadata(BaseModel):
         ]
 
 
+@receiver(post_save, sender=FileMetadata)
+def sync_loaded_file_metadata_projection(sender, instance, raw=False, **kwargs):
+    # Fixtures are saved raw, bypassing FileMetadata.save
+    if raw and instance.latest:
+        FileMetadataProjection.objects.sync(instance)
+
+
+class FileMetadataProjectionManager(models.Manager):
+    @staticmethod
+    def projected_keys():
+        """
+        Metadata keys copied to FileMetadataProjection columns, mapped to (column, type)
+        """
+        return {
+            settings.REQUEST_ID_METADATA_KEY: ("request_id", str),
+            settings.SAMPLE_ID_METADATA_KEY: ("sample_id", str),
+            settings.PATIENT_ID_METADATA_KEY: ("patient_id", str),
+            settings.RECIPE_METADATA_KEY: ("recipe", str),
+            settings.BAITSET_METADATA_KEY: ("bait_set", str),
+            settings.TUMOR_OR_NORMAL_METADATA_KEY: ("tumor_or_normal", str),
+            settings.IGO_COMPLETE_METADATA_KEY: ("igo_complete", bool),
+            settings.CMO_SAMPLE_TAG_METADATA_KEY: ("ci_tag", str),
+        }
+
+    @staticmethod
+    def fits(name, value):
+        """
+        False for values longer than their column, they are stored as None
+        """
+        max_length = FileMetadataProjection._meta.get_field(name).max_length
+        return max_length is None or len(value) <= max_length
+
+    @classmethod
+    def lookup(cls, key, value):
+        """
+        Return the projection column lookup equivalent to metadata__<key>=<value>, or None if the
+        query can't be answered from the projection (key isn't projected, value type doesn't match
+        or value is too long for the column)
+        """
+        column = cls.projected_keys().get(key)
+        if not column:
+            return None
+        name, value_type = column
+        values = value if isinstance(value, list) else [value]
+        if not values or not all(type(v) is value_type for v in values):
+            return None
+        if value_type is str and not all(cls.fits(name, v) for v in values):
+            return None
+        if isinstance(value, list):
+            return {f"projection__{name}__in": values}
+        return {f"projection__{name}": value}
+
+    @classmethod
+    def columns_from_metadata(cls, metadata):
+        columns = {}
+        for key, (name, value_type) in cls.projected_keys().items():
+            value = (metadata or {}).get(key)
+            if type(value) is not value_type or (value_type is str and not cls.fits(name, value)):
+                value = None
+            columns[name] = value
+        return columns
+
+    def sync(self, file_metadata):
+        return self.sync_many([file_metadata])
+
+    def sync_many(self, file_metadata_list):
+        """
+        Point the projection of each file to the given latest FileMetadata
+        """
+        projections = [
+            FileMetadataProjection(
+                file_id=fm.file_id, file_metadata_id=fm.id, **self.columns_from_metadata(fm.metadata)
+            )
+            for fm in file_metadata_list
+        ]
+        update_fields = ["file_metadata", "modified_date"] + [name for name, _ in self.projected_keys().values()]
+        # Summaries of the requests the files are moved out of change too
+        previous_request_ids = list(
+            self.filter(file_id__in=[projection.file_id for projection in projections])
+            .exclude(request_id=None)
+            .values_list("request_id", flat=True)
+            .distinct()
+        )
+        projections = self.bulk_create(
+            projections, update_conflicts=True, unique_fields=["file"], update_fields=update_fields
+        )
+        invalidate_request_summary_on_commit(
+            *previous_request_ids, *[projection.request_id for projection in projections]
+        )
+        return projections
+
+    def rebuild(self, queryset=None, chunk_size=2000):
+        """
+        Rebuild the projection from the latest FileMetadata rows
+        """
+        queryset = queryset if queryset is not None else FileMetadata.objects.filter(latest=True)
+        batch = []
+        count = 0
+        for fm in queryset.only("id", "file_id", "metadata").iterator(chunk_size=chunk_size):
+            batch.append(fm)
+            if len(batch) == chunk_size:
+                self.sync_many(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.sync_many(batch)
+            count += len(batch)
+        return count
+
+
+class FileMetadataProjection(BaseModel):
+    """
+    One row per File holding the frequently queried keys of its latest FileMetadata as indexed columns
+    """
+
+    file = models.OneToOneField(File, on_delete=models.CASCADE, related_name="projection")
+    file_metadata = models.OneToOneField(FileMetadata, on_delete=models.CASCADE, related_name="projection")
+    request_id = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    sample_id = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    patient_id = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    recipe = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    bait_set = models.CharField(max_length=200, null=True, blank=True, db_index=True)
+    tumor_or_normal = models.CharField(max_length=30, null=True, blank=True, db_index=True)
+    igo_complete = models.BooleanField(null=True, blank=True, db_index=True)
+    ci_tag = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+
+    objects = FileMetadataProjectionManager()
+
+    def __str__(self):
+        return f"{self.file_id} {self.request_id} {self.sample_id}"
+
+
+@receiver(post_delete, sender=FileMetadataProjection)
+def invalidate_deleted_projection_request_summary(sender, instance, **kwargs):
+    # Sent for every projection removed with its File or FileMetadata
+    invalidate_request_summary_on_commit(instance.request_id)
+
+
 class FileRunMap(BaseModel):
     file = models.ForeignKey(File, on_delete=models.CASCADE)
     run = JSONField(default=list)
@@ -1,5 +1,5 @@
-from django.db.models import Q, Count
-from file_system.models import FileMetadata, File, Sample
+from django.db.models import Q, Count, CharField, Exists, Func, OuterRef
+from file_system.models import FileMetadata, FileMetadataProjection, File, Sample
 from file_system.exceptions import FileNotFoundException, InvalidQueryException
 
 
@@ -87,7 +87,11 @@ class FileRepository(object):
         metadata_query_dict = dict()
         if metadata:
             for k, queries in metadata.items():
-                if isinstance(queries, list):
+                projection_query = FileMetadataProjection.objects.lookup(k, queries)
+                if projection_query:
+                    # Answer equality lookups on hot keys from the indexed projection columns
+                    metadata_query_dict.update(projection_query)
+                elif isinstance(queries, list):
                     if len(queries) > 1:
                         metadata_query_q = Q()
                         for single_query in queries:
@@ -109,15 +113,13 @@ class FileRepository(object):
         create_query_dict.update(metadata_query_dict)
 
         if filter_redact:
-            samples = queryset.filter(**create_query_dict).values_list("file__samples", flat=True).distinct().all()
-            flatten_sample_ids = [item for sublist in samples for item in sublist]
-            reducted_sample_ids = list(
-                Sample.objects.filter(sample_id__in=flatten_sample_ids, redact=True)
-                .values_list("sample_id", flat=True)
-                .all()
+            # Anti-join against the latest version of each sample, so the query doesn't grow with redactions
+            redacted = Sample.objects.filter(
+                latest=True,
+                redact=True,
+                sample_id=Func(OuterRef("file__samples"), function="ANY", output_field=CharField()),
             )
-            for item in reducted_sample_ids:
-                queryset = queryset.exclude(file__samples=[item.strip()])
+            queryset = queryset.exclude(Exists(redacted))
 
         queryset = queryset.filter(**create_query_dict)
 
@@ -5,10 +5,11 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from rest_framework.validators import UniqueValidator
 from notifier.models import JobGroupNotifier
-from beagle_etl.smile_message.metadata_validator import MetadataValidator
+from beagle_etl.smile_message.metadata_validator import get_metadata_validator
 from file_system.repository.file_repository import FileRepository
 from file_system.models import File, Sample, Request, Patient, Storage, StorageType, FileGroup, FileMetadata, FileType
 from file_system.exceptions import MetadataValidationException
+from file_system.helper.export import EXPORT_FORMATS, NDJSON
 from runner.models import Run, RunStatus
 from drf_yasg import openapi
 
@@ -88,7 +89,7 @@ class CreateMetadata(serializers.ModelSerializer):
     metadata = serializers.JSONField()
 
     def validate_metadata(self, data):
-        validator = MetadataValidator()
+        validator = get_metadata_validator()
         try:
             validator.validate(data)
         except MetadataValidationException as e:
@@ -99,6 +100,21 @@ class CreateMetadata(serializers.ModelSerializer):
         fields = ("file", "metadata")
 
 
+class FileListSerializer(serializers.ListSerializer):
+    """
+    Looks up the redact flag of every sample on the page with one query
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if hasattr(data, "all") else data
+        sample_ids = {obj.file.samples[0] for obj in iterable if obj.file.samples}
+        self._context = dict(self._context)
+        self._context["redacted"] = dict(
+            Sample.objects.filter(sample_id__in=sample_ids, latest=True).values_list("sample_id", "redact")
+        )
+        return super().to_representation(iterable)
+
+
 class FileSerializer(serializers.ModelSerializer):
     id = serializers.SerializerMethodField()
     file_group = serializers.SerializerMethodField()
@@ -121,10 +137,7 @@ class FileSerializer(serializers.ModelSerializer):
 
     def get_user(self, obj):
         if obj.user:
-            try:
-                return User.objects.get(id=obj.user.id).username
-            except User.DoesNotExist:
-                return None
+            return obj.user.username
         return None
 
     def get_file_name(self, obj):
@@ -141,9 +154,14 @@ class FileSerializer(serializers.ModelSerializer):
 
     def get_redacted(self, obj):
         if obj.file.samples:
-            sample = Sample.objects.filter(sample_id=obj.file.samples[0]).first()
-            if sample:
-                return sample.redact
+            redacted = self.context.get("redacted")
+            if redacted is not None:
+                if obj.file.samples[0] in redacted:
+                    return redacted[obj.file.samples[0]]
+            else:
+                sample = Sample.objects.filter(sample_id=obj.file.samples[0], latest=True).first()
+                if sample:
+                    return sample.redact
         return "No sample associated with file"
 
     class Meta:
@@ -162,6 +180,7 @@ class FileSerializer(serializers.ModelSerializer):
             "created_date",
             "modified_date",
         )
+        list_serializer_class = FileListSerializer
 
 
 class FileQuerySerializer(serializers.Serializer):
@@ -194,6 +213,10 @@ class FileQuerySerializer(serializers.Serializer):
     modified_date_lt = serializers.DateTimeField(required=False)
 
 
+class FileExportQuerySerializer(FileQuerySerializer):
+    export_format = serializers.ChoiceField(choices=EXPORT_FORMATS, default=NDJSON, required=False)
+
+
 class DistributionQuerySerializer(serializers.Serializer):
     file_group = serializers.ListField(child=serializers.UUIDField(), allow_empty=True, required=False)
     path = serializers.ListField(child=serializers.CharField(), allow_empty=True, required=False)
@@ -245,13 +268,13 @@ class CreateFileSerializer(serializers.ModelSerializer):
 
     def validate_file_type(self, file_type):
         try:
-            file_type = FileType.objects.get(name=file_type)
+            file_type = FileType.objects.get_by_name(file_type)
         except FileType.DoesNotExist:
             raise serializers.ValidationError("Unknown file_type: %s" % file_type)
         return file_type
 
     def validate_metadata(self, data):
-        validator = MetadataValidator()
+        validator = get_metadata_validator()
         try:
             validator.validate(data)
         except MetadataValidationException as e:
@@ -300,7 +323,7 @@ class UpdateFileSerializer(serializers.Serializer):
     user = serializers.IntegerField(required=False)
 
     def validate_metadata(self, data):
-        validator = MetadataValidator()
+        validator = get_metadata_validator()
         try:
             validator.validate(data)
         except MetadataValidationException as e:
@@ -310,7 +333,7 @@ class UpdateFileSerializer(serializers.Serializer):
 
     def validate_file_type(self, file_type):
         try:
-            file_type = FileType.objects.get(name=file_type)
+            file_type = FileType.objects.get_by_name(file_type)
         except FileType.DoesNotExist:
             raise serializers.ValidationError("Unknown file_type: %s" % file_type)
         return file_type
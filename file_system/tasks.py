@@ -2,12 +2,17 @@ import os
 import logging
 from datetime import datetime
 from celery import shared_task
-from django.apps import apps
 from django.conf import settings
 from notifier.models import JobGroupNotifier
+from file_system.models import File
+from file_system.helper.availability_scan import scan_file_group
+from file_system.helper.stat_service import stat_service
 
 logger = logging.getLogger(__name__)
 
+MISSING_FILES_REPORT_PREFIX = "missing_files_report_"
+MISSING_FILES_CHANGED_REPORT_PREFIX = "missing_files_changed_report_"
+
 
 @shared_task
 def populate_job_group_notifier_metadata(request_id, pi, investigator, assay):
@@ -27,36 +32,65 @@ def populate_job_group_notifier_metadata(request_id, pi, investigator, assay):
 
 
 @shared_task
-def check_fastq_files():
-    File = apps.get_model(app_label="file_system", model_name="File")
-    files = File.objects.filter(file_group=settings.IMPORT_FILE_GROUP)
+def check_fastq_files(changed_only=False):
+    """
+    Flip File.available for the import file group and write the missing files report.
+    :param changed_only: only list directories modified since the previous scan
+    """
     current_date = datetime.now().strftime("%m_%d_%Y")
-    file_name = f"missing_files_report_{current_date}.txt"
-    report_file = open(os.path.join(settings.MISSING_FILES_REPORT_PATH, file_name), "w")
-    for f in files:
-        if not os.path.exists(f.path):
-            f.available = False
-            f.save()
-            report_file.write(f"{f.path}\n")
-        else:
-            if not f.available:
-                f.available = True
-                f.save()
-    report_file.close()
-    remove_oldest_file(settings.MISSING_FILES_REPORT_PATH)
-
-
-def remove_oldest_file(directory):
+    # Daily changed_only reports are kept apart, so they don't push out the weekly full reports
+    prefix, count = MISSING_FILES_REPORT_PREFIX, settings.MISSING_FILES_REPORT_COUNT
+    if changed_only:
+        prefix, count = MISSING_FILES_CHANGED_REPORT_PREFIX, settings.MISSING_FILES_CHANGED_REPORT_COUNT
+    scan_file_group(
+        settings.IMPORT_FILE_GROUP,
+        os.path.join(settings.MISSING_FILES_REPORT_PATH, f"{prefix}{current_date}.txt"),
+        changed_only=changed_only,
+    )
+    remove_oldest_file(settings.MISSING_FILES_REPORT_PATH, prefix, count)
+
+
+@shared_task
+def resolve_file_sizes(file_ids=None):
+    """
+    Fill in the size of files registered without one, with a batched stat per directory.
+    Without file_ids every available file with an unknown size is resolved.
+    """
+    files = File.objects.filter(size__isnull=True)
+    if file_ids:
+        files = files.filter(id__in=file_ids)
+    else:
+        files = files.exclude(available=False)
+    resolved = 0
+    last_id = None
+    while True:
+        batch = files.order_by("id")
+        if last_id:
+            batch = batch.filter(id__gt=last_id)
+        batch = list(batch.values_list("id", "path")[: settings.RESOLVE_FILE_SIZES_BATCH_SIZE])
+        if not batch:
+            break
+        sizes = stat_service.sizes([path for _, path in batch])
+        updates = [File(id=file_id, size=sizes[path]) for file_id, path in batch if sizes[path] is not None]
+        File.objects.bulk_update(updates, ["size"])
+        resolved += len(updates)
+        last_id = batch[-1][0]
+    logger.info(f"Resolved size of {resolved} files")
+    return resolved
+
+
+def remove_oldest_file(directory, prefix=MISSING_FILES_REPORT_PREFIX, keep=None):
+    keep = settings.MISSING_FILES_REPORT_COUNT if keep is None else keep
     oldest_date = None
     oldest_file = None
     count = 0
     for filename in os.listdir(directory):
-        if filename.startswith("missing_files_report_") and filename.endswith(".txt"):
+        if filename.startswith(prefix) and filename.endswith(".txt"):
             count += 1
-            date_str = filename[len("missing_files_report_") : -len(".txt")]
+            date_str = filename[len(prefix) : -len(".txt")]
             file_date = datetime.strptime(date_str, "%m_%d_%Y")
             if oldest_date is None or file_date < oldest_date:
                 oldest_date = file_date
                 oldest_file = filename
-    if count > settings.MISSING_FILES_REPORT_COUNT and oldest_file:
+    if count > keep and oldest_file:
         os.remove(os.path.join(directory, oldest_file))
@@ -0,0 +1,154 @@
+import os
+import tempfile
+from mock import patch
+from django.test import TestCase
+from file_system.models import File, FileGroup, FileType, Storage, StorageType
+from file_system.helper.availability_scan import AvailabilityScanner
+from file_system.tasks import remove_oldest_file, MISSING_FILES_CHANGED_REPORT_PREFIX
+
+
+class TestAvailabilityScanner(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        storage = Storage.objects.create(name="test_storage", type=StorageType.LOCAL)
+        self.file_group = FileGroup.objects.create(name="test_group", storage=storage)
+        self.file_type = FileType.objects.create(name="fastq")
+        self.report_path = os.path.join(self.tmp.name, "missing_files_report.txt")
+        self.state_path = os.path.join(self.tmp.name, "state.json")
+        os.makedirs(os.path.join(self.tmp.name, "run1"))
+        self.files = dict()
+        for name, on_disk, available in (
+            ("run1/present.fastq.gz", True, False),
+            ("run1/deleted.fastq.gz", False, True),
+            ("run2/missing_dir.fastq.gz", False, True),
+        ):
+            path = os.path.join(self.tmp.name, name)
+            if on_disk:
+                open(path, "w").close()
+            self.files[name] = File.objects.create(
+                file_name=os.path.basename(path),
+                path=path,
+                file_type=self.file_type,
+                file_group=self.file_group,
+                size=0,
+                available=available,
+            )
+
+    def _scan(self, changed_only=False):
+        return AvailabilityScanner(
+            self.file_group, self.report_path, self.state_path, changed_only=changed_only, workers=2, batch_size=1
+        ).run()
+
+    def _available(self, name):
+        return File.objects.get(id=self.files[name].id).available
+
+    def test_scan(self):
+        modified_date = self.files["run1/present.fastq.gz"].modified_date
+        stats = self._scan()
+        self.assertTrue(self._available("run1/present.fastq.gz"))
+        self.assertGreater(File.objects.get(id=self.files["run1/present.fastq.gz"].id).modified_date, modified_date)
+        self.assertFalse(self._available("run1/deleted.fastq.gz"))
+        self.assertFalse(self._available("run2/missing_dir.fastq.gz"))
+        self.assertEqual(stats["flipped"], 3)
+        with open(self.report_path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+        # Unchanged directories are not listed again, their files keep the scanned status
+        File.objects.filter(id=self.files["run1/present.fastq.gz"].id).update(available=False)
+        stats = self._scan(changed_only=True)
+        self.assertEqual(stats["skipped"], 1)
+        self.assertFalse(self._available("run1/present.fastq.gz"))
+
+        run1 = os.path.join(self.tmp.name, "run1")
+        open(os.path.join(run1, "new.fastq.gz"), "w").close()
+        mtime = os.stat(run1).st_mtime_ns + 10**9
+        os.utime(run1, ns=(mtime, mtime))
+        self._scan(changed_only=True)
+        self.assertTrue(self._available("run1/present.fastq.gz"))
+
+    def _touch(self, directory):
+        mtime = os.stat(directory).st_mtime_ns + 10**9
+        os.utime(directory, ns=(mtime, mtime))
+
+    def test_changed_directory_split_between_batches(self):
+        run3 = os.path.join(self.tmp.name, "run3")
+        os.makedirs(os.path.join(run3, "sub"))
+        for name in ("run3/a.fastq.gz", "run3/sub/b.fastq.gz", "run3/z.fastq.gz"):
+            path = os.path.join(self.tmp.name, name)
+            open(path, "w").close()
+            self.files[name] = File.objects.create(
+                file_name=os.path.basename(path),
+                path=path,
+                file_type=self.file_type,
+                file_group=self.file_group,
+                size=0,
+                available=True,
+            )
+        self._scan()
+        self.assertTrue(self._available("run3/z.fastq.gz"))
+
+        # run3/sub is listed between the two batches holding the files of run3
+        os.remove(os.path.join(run3, "z.fastq.gz"))
+        self._touch(run3)
+        self._scan(changed_only=True)
+        self.assertTrue(self._available("run3/a.fastq.gz"))
+        self.assertFalse(self._available("run3/z.fastq.gz"))
+
+    def test_interrupted_scan_resumes_after_checkpoint(self):
+        process_batch = AvailabilityScanner._process_batch
+        batches = []
+
+        def interrupted_process_batch(scanner, batch, report):
+            if batches:
+                raise RuntimeError("interrupted")
+            batches.append(batch)
+            process_batch(scanner, batch, report)
+
+        with patch.object(AvailabilityScanner, "_process_batch", interrupted_process_batch):
+            with self.assertRaises(RuntimeError):
+                self._scan()
+        self.assertFalse(self._available("run1/deleted.fastq.gz"))
+        self.assertTrue(self._available("run2/missing_dir.fastq.gz"))
+
+        # Files before the checkpoint are not scanned again
+        File.objects.filter(id=self.files["run1/deleted.fastq.gz"].id).update(available=True)
+        stats = self._scan()
+        self.assertEqual(stats["files"], 1)
+        self.assertTrue(self._available("run1/deleted.fastq.gz"))
+        self.assertFalse(self._available("run2/missing_dir.fastq.gz"))
+        with open(self.report_path) as f:
+            self.assertEqual(
+                f.read().splitlines(),
+                [self.files["run1/deleted.fastq.gz"].path, self.files["run2/missing_dir.fastq.gz"].path],
+            )
+
+        # The next scan starts from the beginning
+        self.assertEqual(self._scan()["files"], 3)
+
+
+class TestMissingFilesReports(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _reports(self, prefix, days):
+        for day in days:
+            open(os.path.join(self.tmp.name, "%s01_%02d_2024.txt" % (prefix, day)), "w").close()
+
+    def test_changed_reports_are_rotated_apart_from_full_reports(self):
+        self._reports("missing_files_report_", range(1, 3))
+        self._reports(MISSING_FILES_CHANGED_REPORT_PREFIX, range(1, 5))
+        with self.settings(MISSING_FILES_REPORT_COUNT=2):
+            remove_oldest_file(self.tmp.name)
+            remove_oldest_file(self.tmp.name, MISSING_FILES_CHANGED_REPORT_PREFIX, 3)
+        self.assertEqual(
+            sorted(os.listdir(self.tmp.name)),
+            [
+                "missing_files_changed_report_01_02_2024.txt",
+                "missing_files_changed_report_01_03_2024.txt",
+                "missing_files_changed_report_01_04_2024.txt",
+                "missing_files_report_01_01_2024.txt",
+                "missing_files_report_01_02_2024.txt",
+            ],
+        )
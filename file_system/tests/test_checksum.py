@@ -0,0 +1,48 @@
+import os
+import hashlib
+import tempfile
+from django.test import TestCase
+from file_system.models import File, FileGroup, FileType, Storage, StorageType
+from file_system.helper.checksum import sha1, sha1_many, fingerprint, FailedToCalculateChecksum
+from beagle_etl.jobs.helper_jobs import calculate_checksums
+
+
+class TestChecksum(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.urandom(3 * 1024 + 5)
+        self.path = os.path.join(self.tmp.name, "file.fastq")
+        with open(self.path, "wb") as f:
+            f.write(self.content)
+        self.expected = "sha1$%s" % hashlib.sha1(self.content).hexdigest()
+
+    def test_sha1(self):
+        self.assertEqual(sha1(self.path, buffersize=1024), self.expected)
+        self.assertEqual(sha1(self.path, buffersize=1024, use_mmap=True), self.expected)
+        missing = os.path.join(self.tmp.name, "missing.fastq")
+        checksums = sha1_many([self.path, missing], workers=2)
+        self.assertEqual(checksums[self.path], self.expected)
+        self.assertIsInstance(checksums[missing], FailedToCalculateChecksum)
+        self.assertIsNone(fingerprint(missing))
+
+    def test_calculate_checksums_skips_unchanged_files(self):
+        storage = Storage.objects.create(name="test_storage", type=StorageType.LOCAL)
+        file_group = FileGroup.objects.create(name="test_group", storage=storage)
+        file_obj = File.objects.create(
+            file_name="file.fastq",
+            path=self.path,
+            original_path=self.path,
+            file_type=FileType.objects.create(name="fastq"),
+            file_group=file_group,
+            size=len(self.content),
+        )
+        calculate_checksums([str(file_obj.id)])
+        file_obj.refresh_from_db()
+        self.assertEqual(file_obj.checksum, self.expected)
+        self.assertEqual(file_obj.checksum_fingerprint, fingerprint(self.path))
+
+        File.objects.filter(id=file_obj.id).update(checksum="sha1$recorded")
+        calculate_checksums([str(file_obj.id)])
+        file_obj.refresh_from_db()
+        self.assertEqual(file_obj.checksum, "sha1$recorded")
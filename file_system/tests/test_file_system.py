@@ -1,3 +1,4 @@
+import json
 import datetime
 import os
 import uuid
@@ -6,9 +7,22 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from beagle_etl.metadata.validator import MetadataValidator
 from file_system.repository import FileRepository
-from file_system.models import Storage, StorageType, FileGroup, File, FileType, FileMetadata, Sample, Request, Patient
+from file_system.models import (
+    Storage,
+    StorageType,
+    FileGroup,
+    File,
+    FileType,
+    FileMetadata,
+    FileMetadataProjection,
+    Sample,
+    Request,
+    Patient,
+)
 
 
 class FileTest(APITestCase):
@@ -776,6 +790,57 @@ class FileTest(APITestCase):
         self.assertEqual(response.json()["results"][0][f"metadata__{settings.REQUEST_ID_METADATA_KEY}"], "1")
         self.assertEqual(response.json()["results"][0][f"metadata__{settings.SAMPLE_ID_METADATA_KEY}"], "1s")
 
+    def test_list_files_query_count_does_not_grow_with_page_size(self):
+        self._create_files("fasta", 10)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer %s" % self._generate_jwt())
+        with CaptureQueriesContext(connection) as small_page:
+            response = self.client.get("/v0/fs/files/?page_size=2", format="json")
+        self.assertEqual(len(response.json()["results"]), 2)
+        with CaptureQueriesContext(connection) as large_page:
+            response = self.client.get("/v0/fs/files/?page_size=20", format="json")
+        self.assertEqual(len(response.json()["results"]), 20)
+        self.assertEqual(len(small_page.captured_queries), len(large_page.captured_queries))
+        self.assertEqual(response.json()["results"][0]["redacted"], False)
+
+    def test_list_files_cursor(self):
+        self._create_files("fasta", 10)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer %s" % self._generate_jwt())
+        response = self.client.get("/v0/fs/files/?page_size=7&cursor=&exact_count=true", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 20)
+        ids = [f["id"] for f in response.json()["results"]]
+        pages = 1
+        while response.json()["next"]:
+            response = self.client.get(response.json()["next"], format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend([f["id"] for f in response.json()["results"]])
+            pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(ids), 20)
+        self.assertEqual(len(set(ids)), 20)
+        response = self.client.get("/v0/fs/files/?cursor=invalid", format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_files(self):
+        self._create_files("fasta", 3)
+        self._create_files("bam", 2)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer %s" % self._generate_jwt())
+        response = self.client.get(
+            f"/v0/fs/files/export/?file_type=fasta&values_metadata={settings.REQUEST_ID_METADATA_KEY}", format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 6)
+        request_ids = {row[settings.REQUEST_ID_METADATA_KEY] for row in rows}
+        self.assertEqual(request_ids, {"request_0", "request_1", "request_2"})
+        self.assertNotIn("metadata", rows[0])
+        response = self.client.get("/v0/fs/files/export/?file_type=bam&export_format=csv", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,path,file_name,file_type,file_group,metadata")
+        self.assertEqual(len(lines), 3)
+
     def test_metadata_clean_function(self):
         test1 = "abc\tdef2"
         test2 = """
@@ -1017,6 +1082,71 @@ class FileTest(APITestCase):
             return self.random_date(start, end)
         return localized_time
 
+    def test_metadata_projection_follows_latest_version(self):
+        _file = self._create_single_file(
+            "/path/to/sample_file.bam", "bam", str(self.file_group.id), "request_id", "sample_id"
+        )
+        projection = FileMetadataProjection.objects.get(file=_file)
+        self.assertEqual(projection.request_id, "request_id")
+        self.assertEqual(projection.sample_id, "sample_id")
+        FileMetadata.objects.create_or_update(
+            file=_file.id, metadata={settings.REQUEST_ID_METADATA_KEY: "request_id_2"}, user=None
+        )
+        projection.refresh_from_db()
+        latest = FileMetadata.objects.get(file=_file, latest=True)
+        self.assertEqual(projection.file_metadata_id, latest.id)
+        self.assertEqual(projection.request_id, "request_id_2")
+        self.assertEqual(FileMetadataProjection.objects.count(), 1)
+
+    def test_file_repository_filter_uses_projection(self):
+        self._create_files("fasta", 3)
+        files = FileRepository.filter(metadata={settings.REQUEST_ID_METADATA_KEY: "request_1"})
+        self.assertIn("file_system_filemetadataprojection", str(files.query))
+        self.assertEqual(files.count(), 2)
+        files = FileRepository.filter(metadata={settings.SAMPLE_ID_METADATA_KEY: ["sample_0", "sample_2"]})
+        self.assertEqual(files.count(), 4)
+        files = FileRepository.filter(metadata={"runDate": "2020-01-01"})
+        self.assertNotIn("file_system_filemetadataprojection", str(files.query))
+
+    def test_metadata_projection_skips_values_longer_than_column(self):
+        long_tumor_or_normal = "Tumor" * 10
+        _file = self._create_single_file(
+            "/path/to/sample_file.bam", "bam", str(self.file_group.id), "request_id", "sample_id"
+        )
+        FileMetadata.objects.create_or_update(
+            file=_file.id,
+            metadata={
+                settings.REQUEST_ID_METADATA_KEY: "request_id",
+                settings.TUMOR_OR_NORMAL_METADATA_KEY: long_tumor_or_normal,
+            },
+            user=None,
+        )
+        projection = FileMetadataProjection.objects.get(file=_file)
+        self.assertEqual(projection.request_id, "request_id")
+        self.assertIsNone(projection.tumor_or_normal)
+        files = FileRepository.filter(metadata={settings.TUMOR_OR_NORMAL_METADATA_KEY: long_tumor_or_normal})
+        self.assertNotIn("file_system_filemetadataprojection", str(files.query))
+        self.assertEqual(files.count(), 1)
+
+    def test_file_repository_filter_redact(self):
+        self._create_files_with_details_specified(
+            "fasta", file_group_id=str(self.file_group.id), request_id="08944_B", sample_id="08944_B_1"
+        )
+        self._create_files_with_details_specified(
+            "fasta", file_group_id=str(self.file_group.id), request_id="08944_B", sample_id="08944_B_2"
+        )
+        query = {settings.REQUEST_ID_METADATA_KEY: "08944_B"}
+        self.assertEqual(FileRepository.filter(metadata=query, filter_redact=True).count(), 4)
+        Sample.objects.filter(sample_id="08944_B_1", latest=True).update(latest=False)
+        Sample.objects.create(sample_id="08944_B_1", redact=True, version=1, latest=True)
+        files = FileRepository.filter(metadata=query, filter_redact=True)
+        self.assertEqual(files.count(), 2)
+        for f in files:
+            self.assertEqual(f.file.samples, ["08944_B_2"])
+        Sample.objects.filter(sample_id="08944_B_1", latest=True).update(latest=False)
+        Sample.objects.create(sample_id="08944_B_1", redact=False, version=2, latest=True)
+        self.assertEqual(FileRepository.filter(metadata=query, filter_redact=True).count(), 4)
+
     def test_file_repository_distinct(self):
         """
         TODO: This test works, try to find edgecase from production
@@ -1214,6 +1344,31 @@ class FileTest(APITestCase):
             self.assertEqual(files.count(), 4)
             self.assertEqual(f.metadata[settings.SEX_METADATA_KEY], "M")
 
+    def test_bulk_update_metadata(self):
+        self._create_files_with_details_specified(
+            "fasta",
+            file_group_id=str(self.file_group.id),
+            request_id="08944_B",
+            sample_id="08944_B_1",
+            patient_id="PT-001",
+        )
+        query = {f"metadata__{settings.SAMPLE_ID_METADATA_KEY}": "08944_B_1"}
+        # savepoint, select, flip latest, insert versions, update files, previous request ids, sync projection, release
+        with self.assertNumQueries(8):
+            new_versions = FileMetadata.objects.bulk_update_metadata(
+                query, {settings.REQUEST_ID_METADATA_KEY: "08944_C", settings.SEX_METADATA_KEY: "F"}
+            )
+        self.assertEqual(len(new_versions), 2)
+        for f in File.objects.filter(samples=["08944_B_1"]):
+            self.assertEqual(f.request_id, "08944_C")
+            latest = FileMetadata.objects.get(file=f, latest=True)
+            self.assertEqual(latest.version, 1)
+            self.assertEqual(latest.metadata[settings.SEX_METADATA_KEY], "F")
+            self.assertEqual(FileMetadataProjection.objects.get(file=f).file_metadata_id, latest.id)
+        with self.assertNumQueries(3):
+            new_versions = FileMetadata.objects.bulk_update_metadata(query, {settings.SEX_METADATA_KEY: "F"})
+        self.assertEqual(new_versions, [])
+
     def test_copy_files_by_request_id_to_different_file_group(self):
         sample_1 = Sample.objects.create(sample_id="TEST_B_1")
         sample_2 = Sample.objects.create(sample_id="TEST_B_2")
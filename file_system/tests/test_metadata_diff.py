@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase
+from file_system.helper.metadata_diff import flat_diff, is_unchanged, values_equal
+
+
+class TestMetadataDiff(SimpleTestCase):
+    def test_flat_diff(self):
+        old = {"sampleId": "s1", "libraries": [{"runs": ["r1", "r2"]}], "sex": "F", "baitSet": "IMPACT505"}
+        new = {"sampleId": "s1", "libraries": [{"runs": ["r1", "r2"]}], "sex": "M", "recipe": "WES"}
+        diff = flat_diff(new, old)
+        self.assertEqual(diff.changed, {"sex"})
+        self.assertEqual(diff.added, {"recipe"})
+        self.assertEqual(diff.removed, {"baitSet"})
+        self.assertFalse(flat_diff(old, dict(old)))
+
+    def test_lists_are_compared_regardless_of_order(self):
+        self.assertTrue(values_equal([{"a": 1}, {"b": [2, 1]}], [{"b": [2, 1]}, {"a": 1}]))
+        self.assertFalse(values_equal(["a", "a", "b"], ["a", "b", "b"]))
+        self.assertFalse(values_equal(1, 1.0))
+        self.assertFalse(values_equal(None, ""))
+
+    def test_is_unchanged(self):
+        current = {"sampleId": "s1", "runs": ["r1", "r2"]}
+        self.assertTrue(is_unchanged(current, {"runs": ["r2", "r1"]}))
+        self.assertFalse(is_unchanged(current, {"recipe": "WES"}))
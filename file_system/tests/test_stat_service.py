@@ -0,0 +1,50 @@
+import os
+import tempfile
+from django.test import TestCase
+from file_system.models import File, FileGroup, FileType, Storage, StorageType
+from file_system.helper.stat_service import StatService
+from file_system.tasks import resolve_file_sizes
+
+
+class TestStatService(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.paths = []
+        for i in range(StatService.SCANDIR_THRESHOLD + 2):
+            path = os.path.join(self.tmp.name, "file_%s.fastq.gz" % i)
+            with open(path, "w") as f:
+                f.write("A" * i)
+            self.paths.append(path)
+
+    def test_sizes(self):
+        service = StatService(ttl=300, workers=2)
+        missing = os.path.join(self.tmp.name, "missing", "file.fastq.gz")
+        sizes = service.sizes(self.paths + [missing])
+        self.assertEqual([sizes[path] for path in self.paths], list(range(len(self.paths))))
+        self.assertIsNone(sizes[missing])
+
+        # Sizes are cached until invalidated
+        with open(self.paths[1], "w") as f:
+            f.write("AAAAA")
+        self.assertEqual(service.size(self.paths[1]), 1)
+        service.invalidate(self.paths[1])
+        self.assertEqual(service.size(self.paths[1]), 5)
+
+    def test_resolve_file_sizes(self):
+        storage = Storage.objects.create(name="test_storage", type=StorageType.LOCAL)
+        file_group = FileGroup.objects.create(name="test_group", storage=storage)
+        file_type = FileType.objects.create(name="fastq")
+        files = [
+            File.objects.create(file_name=os.path.basename(path), path=path, file_type=file_type, file_group=file_group)
+            for path in self.paths[:3]
+        ]
+        self.assertIsNone(files[0].size)
+
+        files[2].set_unavailable()
+        resolve_file_sizes()
+        sizes = dict(File.objects.filter(id__in=[f.id for f in files]).values_list("path", "size"))
+        self.assertEqual(sizes, {self.paths[0]: 0, self.paths[1]: 1, self.paths[2]: None})
+
+        resolve_file_sizes([str(files[2].id)])
+        self.assertEqual(File.objects.get(id=files[2].id).size, 2)
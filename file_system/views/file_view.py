@@ -1,20 +1,24 @@
+import json
 from django.conf import settings
 from django.db import transaction, IntegrityError
 from rest_framework import mixins
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.decorators import action
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.permissions import IsAuthenticated
 from file_system.repository import FileRepository
 from file_system.models import File, FileMetadata
 from file_system.exceptions import FileNotFoundException
+from file_system.helper.export import CSV, export_response
 from file_system.serializers import (
     CreateFileSerializer,
     CreateFileFormSerializer,
     UpdateFileSerializer,
     FileSerializer,
     FileQuerySerializer,
+    FileExportQuerySerializer,
     BatchPatchFileSerializer,
     CopyFilesSerializer,
 )
@@ -36,6 +40,16 @@ class FileView(
     queryset = FileMetadata.objects.order_by("file", "-version").distinct("file")
     permission_classes = (IsAuthenticated,)
     pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    query_list_types = [
+        "file_group",
+        "path",
+        "metadata",
+        "metadata_regex",
+        "filename",
+        "file_type",
+        "values_metadata",
+        "exclude_null_metadata",
+    ]
 
     def get_serializer_class(self):
         return FileSerializer
@@ -55,97 +69,97 @@ class FileView(
         serializer = FileSerializer(f)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def _filter_kwargs(self, fixed_query_params):
+        """
+        Translate the query parameters of the files listing to FileRepository.filter arguments
+        """
+        queryset = FileRepository.all()
+        queryset = time_filter(FileMetadata, fixed_query_params, previous_queryset=queryset)
+        file_group = fixed_query_params.get("file_group")
+        path = fixed_query_params.get("path")
+        metadata = fixed_query_params.get("metadata")
+        metadata_regex = fixed_query_params.get("metadata_regex")
+        path_regex = fixed_query_params.get("path_regex")
+        filename = fixed_query_params.get("filename")
+        filename_regex = fixed_query_params.get("filename_regex")
+        file_type = fixed_query_params.get("file_type")
+        values_metadata = fixed_query_params.get("values_metadata")
+        exclude_null_metadata = fixed_query_params.get("exclude_null_metadata")
+        order_by = fixed_query_params.get("order_by")
+        distinct_metadata = fixed_query_params.get("distinct_metadata")
+        kwargs = {"queryset": queryset}
+        if file_group:
+            if len(file_group) == 1:
+                kwargs["file_group"] = file_group[0]
+            else:
+                kwargs["file_group_in"] = file_group
+        if path:
+            if len(path) == 1:
+                kwargs["path"] = path[0]
+            else:
+                kwargs["path_in"] = path
+        if metadata:
+            filter_query = dict()
+            for val in metadata:
+                k, v = val.split(":")
+                metadata_field = k.strip()
+                if metadata_field not in filter_query:
+                    filter_query[metadata_field] = [v.strip()]
+                else:
+                    filter_query[metadata_field].append(v.strip())
+            if filter_query:
+                kwargs["metadata"] = filter_query
+        if metadata_regex:
+            filter_query = []
+            for single_reqex_query in metadata_regex:
+                single_value = single_reqex_query.split("|")
+                single_reqex_filters = []
+                for val in single_value:
+                    k, v = val.split(":")
+                    single_reqex_filters.append((k.strip(), v.strip()))
+                filter_query.append(single_reqex_filters)
+            if filter_query:
+                kwargs["metadata_regex"] = filter_query
+        if path_regex:
+            kwargs["path_regex"] = path_regex
+        if filename:
+            if len(filename) == 1:
+                kwargs["file_name"] = filename[0]
+            else:
+                kwargs["file_name_in"] = filename
+        if filename_regex:
+            kwargs["file_name_regex"] = filename_regex
+        if file_type:
+            if len(file_type) == 1:
+                kwargs["file_type"] = file_type[0]
+            else:
+                kwargs["file_type_in"] = file_type
+        if exclude_null_metadata:
+            kwargs["exclude"] = exclude_null_metadata
+        if order_by:
+            kwargs["order_by"] = order_by
+        if distinct_metadata:
+            kwargs["distinct"] = distinct_metadata
+        if values_metadata:
+            if len(values_metadata) == 1:
+                kwargs["key_values_metadata"] = values_metadata[0]
+            else:
+                kwargs["key_values_metadata_list"] = values_metadata
+        return kwargs
+
     @swagger_auto_schema(query_serializer=FileQuerySerializer)
     def list(self, request, *args, **kwargs):
-        query_list_types = [
-            "file_group",
-            "path",
-            "metadata",
-            "metadata_regex",
-            "filename",
-            "file_type",
-            "values_metadata",
-            "exclude_null_metadata",
-        ]
-        fixed_query_params = fix_query_list(request.query_params, query_list_types)
+        fixed_query_params = fix_query_list(request.query_params, self.query_list_types)
         serializer = FileQuerySerializer(data=fixed_query_params)
         if serializer.is_valid():
-            queryset = FileRepository.all()
-            queryset = time_filter(FileMetadata, request.query_params, previous_queryset=queryset)
-            file_group = fixed_query_params.get("file_group")
-            path = fixed_query_params.get("path")
-            metadata = fixed_query_params.get("metadata")
-            metadata_regex = fixed_query_params.get("metadata_regex")
-            path_regex = fixed_query_params.get("path_regex")
-            filename = fixed_query_params.get("filename")
-            filename_regex = fixed_query_params.get("filename_regex")
-            file_type = fixed_query_params.get("file_type")
             values_metadata = fixed_query_params.get("values_metadata")
-            exclude_null_metadata = fixed_query_params.get("exclude_null_metadata")
-            order_by = fixed_query_params.get("order_by")
-            distinct_metadata = fixed_query_params.get("distinct_metadata")
-            kwargs = {"queryset": queryset}
-            if file_group:
-                if len(file_group) == 1:
-                    kwargs["file_group"] = file_group[0]
-                else:
-                    kwargs["file_group_in"] = file_group
-            if path:
-                if len(path) == 1:
-                    kwargs["path"] = path[0]
-                else:
-                    kwargs["path_in"] = path
-            if metadata:
-                filter_query = dict()
-                for val in metadata:
-                    k, v = val.split(":")
-                    metadata_field = k.strip()
-                    if metadata_field not in filter_query:
-                        filter_query[metadata_field] = [v.strip()]
-                    else:
-                        filter_query[metadata_field].append(v.strip())
-                if filter_query:
-                    kwargs["metadata"] = filter_query
-            if metadata_regex:
-                filter_query = []
-                for single_reqex_query in metadata_regex:
-                    single_value = single_reqex_query.split("|")
-                    single_reqex_filters = []
-                    for val in single_value:
-                        k, v = val.split(":")
-                        single_reqex_filters.append((k.strip(), v.strip()))
-                    filter_query.append(single_reqex_filters)
-                if filter_query:
-                    kwargs["metadata_regex"] = filter_query
-            if path_regex:
-                kwargs["path_regex"] = path_regex
-            if filename:
-                if len(filename) == 1:
-                    kwargs["file_name"] = filename[0]
-                else:
-                    kwargs["file_name_in"] = filename
-            if filename_regex:
-                kwargs["file_name_regex"] = filename_regex
-            if file_type:
-                if len(file_type) == 1:
-                    kwargs["file_type"] = file_type[0]
-                else:
-                    kwargs["file_type_in"] = file_type
-            if exclude_null_metadata:
-                kwargs["exclude"] = exclude_null_metadata
-            if order_by:
-                kwargs["order_by"] = order_by
-            if distinct_metadata:
-                kwargs["distinct"] = distinct_metadata
-            if values_metadata:
-                if len(values_metadata) == 1:
-                    kwargs["key_values_metadata"] = values_metadata[0]
-                else:
-                    kwargs["key_values_metadata_list"] = values_metadata
+            kwargs = self._filter_kwargs(fixed_query_params)
             try:
                 queryset = FileRepository.filter(**kwargs)
             except Exception as e:
                 return Response({"details": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if not values_metadata:
+                queryset = queryset.select_related("file", "file__file_group", "file__file_type", "user")
             page = self.paginate_queryset(queryset)
             if page is not None:
                 if values_metadata:
@@ -156,6 +170,49 @@ class FileView(
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @swagger_auto_schema(query_serializer=FileExportQuerySerializer)
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        """
+        Stream every file matching the listing query parameters as NDJSON or CSV.
+        values_metadata selects the metadata keys exported, all metadata is exported otherwise.
+        """
+        fixed_query_params = fix_query_list(request.query_params, self.query_list_types)
+        serializer = FileExportQuerySerializer(data=fixed_query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        export_format = serializer.validated_data["export_format"]
+        values_metadata = fixed_query_params.pop("values_metadata", None)
+        try:
+            queryset = FileRepository.filter(**self._filter_kwargs(fixed_query_params))
+        except Exception as e:
+            return Response({"details": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        fieldnames = ["id", "path", "file_name", "file_type", "file_group"] + (values_metadata or ["metadata"])
+        rows = self._export_rows(queryset, values_metadata, export_format)
+        return export_response(rows, fieldnames, export_format, "files.%s" % export_format)
+
+    @staticmethod
+    def _export_rows(queryset, values_metadata, export_format):
+        rows = queryset.values(
+            "file_id", "file__path", "file__file_name", "file__file_type__name", "file__file_group_id", "metadata"
+        ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        for row in rows:
+            export_row = {
+                "id": row["file_id"],
+                "path": row["file__path"],
+                "file_name": row["file__file_name"],
+                "file_type": row["file__file_type__name"],
+                "file_group": row["file__file_group_id"],
+            }
+            if values_metadata:
+                for key in values_metadata:
+                    export_row[key] = row["metadata"].get(key)
+            elif export_format == CSV:
+                export_row["metadata"] = json.dumps(row["metadata"], default=str)
+            else:
+                export_row["metadata"] = row["metadata"]
+            yield export_row
+
     @swagger_auto_schema(request_body=CreateFileFormSerializer)
     def create(self, request, *args, **kwargs):
         serializer = CreateFileSerializer(data=request.data, context={"request": request})
@@ -51,3 +51,41 @@ def memcache_task_lock(lock_id, oid):
             # owned by someone else
             # also don't release the lock if we didn't acquire it
             cache.delete(lock_id)
+
+
+@contextmanager
+def memcache_semaphore(semaphore_id, limit, expiration=LOCK_EXPIRE):
+    """
+    Counting semaphore shared between workers. Yields True if one of the `limit` slots was acquired.
+    Example:
+       file_manager.tasks.stage_file_job
+    :param semaphore_id:
+    :param limit: number of holders allowed at the same time
+    :param expiration: slots are released when the counter expires, in case a holder died. Every acquired
+    slot extends it, so the counter doesn't expire and restart from 0 while holders are running
+    :return:
+    """
+    cache.add(semaphore_id, 0, expiration)
+    try:
+        acquired = cache.incr(semaphore_id) <= limit
+        if acquired:
+            cache.touch(semaphore_id, expiration)
+    except ValueError:
+        # counter expired between add and incr
+        cache.add(semaphore_id, 1, expiration)
+        acquired = True
+    if not acquired:
+        _release(semaphore_id)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            _release(semaphore_id)
+
+
+def _release(semaphore_id):
+    try:
+        cache.decr(semaphore_id)
+    except ValueError:
+        # counter expired, nothing to release
+        pass
@@ -1,16 +1,52 @@
 import os
 import logging
+import importlib
 from django.conf import settings
+from ..event import Event
 from ..event_handler import EventHandler
 from file_system.models import FileGroup, File, FileMetadata, FileType
 from notifier.models import JobGroup, JobGroupNotifier
-from notifier.jira.jira_client import JiraClient
+from notifier.jira.jira_client import JiraClient, jira_client
+
+
+LABEL = "label"
+DESCRIPTION = "description"
+FIELD = "field"
+COMMENT = "comment"
+COMMENT_SEPARATOR = "\n\n----\n\n"
 
 
 class JiraEventHandler(EventHandler):
+    # Handlers whose updates can be merged with other events of the same ticket, see process_batch
+    COALESCED_METHODS = {
+        "process_etl_set_recipe_event": LABEL,
+        "process_redelivery_event": LABEL,
+        "process_set_label_event": LABEL,
+        "process_add_pipeline_to_description_event": DESCRIPTION,
+        "process_set_pipeline_field_event": FIELD,
+        "process_set_delivery_date_event": FIELD,
+        "process_etl_jobs_links_event": COMMENT,
+        "process_operator_run_event": COMMENT,
+        "process_run_completed": COMMENT,
+        "process_run_started_event": COMMENT,
+        "process_operator_request_event": COMMENT,
+        "process_etl_job_failed_event": COMMENT,
+        "process_operator_error_event": COMMENT,
+        "process_assay_event": COMMENT,
+        "process_external_email_event": COMMENT,
+        "process_only_normal_samples_event": COMMENT,
+        "process_not_all_normals_used_event": COMMENT,
+        "process_custom_capture_cc_event": COMMENT,
+        "process_redelivery_update_event": COMMENT,
+        "process_permission_denied_event": COMMENT,
+        "process_set_run_ticket_in_import_event": COMMENT,
+        "process_wes_job_failed_event": COMMENT,
+        "process_chronos_missing_samples_event": COMMENT,
+    }
+
     def __init__(self, project):
         super().__init__()
-        self.client = JiraClient(settings.JIRA_URL, settings.JIRA_USERNAME, settings.JIRA_PASSWORD, project)
+        self.client = jira_client(project)
 
     @property
     def db_name(self):
@@ -211,3 +247,75 @@ class JiraEventHandler(EventHandler):
 
     def process_send_email_event(self, event):
         pass
+
+    def can_coalesce(self, event):
+        """
+        True if the event (dict) only adds labels, description rows, empty fields or comments to the ticket
+        """
+        event_class = getattr(importlib.import_module(Event.EVENT_MODULE_NAME), event.get("class", ""), None)
+        return event_class is not None and self.events.get(event_class.get_type()) in self.COALESCED_METHODS
+
+    def process_batch(self, events):
+        """
+        Apply events of one ticket with the fewest API calls. Labels, description rows and fields are written
+        with one GET and one PUT, comments are joined into one comment.
+        :param events: event dicts accepted by can_coalesce, in the order they were sent
+        :return: number of API calls made
+        :raises requests.HTTPError: if JIRA rejects a call. Sending the same events again is safe, labels,
+        description rows and fields already on the ticket are not added twice
+        """
+        labels, description, fields, comments = [], [], {}, []
+        job_notifier_id = None
+        for event in events:
+            e = Event.from_dict(dict(event))
+            job_notifier_id = e.job_notifier
+            kind = self.COALESCED_METHODS[self.events[e.get_type()]]
+            if kind == LABEL:
+                labels.append(str(e))
+            elif kind == DESCRIPTION:
+                description.append(str(e))
+            elif kind == FIELD:
+                field_id = (
+                    settings.JIRA_PIPELINE_FIELD_ID
+                    if e.get_method() == "process_set_pipeline_field_event"
+                    else settings.JIRA_DELIVERY_DATE_FIELD_ID
+                )
+                if field_id:
+                    fields.setdefault(field_id, str(e))
+            else:
+                comments.append(str(e))
+        if job_notifier_id is None:
+            return 0
+
+        jira_id = JobGroupNotifier.objects.values_list("jira_id", flat=True).get(id=job_notifier_id)
+        calls = 0
+        if labels or description or fields:
+            ticket = self.client.get_ticket(jira_id)
+            ticket.raise_for_status()
+            calls += 1
+            calls += self._update_ticket(jira_id, ticket.json().get("fields", {}), labels, description, fields)
+        if comments:
+            self.client.comment(jira_id, COMMENT_SEPARATOR.join(comments)).raise_for_status()
+            calls += 1
+        return calls
+
+    def _update_ticket(self, jira_id, current, labels, description, fields):
+        update = dict()
+        current_labels = current.get("labels") or []
+        new_labels = [label for label in dict.fromkeys(labels) if label not in current_labels]
+        if new_labels:
+            update["labels"] = current_labels + new_labels
+        current_description = current.get("description") or ""
+        new_description = current_description
+        for row in description:
+            if row not in new_description:
+                new_description += row
+        if new_description != current_description:
+            update["description"] = new_description
+        for field_id, value in fields.items():
+            if not current.get(field_id):
+                update[field_id] = value
+        if not update:
+            return 0
+        self.client.update_fields(jira_id, update).raise_for_status()
+        return 1
@@ -3,6 +3,7 @@ import logging
 from django.db.models import Q
 from django.conf import settings
 from file_system.repository.file_repository import FileRepository
+from file_system.helper.request_summary import get_request_summary
 from beagle_etl.smile_message.metadata_validator import MetadataValidator
 from runner.operator.helper import format_sample_name
 
@@ -12,33 +13,22 @@ def get_project_id(request_id):
 
 
 def get_gene_panel(request_id):
-    return FileRepository.filter(
-        metadata={settings.REQUEST_ID_METADATA_KEY: request_id}, values_metadata=settings.RECIPE_METADATA_KEY
-    ).first()
+    return get_request_summary(request_id).recipe
 
 
 def get_samples(request_id):
-    return FileRepository.filter(
-        metadata={settings.REQUEST_ID_METADATA_KEY: request_id}, values_metadata=settings.SAMPLE_ID_METADATA_KEY
-    ).all()
+    return get_request_summary(request_id).samples
 
 
 def get_number_of_tumor_samples(request_id):
-    return FileRepository.filter(
-        metadata={settings.REQUEST_ID_METADATA_KEY: request_id, settings.TUMOR_OR_NORMAL_METADATA_KEY: "Tumor"},
-        values_metadata=settings.SAMPLE_ID_METADATA_KEY,
-    ).count()
+    return get_request_summary(request_id).tumor_samples
 
 
 def get_emails_to_notify(request_id, notification_type=None):
-    investigator_email = FileRepository.filter(
-        metadata={settings.REQUEST_ID_METADATA_KEY: request_id},
-        values_metadata=settings.INVESTIGATOR_EMAIL_METADATA_KEY,
-    ).first()
-    lab_head_email = FileRepository.filter(
-        metadata={settings.REQUEST_ID_METADATA_KEY: request_id}, values_metadata=settings.LAB_HEAD_EMAIL_METADATA_KEY
-    ).first()
-    send_to = settings.BEAGLE_NOTIFIER_VOYAGER_STATUS_EMAIL_TO
+    contacts = get_request_summary(request_id).contacts
+    investigator_email = contacts.get(settings.INVESTIGATOR_EMAIL_METADATA_KEY)
+    lab_head_email = contacts.get(settings.LAB_HEAD_EMAIL_METADATA_KEY)
+    send_to = list(settings.BEAGLE_NOTIFIER_VOYAGER_STATUS_EMAIL_TO)
     if notification_type in settings.BEAGLE_NOTIFIER_VOYAGER_STATUS_NOTIFY_EXTERNAL:
         if investigator_email not in settings.BEAGLE_NOTIFIER_VOYAGER_STATUS_BLACKLIST and investigator_email:
             send_to.append(investigator_email)
@@ -0,0 +1,138 @@
+import re
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeJiraServer(object):
+    """
+    In-process JIRA REST API for tests and benchmarks.
+
+    Tickets are kept in memory, every request is recorded in `requests` as (method, path, body) and
+    `connections` counts the TCP connections the server accepted, to check that clients reuse them.
+    The next `errors` requests are answered with 503 Service Unavailable.
+    Example:
+        with FakeJiraServer() as jira:
+            client = JiraClient(jira.url, "user", "password", "TEST")
+    """
+
+    ISSUE = re.compile(r"^/rest/api/2/issue/(?P<key>[^/]+)/?(?P<resource>comment|transitions|attachments)?$")
+
+    def __init__(self, project="TEST", latency=0):
+        self.project = project
+        self.latency = latency
+        self.tickets = dict()
+        self.comments = dict()
+        self.requests = []
+        self.connections = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%s" % self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def create(self, key=None, **fields):
+        with self._lock:
+            key = key or "%s-%s" % (self.project, len(self.tickets) + 1)
+            self.tickets[key] = dict({"labels": [], "description": "", "status": {"name": "Open"}}, **fields)
+            self.comments[key] = []
+        return key
+
+    def reset_requests(self):
+        with self._lock:
+            self.requests = []
+
+    def calls(self, method=None):
+        return [r for r in self.requests if method is None or r[0] == method]
+
+    def _handler(self):
+        jira = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with jira._lock:
+                    jira.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PUT(self):
+                self._handle("PUT")
+
+            def _handle(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    body = {}
+                path = self.path.split("?")[0]
+                with jira._lock:
+                    jira.requests.append((method, path, body))
+                if jira.latency:
+                    threading.Event().wait(jira.latency)
+                status, response = jira._dispatch(method, path, body)
+                data = json.dumps(response).encode() if response is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _dispatch(self, method, path, body):
+        with self._lock:
+            if self.errors:
+                self.errors -= 1
+                return 503, {"errorMessages": ["Service Unavailable"]}
+        if path.rstrip("/") == "/rest/api/2/issue" and method == "POST":
+            key = self.create(**body.get("fields", {}))
+            return 201, {"id": key.split("-")[-1], "key": key, "self": self.url + path + "/" + key}
+        match = self.ISSUE.match(path)
+        if not match or match.group("key") not in self.tickets:
+            return 404, {"errorMessages": ["Issue does not exist"]}
+        key, resource = match.group("key"), match.group("resource")
+        with self._lock:
+            ticket = self.tickets[key]
+            if resource is None and method == "GET":
+                return 200, {"key": key, "fields": json.loads(json.dumps(ticket))}
+            if resource is None and method == "PUT":
+                ticket.update(body.get("fields", {}))
+                return 204, None
+            if resource == "comment" and method == "POST":
+                self.comments[key].append(body.get("body"))
+                return 201, {"body": body.get("body")}
+            if resource == "comment" and method == "GET":
+                return 200, {"comments": [{"body": comment} for comment in self.comments[key]]}
+            if resource == "transitions" and method == "GET":
+                return 200, {"transitions": []}
+        return 405, None
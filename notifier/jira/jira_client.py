@@ -1,8 +1,10 @@
 import json
 import enum
+import functools
 import requests
 from urllib.parse import urljoin
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
 
@@ -16,11 +18,17 @@ class JiraClient(object):
         TRANSITION = "/rest/api/2/issue/%s/transitions"
         ATTACHMENT = "/rest/api/2/issue/%s/attachments"
 
-    def __init__(self, url, username, password, project):
+    def __init__(self, url, username, password, project, pool_size=10):
         self.username = username
         self.password = password
         self.url = url
         self.project = project
+        # Keep-alive connections reused by every call of the client
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(self.username, self.password)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def search_tickets(self, project_id):
         """
@@ -91,6 +99,15 @@ class JiraClient(object):
         body = {"fields": {"labels": labels}}
         return self._put(update_url, body)
 
+    def update_fields(self, ticket_id, fields):
+        """
+        Update several fields of a ticket with one request
+        :param fields: {"labels": [...], "description": "...", ...}
+        """
+        update_url = self.JiraEndpoints.UPDATE.value % ticket_id
+        body = {"fields": fields}
+        return self._put(update_url, body)
+
     def update_status(self, ticket_id, status_id):
         update_status_url = self.JiraEndpoints.TRANSITION.value % ticket_id
         body = {"transition": {"id": status_id}}
@@ -146,44 +163,39 @@ class JiraClient(object):
     def parse_ticket_id(ticket_body):
         return ticket_body["key"]
 
-    def _get(self, url, params={}, headers={}):
-        default_headers = {"content-type": "application/json"}
-        headers.update(default_headers)
-        response = requests.get(
-            urljoin(self.url, url), auth=HTTPBasicAuth(self.username, self.password), params=params, headers=headers
-        )
+    def _get(self, url, params=None, headers=None):
+        headers = dict(headers or {}, **{"content-type": "application/json"})
+        response = self.session.get(urljoin(self.url, url), params=params or {}, headers=headers)
         return response
 
-    def _post(self, url, body, params={}, headers={}, files={}):
+    def _post(self, url, body, params=None, headers=None, files=None):
         if files:
-            response = requests.post(
-                urljoin(self.url, url),
-                auth=HTTPBasicAuth(self.username, self.password),
-                params=params,
-                headers=headers,
-                files=files,
-            )
+            response = self.session.post(urljoin(self.url, url), params=params or {}, headers=headers, files=files)
             return response
         else:
-            default_headers = {"content-type": "application/json"}
-            headers.update(default_headers)
-            response = requests.post(
+            headers = dict(headers or {}, **{"content-type": "application/json"})
+            response = self.session.post(
                 urljoin(self.url, url),
-                auth=HTTPBasicAuth(self.username, self.password),
                 data=json.dumps(body),
-                params=params,
+                params=params or {},
                 headers=headers,
             )
             return response
 
-    def _put(self, url, body, params={}, headers={}):
-        default_headers = {"content-type": "application/json"}
-        headers.update(default_headers)
-        response = requests.put(
+    def _put(self, url, body, params=None, headers=None):
+        headers = dict(headers or {}, **{"content-type": "application/json"})
+        response = self.session.put(
             urljoin(self.url, url),
-            auth=HTTPBasicAuth(self.username, self.password),
             data=json.dumps(body),
-            params=params,
+            params=params or {},
             headers=headers,
         )
         return response
+
+
+@functools.lru_cache(maxsize=None)
+def jira_client(project):
+    """
+    JiraClient of a project shared by the handlers of a worker process, so its connections are reused between tasks
+    """
+    return JiraClient(settings.JIRA_URL, settings.JIRA_USERNAME, settings.JIRA_PASSWORD, project)
@@ -1,6 +1,9 @@
+import time
 import logging
 from celery import shared_task
 from django.conf import settings
+from django.core.cache import cache
+from lib.memcache_lock import memcache_task_lock
 from file_system.repository import FileRepository
 from notifier.models import JobGroupNotifier, Notifier, JobGroup
 from notifier.event_handler.jira_event_handler.jira_event_handler import JiraEventHandler
@@ -11,6 +14,14 @@ from notifier.event_handler.email_event_handler.email_event_handler import Email
 logger = logging.getLogger(__name__)
 
 
+SEQUENCE_KEY = "notifier_buffer_%s_sequence"
+FLUSHED_KEY = "notifier_buffer_%s_flushed"
+EVENT_KEY = "notifier_buffer_%s_%s"
+SCHEDULED_KEY = "notifier_buffer_%s_scheduled"
+FLUSH_LOCK_KEY = "notifier_buffer_%s_lock"
+FAILURES_KEY = "notifier_buffer_%s_%s_failures"
+
+
 def event_handler(job_group_notifier):
     try:
         jgn = JobGroupNotifier.objects.get(id=job_group_notifier)
@@ -70,6 +81,156 @@ def send_notification(event):
     if settings.NOTIFIER_ACTIVE:
         logger.info(event)
         eh = event_handler(event["job_notifier"])
+        if settings.NOTIFIER_COALESCE_WINDOW and isinstance(eh, JiraEventHandler):
+            coalesce = eh.can_coalesce(event)
+            if buffer_notification(event, coalesce):
+                if not coalesce:
+                    # Sent right after the buffered events before it
+                    _flush_notifications(str(event["job_notifier"]), eh)
+                return
         eh.process(event)
     else:
         logger.info("Notifier Inactive")
+
+
+def buffer_notification(event, coalesce=True):
+    """
+    Store the event to be sent by flush_notifications together with the other events of its ticket which arrive
+    in the next NOTIFIER_COALESCE_WINDOW seconds.
+    Events of a JobGroupNotifier are numbered with a cache counter, flush_notifications sends the events between
+    the last one it sent and the counter, in that order.
+    :param coalesce: False for events which can't be merged with others. They are buffered only if events
+    sent before them are still in the buffer, so they don't overtake them
+    :return: False if the event wasn't buffered and has to be sent now
+    """
+    job_notifier = str(event["job_notifier"])
+    if not coalesce and (cache.get(SEQUENCE_KEY % job_notifier) or 0) <= (cache.get(FLUSHED_KEY % job_notifier) or 0):
+        return False
+    cache.add(SEQUENCE_KEY % job_notifier, 0, None)
+    try:
+        sequence = cache.incr(SEQUENCE_KEY % job_notifier)
+    except ValueError:
+        # counter evicted between add and incr
+        return False
+    cache.set(EVENT_KEY % (job_notifier, sequence), {"event": event, "queued": time.time()}, None)
+    _schedule_flush(job_notifier)
+    return True
+
+
+def _schedule_flush(job_notifier, retry=False):
+    if cache.add(SCHEDULED_KEY % job_notifier, 1, settings.NOTIFIER_COALESCE_WINDOW * 10):
+        flush_notifications.apply_async(args=[job_notifier, retry], countdown=settings.NOTIFIER_COALESCE_WINDOW)
+
+
+@shared_task
+def flush_notifications(job_notifier, retry=False):
+    if _flush_notifications(job_notifier, event_handler(job_notifier), skip_missing=retry) is None:
+        # Events buffered while the other flush runs may have been scheduled with this task
+        flush_notifications.apply_async(args=[job_notifier, retry], countdown=settings.NOTIFIER_COALESCE_WINDOW)
+
+
+def _flush_notifications(job_notifier, eh, skip_missing=False):
+    """
+    Send buffered events of a JobGroupNotifier in order. Consecutive events which can be merged are sent with
+    JiraEventHandler.process_batch, the others one by one with process.
+    A batch which fails stays in the buffer and is sent again by the next flush. After NOTIFIER_FLUSH_RETRIES
+    failures its events are sent one by one, so a bad event is the only one lost. When events are left in the
+    buffer another flush is scheduled.
+    :param skip_missing: skip numbers whose event is not in the cache. Otherwise, the flush stops at the first one,
+    it can be an event whose sender incremented the counter and didn't store it yet
+    :return: True if the buffer was emptied, False if some events were left in it and None if another flush
+    of the JobGroupNotifier is running
+    """
+    with memcache_task_lock(FLUSH_LOCK_KEY % job_notifier, job_notifier) as acquired:
+        if not acquired:
+            return None
+        cache.delete(SCHEDULED_KEY % job_notifier)
+        sequence = cache.get(SEQUENCE_KEY % job_notifier) or 0
+        flushed = cache.get(FLUSHED_KEY % job_notifier) or 0
+        if sequence < flushed:
+            # counter was evicted and started again
+            flushed = 0
+        if sequence == flushed:
+            return True
+
+        numbers = list(range(flushed + 1, sequence + 1))
+        buffered = cache.get_many([EVENT_KEY % (job_notifier, number) for number in numbers])
+        entries = []
+        for number in numbers:
+            entry = buffered.get(EVENT_KEY % (job_notifier, number))
+            if entry is None and not skip_missing:
+                break
+            if entry is None:
+                logger.warning("Buffered event %s of %s was lost", number, job_notifier)
+            entries.append((number, entry))
+
+        start = time.time()
+        sent = []
+        calls = 0
+        for batch in _batches(eh, entries):
+            try:
+                calls += _send_batch(job_notifier, eh, batch)
+            except Exception as e:
+                logger.error("Failed to send %s events of %s with error %s", len(batch), job_notifier, str(e))
+                break
+            sent.extend(batch)
+            cache.set(FLUSHED_KEY % job_notifier, flushed + len(sent), None)
+            cache.delete_many([EVENT_KEY % (job_notifier, number) for number, _ in batch])
+        if sent:
+            now = time.time()
+            events = [entry for _, entry in sent if entry is not None]
+            logger.info(
+                "Sent %s events of %s with %s JIRA calls in %.2fs (%.1f events/s), oldest event waited %.2fs",
+                len(events),
+                job_notifier,
+                calls,
+                now - start,
+                len(events) / max(now - start, 0.001),
+                now - min([entry["queued"] for entry in events] or [now]),
+            )
+        if len(sent) < len(numbers):
+            _schedule_flush(job_notifier, retry=True)
+            return False
+        return True
+
+
+def _batches(eh, entries):
+    """
+    Split buffered (number, entry) pairs into runs of events which can be merged, lost events are batches of
+    their own and events which can't be merged are sent alone
+    """
+    batch = []
+    for number, entry in entries:
+        if entry is not None and eh.can_coalesce(entry["event"]):
+            batch.append((number, entry))
+            continue
+        if batch:
+            yield batch
+            batch = []
+        yield [(number, entry)]
+    if batch:
+        yield batch
+
+
+def _send_batch(job_notifier, eh, batch):
+    events = [entry["event"] for _, entry in batch if entry is not None]
+    if not events:
+        return 0
+    if not eh.can_coalesce(events[0]):
+        # process logs and drops a failing event like send_notification does
+        eh.process(events[0])
+        return 1
+    failures_key = FAILURES_KEY % (job_notifier, batch[0][0])
+    try:
+        calls = eh.process_batch(events)
+    except Exception:
+        failures = cache.get(failures_key, 0) + 1
+        if failures < settings.NOTIFIER_FLUSH_RETRIES:
+            cache.set(failures_key, failures, None)
+            raise
+        logger.error("Sending %s events of %s one by one after %s failures", len(events), job_notifier, failures)
+        for event in events:
+            eh.process(event)
+        calls = len(events)
+    cache.delete(failures_key)
+    return calls
@@ -3,10 +3,25 @@ import uuid
 from mock import patch
 from django.conf import settings
 from rest_framework import status
+from django.test import TestCase
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import User
-from notifier.helper import get_emails_to_notify
+from notifier.helper import get_emails_to_notify, get_gene_panel, get_number_of_tumor_samples, get_samples
+from file_system.helper.request_summary import get_request_summary
 from notifier.models import JobGroup, JobGroupNotifier, Notifier, JiraStatus
+from notifier.events import (
+    SetLabelEvent,
+    OperatorErrorEvent,
+    SetCIReviewEvent,
+    RedeliveryUpdateEvent,
+    SetPipelineFieldEvent,
+    AddPipelineToDescriptionEvent,
+)
+from notifier.jira.jira_client import JiraClient, jira_client
+from notifier.jira.fake_jira_server import FakeJiraServer
+from notifier.event_handler.jira_event_handler.jira_event_handler import JiraEventHandler
+from notifier.tasks import send_notification, flush_notifications, FLUSH_LOCK_KEY
 from file_system.models import File, FileMetadata, FileGroup, FileType, Storage, StorageType
 
 
@@ -232,3 +247,182 @@ class JobGroupAPITest(APITestCase):
             emails = get_emails_to_notify("REQUEST_001", "VoyagerIsProcessingPartialRequestEvent")
             self.assertEqual(len(emails), 1)
             self.assertListEqual(emails, ["me@mskcc.org"])
+
+    @patch("file_system.tasks.populate_job_group_notifier_metadata.delay")
+    def test_request_summary_is_cached_until_metadata_changes(self, populate_job_group_notifier_metadata):
+        populate_job_group_notifier_metadata.return_value = True
+        file_1 = self._create_single_file(
+            "/path/to/file_1.fastq", "fastq", str(self.file_group.id), "REQUEST_002", "SAMPLE_001"
+        )
+        self._create_single_file("/path/to/file_2.fastq", "fastq", str(self.file_group.id), "REQUEST_002", "SAMPLE_002")
+        with self.assertNumQueries(1):
+            self.assertEqual(get_samples("REQUEST_002"), ["SAMPLE_001", "SAMPLE_002"])
+            self.assertIsNone(get_gene_panel("REQUEST_002"))
+            self.assertEqual(get_number_of_tumor_samples("REQUEST_002"), 0)
+        FileMetadata.objects.create_or_update(
+            file=file_1.id,
+            metadata={settings.RECIPE_METADATA_KEY: "IMPACT505", settings.TUMOR_OR_NORMAL_METADATA_KEY: "Tumor"},
+            user=None,
+        )
+        self.assertEqual(get_gene_panel("REQUEST_002"), "IMPACT505")
+        self.assertEqual(get_number_of_tumor_samples("REQUEST_002"), 1)
+
+    @patch("file_system.tasks.populate_job_group_notifier_metadata.delay")
+    def test_request_summary_is_invalidated_when_files_leave_request(self, populate_job_group_notifier_metadata):
+        populate_job_group_notifier_metadata.return_value = True
+        file_1 = self._create_single_file(
+            "/path/to/file_1.fastq", "fastq", str(self.file_group.id), "REQUEST_002", "SAMPLE_001"
+        )
+        file_2 = self._create_single_file(
+            "/path/to/file_2.fastq", "fastq", str(self.file_group.id), "REQUEST_002", "SAMPLE_002"
+        )
+        self.assertEqual(get_samples("REQUEST_002"), ["SAMPLE_001", "SAMPLE_002"])
+        FileMetadata.objects.create_or_update(
+            file=file_1.id, metadata={settings.REQUEST_ID_METADATA_KEY: "REQUEST_003"}, user=None
+        )
+        self.assertEqual(get_samples("REQUEST_002"), ["SAMPLE_002"])
+        self.assertEqual(get_samples("REQUEST_003"), ["SAMPLE_001"])
+        file_2.delete()
+        self.assertEqual(get_samples("REQUEST_002"), [])
+
+    @patch("file_system.tasks.populate_job_group_notifier_metadata.delay")
+    def test_request_summary_is_invalidated_after_commit(self, populate_job_group_notifier_metadata):
+        populate_job_group_notifier_metadata.return_value = True
+        file_1 = self._create_single_file(
+            "/path/to/file_1.fastq", "fastq", str(self.file_group.id), "REQUEST_004", "SAMPLE_001"
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            self._create_single_file(
+                "/path/to/file_2.fastq", "fastq", str(self.file_group.id), "REQUEST_004", "SAMPLE_002"
+            )
+            file_1.delete()
+            self.assertEqual(get_samples("REQUEST_004"), ["SAMPLE_002"])
+            # Another worker reads the request before the commit and caches its old samples
+            stale = get_request_summary("REQUEST_004")._replace(samples=["SAMPLE_001"])
+            cache.set("request_summary_REQUEST_004", stale._asdict())
+            self.assertEqual(get_samples("REQUEST_004"), ["SAMPLE_001"])
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_samples("REQUEST_004"), ["SAMPLE_002"])
+
+
+class NotifierCoalescingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        jira_client.cache_clear()
+        self.jira = FakeJiraServer().start()
+        self.jira_id = self.jira.create(labels=["existing"], description="| Pipeline | Version | Link |\n")
+        self.notifier = Notifier.objects.create(notifier_type="JIRA", default=True, board="TEST")
+        self.job_group_notifier = JobGroupNotifier.objects.create(
+            jira_id=self.jira_id, job_group=JobGroup.objects.create(), notifier_type=self.notifier
+        )
+        self.job_notifier = str(self.job_group_notifier.id)
+        self.settings_override = self.settings(JIRA_URL=self.jira.url, NOTIFIER_COALESCE_WINDOW=10)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.jira.stop()
+        jira_client.cache_clear()
+
+    def _send(self, *events):
+        for event in events:
+            send_notification(event.to_dict())
+
+    @patch("notifier.tasks.flush_notifications.apply_async")
+    def test_events_are_sent_together(self, apply_async):
+        self._send(
+            SetLabelEvent(self.job_notifier, "cmo_label"),
+            AddPipelineToDescriptionEvent(self.job_notifier, "argos", "1.0.0", "https://github.com/argos"),
+            OperatorErrorEvent(self.job_notifier, "Missing normal"),
+            SetLabelEvent(self.job_notifier, "existing"),
+            SetPipelineFieldEvent(self.job_notifier, "argos"),
+            RedeliveryUpdateEvent(self.job_notifier, "Sample redelivered"),
+            AddPipelineToDescriptionEvent(self.job_notifier, "argos", "1.0.0", "https://github.com/argos"),
+        )
+        self.assertEqual(self.jira.requests, [])
+        apply_async.assert_called_once_with(args=[self.job_notifier, False], countdown=10)
+
+        flush_notifications(self.job_notifier)
+        self.assertEqual(len(self.jira.calls("GET")), 1)
+        self.assertEqual(len(self.jira.calls("PUT")), 1)
+        self.assertEqual(len(self.jira.calls("POST")), 1)
+        self.assertEqual(self.jira.connections, 1)
+        ticket = self.jira.tickets[self.jira_id]
+        self.assertEqual(ticket["labels"], ["existing", "cmo_label"])
+        self.assertEqual(ticket["description"].count("| argos | 1.0.0 |"), 1)
+        self.assertEqual(ticket[settings.JIRA_PIPELINE_FIELD_ID], "argos")
+        self.assertEqual(len(self.jira.comments[self.jira_id]), 1)
+        self.assertIn("Missing normal", self.jira.comments[self.jira_id][0])
+        self.assertIn("Sample redelivered", self.jira.comments[self.jira_id][0])
+
+        self.jira.reset_requests()
+        flush_notifications(self.job_notifier)
+        self.assertEqual(self.jira.requests, [])
+
+    @patch("notifier.tasks.flush_notifications.apply_async")
+    def test_buffered_events_are_sent_before_other_events(self, apply_async):
+        self._send(RedeliveryUpdateEvent(self.job_notifier, "Sample redelivered"), SetCIReviewEvent(self.job_notifier))
+        self.assertEqual(self.jira.requests[0][0], "POST")
+        self.assertTrue(self.jira.requests[0][1].endswith("/comment"))
+        self.assertEqual(self.jira.requests[1][0], "GET")
+        self.assertTrue(self.jira.requests[1][1].endswith("/transitions"))
+
+    @patch("notifier.tasks.flush_notifications.apply_async")
+    def test_events_are_sent_after_other_events_while_flush_runs(self, apply_async):
+        self._send(RedeliveryUpdateEvent(self.job_notifier, "Sample redelivered"))
+        cache.add(FLUSH_LOCK_KEY % self.job_notifier, "other worker")
+        self._send(SetCIReviewEvent(self.job_notifier))
+        self.assertEqual(self.jira.requests, [])
+
+        cache.delete(FLUSH_LOCK_KEY % self.job_notifier)
+        flush_notifications(self.job_notifier)
+        self.assertTrue(self.jira.requests[0][1].endswith("/comment"))
+        self.assertTrue(self.jira.requests[1][1].endswith("/transitions"))
+
+    @patch("notifier.tasks.flush_notifications.apply_async")
+    def test_failed_events_are_sent_again(self, apply_async):
+        self._send(
+            SetLabelEvent(self.job_notifier, "cmo_label"),
+            RedeliveryUpdateEvent(self.job_notifier, "Sample redelivered"),
+        )
+        self.jira.errors = 1
+        flush_notifications(self.job_notifier)
+        self.assertEqual(self.jira.tickets[self.jira_id]["labels"], ["existing"])
+        apply_async.assert_called_with(args=[self.job_notifier, True], countdown=10)
+
+        flush_notifications(self.job_notifier, True)
+        self.assertEqual(self.jira.tickets[self.jira_id]["labels"], ["existing", "cmo_label"])
+        self.assertEqual(len(self.jira.comments[self.jira_id]), 1)
+        self.assertIn("Sample redelivered", self.jira.comments[self.jira_id][0])
+
+        self.jira.reset_requests()
+        flush_notifications(self.job_notifier)
+        self.assertEqual(self.jira.requests, [])
+
+    @patch("notifier.tasks.flush_notifications.apply_async")
+    @patch.object(JiraEventHandler, "process_batch", side_effect=Exception("JIRA unavailable"))
+    def test_events_are_sent_one_by_one_after_retries(self, process_batch, apply_async):
+        self._send(SetLabelEvent(self.job_notifier, "first"), SetLabelEvent(self.job_notifier, "second"))
+        with self.settings(NOTIFIER_FLUSH_RETRIES=2):
+            flush_notifications(self.job_notifier)
+            self.assertEqual(self.jira.requests, [])
+            flush_notifications(self.job_notifier, True)
+        self.assertEqual(process_batch.call_count, 2)
+        self.assertEqual(self.jira.tickets[self.jira_id]["labels"], ["existing", "first", "second"])
+
+    @patch("notifier.tasks.flush_notifications.apply_async")
+    def test_events_are_sent_one_by_one_without_window(self, apply_async):
+        with self.settings(NOTIFIER_COALESCE_WINDOW=0):
+            self._send(SetLabelEvent(self.job_notifier, "first"), SetLabelEvent(self.job_notifier, "second"))
+        apply_async.assert_not_called()
+        self.assertEqual(len(self.jira.calls("PUT")), 2)
+        self.assertEqual(self.jira.tickets[self.jira_id]["labels"], ["existing", "first", "second"])
+
+    def test_client_reuses_connections(self):
+        client = JiraClient(self.jira.url, "username", "password", "TEST")
+        for i in range(5):
+            client.comment(self.jira_id, "comment %s" % i)
+        self.assertEqual(self.jira.connections, 1)
+        self.assertEqual(len(self.jira.comments[self.jira_id]), 5)
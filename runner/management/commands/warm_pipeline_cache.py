@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from runner.models import Pipeline
+from runner.pipeline.pipeline_cache import PipelineCache
+
+
+class Command(BaseCommand):
+    help = "Resolve default pipelines into the pipeline cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Resolve all pipelines, not only the default ones")
+        parser.add_argument("--refresh", action="store_true", help="Drop stored definitions and resolve again")
+
+    def handle(self, *args, **options):
+        pipelines = Pipeline.objects.all() if options["all"] else Pipeline.objects.filter(default=True)
+        for pipeline in pipelines.order_by("name"):
+            if options["refresh"]:
+                PipelineCache.invalidate(pipeline)
+            try:
+                PipelineCache.get_pipeline(pipeline)
+                print(f"Cached {pipeline.name} {pipeline.version}")
+            except Exception as e:
+                print(f"Failed to resolve {pipeline.name} {pipeline.version}: {e}")
+        print(f"Pipeline cache metrics: {PipelineCache.metrics()}")
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("runner", "0067_auto_20250731_1801"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="run",
+            name="execution_etag",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("runner", "0068_run_execution_etag"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResolvedPipeline",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid1, editable=False, primary_key=True, serialize=False)),
+                ("created_date", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("modified_date", models.DateTimeField(auto_now=True)),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("pipeline_type", models.IntegerField(choices=[(0, "CWL"), (1, "NEXTFLOW")])),
+                ("github", models.CharField(max_length=300)),
+                ("version", models.CharField(max_length=100)),
+                ("entrypoint", models.CharField(max_length=100)),
+                ("nfcore_template", models.BooleanField(default=False)),
+                ("app", models.JSONField()),
+                ("resolve_time", models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
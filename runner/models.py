@@ -97,6 +97,27 @@ class Pipeline(BaseModel):
         return "{}".format(self.name)
 
 
+class ResolvedPipeline(BaseModel):
+    """
+    Packed pipeline definition, addressed by the hash of (pipeline_type, github, version, entrypoint,
+    nfcore_template)
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    pipeline_type = models.IntegerField(choices=[(pt.value, pt.name) for pt in ProtocolType])
+    github = models.CharField(max_length=300)
+    version = models.CharField(max_length=100)
+    entrypoint = models.CharField(max_length=100)
+    nfcore_template = models.BooleanField(default=False)
+    app = JSONField()
+    resolve_time = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        return "{github}@{version}:{entrypoint}".format(
+            github=self.github, version=self.version, entrypoint=self.entrypoint
+        )
+
+
 class OperatorTrigger(BaseModel):
     from_operator = models.ForeignKey(Operator, null=True, on_delete=models.SET_NULL, related_name="from_triggers")
     to_operator = models.ForeignKey(Operator, null=True, on_delete=models.SET_NULL, related_name="to_triggers")
@@ -217,6 +238,7 @@ class Run(BaseModel):
     app = models.ForeignKey(Pipeline, null=True, on_delete=models.SET_NULL)
     status = models.IntegerField(choices=[(status.value, status.name) for status in RunStatus], db_index=True)
     execution_id = models.UUIDField(null=True, blank=True)
+    execution_etag = models.CharField(max_length=64, null=True, blank=True)
     job_statuses = JSONField(default=dict, blank=True)
     message = JSONField(default=dict, blank=True, null=True)
     output_metadata = JSONField(default=dict, blank=True, null=True)
@@ -248,7 +270,7 @@ class Run(BaseModel):
         return str(self.pk)
 
     def clear(self):
-        fields_to_clear = ["resume", "finished_date", "started", "output_directory", "execution_id"]
+        fields_to_clear = ["resume", "finished_date", "started", "output_directory", "execution_id", "execution_etag"]
         for f in fields_to_clear:
             setattr(self, f, None)
 
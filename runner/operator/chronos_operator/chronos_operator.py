@@ -10,6 +10,7 @@ from runner.operator.operator import Operator
 from runner.models import Pipeline
 from notifier.models import JobGroup
 from file_system.repository.file_repository import FileRepository
+from runner.operator.helper import cohort_files_query, group_files_by_patient
 import runner.operator.chronos_operator.bin.tempo_patient as patient_obj
 from notifier.events import OperatorRequestEvent, ChronosMissingSamplesEvent
 from notifier.tasks import send_notification
@@ -23,59 +24,18 @@ class ChronosOperator(Operator):
     CHRONOS_NAME = "chronos"
     CHRONOS_VERSION = "0.1.0"
 
-    def build_recipe_query(self):
-        """
-        Build complex Q object assay query from given data
-        Only does OR queries, as seen in line
-           query |= item
-        Very similar to build_assay_query, but "metadata__recipe"
-        can't be sent as a value, so had to make a semi-redundant function
-        """
-        data = self.get_recipes()
-        data_query_set = [Q(("metadata__{}".format(settings.RECIPE_METADATA_KEY), value)) for value in set(data)]
-        query = data_query_set.pop()
-        for item in data_query_set:
-            query |= item
-        return query
-
-    def build_assay_query(self):
-        """
-        Build complex Q object assay query from given data
-        Only does OR queries, as seen in line
-           query |= item
-        Very similar to build_recipe_query, but "metadata__baitSet"
-        can't be sent as a value, so had to make a semi-redundant function
-        """
-        data = self.get_assays()
-        data_query_set = [Q(metadata__baitSet=value) for value in set(data)]
-        query = data_query_set.pop()
-        for item in data_query_set:
-            query |= item
-        return query
-
-    def filter_out_missing_fields_query(self):
-        """
-        This is for legacy purposes - if FileMetadata don't contain sampleTy[e or ciTag,
-        remove them from the file set
-        """
-        query = Q(("metadata__{}__isnull".format(settings.CMO_SAMPLE_TAG_METADATA_KEY), False)) & Q(
-            ("metadata__{}__isnull".format(settings.CMO_SAMPLE_CLASS_METADATA_KEY), False)
-        )
-        return query
-
     def get_jobs(self, pairing_override=None):
         LOGGER.info("Operator JobGroupNotifer ID %s", self.job_group_notifier_id)
         app = self.get_pipeline_id()
         pipeline = Pipeline.objects.get(id=app)
         output_directory = pipeline.output_directory
         self.OUTPUT_DIR = output_directory
-        recipe_query = self.build_recipe_query()
-        assay_query = self.build_assay_query()
-        igocomplete_query = Q(metadata__igoComplete=True)
-        missing_fields_query = self.filter_out_missing_fields_query()
-        q = recipe_query & assay_query & igocomplete_query & missing_fields_query
-        tempo_files = FileRepository.filter(queryset=FileRepository.all(), q=q, file_group=self.file_group)
-        tempo_files = FileRepository.filter(queryset=tempo_files, filter_redact=True)
+        q = cohort_files_query(
+            self.get_recipes(),
+            self.get_assays(),
+            [settings.CMO_SAMPLE_TAG_METADATA_KEY, settings.CMO_SAMPLE_CLASS_METADATA_KEY],
+        )
+        tempo_files = FileRepository.filter(filter_redact=True).filter(q)
 
         self.send_message(
             """
@@ -106,18 +66,7 @@ class ChronosOperator(Operator):
                     tumor_id = tumor_samples[i]
                     normal_id = normal_samples[i]
                     pre_pairing[tumor_id] = normal_id
-        patient_ids = set()
-        patient_files = dict()
-        no_patient_samples = list()
-        for entry in tempo_files:
-            patient_id = entry.metadata[settings.PATIENT_ID_METADATA_KEY]
-            if patient_id:
-                patient_ids.add(patient_id)
-                if patient_id not in patient_files:
-                    patient_files[patient_id] = list()
-                patient_files[patient_id].append(entry)
-            else:
-                no_patient_samples.append(entry)
+        patient_files, _ = group_files_by_patient(tempo_files)
 
         self.patients = dict()
         self.non_cmo_patients = dict()
@@ -1,7 +1,10 @@
 import os
 import re
+import time
 import logging
+from ddtrace.trace import tracer
 from django.conf import settings
+from django.db.models import Q
 from file_system.repository.file_repository import FileRepository
 
 
@@ -176,3 +179,55 @@ def pair_samples(fastqs):
                     sample_name = fastq["metadata"]["cmoSampleName"]
                     raise Exception(f"Improper pairing for: {sample_name}")
     return sample_pairs
+
+
+def cohort_files_query(recipes, assays, required_keys):
+    """
+    Q selecting igoComplete files of the given recipes and bait sets. Recipe, bait set and igoComplete
+    are answered from the indexed FileMetadataProjection columns, which always point to the latest
+    FileMetadata of a file.
+
+    Parameters:
+        recipes (list): recipes (genePanel) to include
+        assays (list): bait sets to include
+        required_keys (list): metadata keys which have to be set
+
+    Returns:
+        Q: query for a FileMetadata queryset
+    """
+    query = Q(
+        projection__recipe__in=set(recipes),
+        projection__bait_set__in=set(assays),
+        projection__igo_complete=True,
+    )
+    for key in required_keys:
+        query &= Q(**{f"metadata__{key}__isnull": False})
+    return query
+
+
+def group_files_by_patient(files):
+    """
+    Group FileMetadata by patient id, reading the files with their File in one pass.
+
+    Parameters:
+        files (QuerySet): FileMetadata queryset
+
+    Returns:
+        tuple: dict patient_id -> list of FileMetadata, list of FileMetadata without a patient id
+    """
+    start = time.perf_counter()
+    patient_files = dict()
+    no_patient_files = list()
+    with tracer.trace("operator.group_files_by_patient", service="beagle") as span:
+        for entry in files.select_related("file").iterator(chunk_size=2000):
+            patient_id = entry.metadata.get(settings.PATIENT_ID_METADATA_KEY)
+            if patient_id:
+                patient_files.setdefault(patient_id, list()).append(entry)
+            else:
+                no_patient_files.append(entry)
+        span.set_tag("patients", len(patient_files))
+    LOGGER.info(
+        "Grouped files of %s patients in %.2fs, %s files without patient id"
+        % (len(patient_files), time.perf_counter() - start, len(no_patient_files))
+    )
+    return patient_files, no_patient_files
@@ -1,33 +1,160 @@
+import re
+import json
+import time
+import hashlib
+import logging
+from django.conf import settings
 from django.core.cache import cache
-from runner.models import ProtocolType
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.utils import timezone
+from django.db import IntegrityError, transaction
+from ddtrace.trace import tracer
+from runner.models import ProtocolType, ResolvedPipeline
 from runner.pipeline.cwl.cwl_resolver import CWLResolver
 from runner.pipeline.nextflow import NextflowResolver
 
 
 class PipelineCache(object):
+    """
+    Packed pipeline definitions are looked up in memcache, then in the ResolvedPipeline store.
+    On a miss only one worker resolves a given (github, version, entrypoint), the others wait
+    for it to land in the store.
+    Versions which are release tags or commits are kept until refreshed, branches are resolved again
+    after PIPELINE_CACHE_BRANCH_TTL seconds to pick up new commits.
+    """
+
+    logger = logging.getLogger(__name__)
+    LOCK_TIMEOUT = 60 * 10
+    WAIT_INTERVAL = 2
+    METRICS = ("hit", "store_hit", "miss", "resolved", "resolve_ms")
+    IMMUTABLE_VERSION = re.compile(r"^(v?\d+(\.\d+)+([-+][\w.]+)?|[0-9a-f]{7,40})$")
+
     @staticmethod
     def get_pipeline(pipeline):
-        _pipeline = cache.get(pipeline.id)
-        if _pipeline and (
-            _pipeline.get("github") == pipeline.github
-            and _pipeline.get("entrypoint") == pipeline.entrypoint
-            and _pipeline.get("version") == pipeline.version
-        ):
-            resolved_dict = _pipeline.get("app")
-        else:
-            resolver_class = PipelineCache._get_pipeline_resolver(pipeline.pipeline_type)
-            resolver = resolver_class(pipeline.github, pipeline.entrypoint, pipeline.version, pipeline.nfcore_template)
+        key = PipelineCache.key(pipeline)
+        resolved_dict = cache.get(PipelineCache._cache_key(key))
+        if resolved_dict is not None:
+            PipelineCache._count("hit")
+            return resolved_dict
+        resolved_dict = PipelineCache._from_store(key, PipelineCache.ttl(pipeline))
+        if resolved_dict is not None:
+            PipelineCache._count("store_hit")
+            return resolved_dict
+        PipelineCache._count("miss")
+        return PipelineCache._resolve_single_flight(pipeline, key)
+
+    @staticmethod
+    def invalidate(pipeline):
+        key = PipelineCache.key(pipeline)
+        ResolvedPipeline.objects.filter(key=key).delete()
+        cache.delete(PipelineCache._cache_key(key))
+
+    @staticmethod
+    def key(pipeline):
+        content = [
+            pipeline.pipeline_type,
+            pipeline.github,
+            pipeline.version,
+            pipeline.entrypoint,
+            bool(pipeline.nfcore_template),
+        ]
+        return hashlib.sha256(json.dumps(content).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def ttl(pipeline):
+        """
+        Seconds a resolved pipeline is used, None if its version can't move
+        """
+        if PipelineCache.IMMUTABLE_VERSION.match(pipeline.version or ""):
+            return None
+        return settings.PIPELINE_CACHE_BRANCH_TTL
+
+    @staticmethod
+    def metrics():
+        values = cache.get_many(["pipeline_cache_%s" % metric for metric in PipelineCache.METRICS])
+        return {metric: values.get("pipeline_cache_%s" % metric, 0) for metric in PipelineCache.METRICS}
+
+    @staticmethod
+    def _cache_key(key):
+        return "pipeline_app_%s" % key
+
+    @staticmethod
+    def _count(metric, value=1):
+        cache_key = "pipeline_cache_%s" % metric
+        cache.add(cache_key, 0, None)
+        try:
+            cache.incr(cache_key, value)
+        except ValueError:
+            cache.set(cache_key, value, None)
+
+    @staticmethod
+    def _from_store(key, ttl=None):
+        stored = ResolvedPipeline.objects.filter(key=key).values_list("app", "modified_date").first()
+        if stored is None:
+            return None
+        resolved_dict, modified_date = stored
+        timeout = DEFAULT_TIMEOUT
+        if ttl is not None:
+            timeout = ttl - (timezone.now() - modified_date).total_seconds()
+            if timeout <= 0:
+                return None
+        cache.set(PipelineCache._cache_key(key), resolved_dict, timeout)
+        return resolved_dict
+
+    @staticmethod
+    def _resolve_single_flight(pipeline, key):
+        lock_id = "pipeline_resolve_%s" % key
+        ttl = PipelineCache.ttl(pipeline)
+        deadline = time.monotonic() + PipelineCache.LOCK_TIMEOUT
+        while not cache.add(lock_id, 1, PipelineCache.LOCK_TIMEOUT):
+            PipelineCache.logger.info("Pipeline %s is resolved by another worker, waiting" % pipeline.pipeline_link)
+            time.sleep(PipelineCache.WAIT_INTERVAL)
+            resolved_dict = PipelineCache._from_store(key, ttl)
+            if resolved_dict is not None:
+                PipelineCache._count("store_hit")
+                return resolved_dict
+            if time.monotonic() > deadline:
+                PipelineCache.logger.warning("Timed out waiting for %s, resolving" % pipeline.pipeline_link)
+                return PipelineCache._resolve(pipeline, key)
+        try:
+            resolved_dict = PipelineCache._from_store(key, ttl)
+            if resolved_dict is not None:
+                return resolved_dict
+            return PipelineCache._resolve(pipeline, key)
+        finally:
+            cache.delete(lock_id)
+
+    @staticmethod
+    def _resolve(pipeline, key):
+        resolver_class = PipelineCache._get_pipeline_resolver(pipeline.pipeline_type)
+        resolver = resolver_class(pipeline.github, pipeline.entrypoint, pipeline.version, pipeline.nfcore_template)
+        start = time.perf_counter()
+        with tracer.trace("pipeline_cache.resolve", service="beagle") as span:
+            span.set_tag("pipeline", pipeline.pipeline_link)
             resolved_dict = resolver.resolve()
-            cache.set(
-                pipeline.id,
-                {
-                    "app": resolved_dict,
-                    "github": pipeline.github,
-                    "entrypoint": pipeline.entrypoint,
-                    "version": pipeline.version,
-                    "nfcore_template": pipeline.nfcore_template,
-                },
-            )
+        resolve_time = time.perf_counter() - start
+        PipelineCache._count("resolved")
+        PipelineCache._count("resolve_ms", int(resolve_time * 1000))
+        PipelineCache.logger.info("Resolved %s in %.2fs" % (pipeline.pipeline_link, resolve_time))
+        try:
+            with transaction.atomic():
+                # Replaces a branch resolved before its TTL expired
+                ResolvedPipeline.objects.update_or_create(
+                    key=key,
+                    defaults=dict(
+                        pipeline_type=pipeline.pipeline_type,
+                        github=pipeline.github,
+                        version=pipeline.version,
+                        entrypoint=pipeline.entrypoint,
+                        nfcore_template=bool(pipeline.nfcore_template),
+                        app=resolved_dict,
+                        resolve_time=resolve_time,
+                    ),
+                )
+        except IntegrityError:
+            PipelineCache.logger.info("Pipeline %s already stored" % pipeline.pipeline_link)
+        ttl = PipelineCache.ttl(pipeline)
+        cache.set(PipelineCache._cache_key(key), resolved_dict, DEFAULT_TIMEOUT if ttl is None else ttl)
         return resolved_dict
 
     @staticmethod
@@ -1,2 +1,88 @@
+import json
+import hashlib
+import logging
+import importlib
+import requests
+from django.conf import settings
+from django.utils.timezone import now
+
+
+logger = logging.getLogger(__name__)
+
+
 class ExecutorClient(object):
-    pass
+    """
+    Client used by check_jobs_status to fetch run statuses from the executor.
+
+    statuses() returns a tuple (jobs, cursor) where jobs maps execution_id to the status
+    payload and cursor is passed back as modified_after on the next poll, so that only
+    jobs which changed since the previous poll are returned.
+    """
+
+    @staticmethod
+    def get_client():
+        mod_name, class_name = settings.EXECUTOR_CLIENT.rsplit(".", 1)
+        mod = importlib.import_module(mod_name)
+        return getattr(mod, class_name)()
+
+    @staticmethod
+    def etag(status):
+        if status.get("etag"):
+            return status["etag"]
+        return hashlib.sha1(json.dumps(status, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def statuses(self, execution_ids, modified_after=None):
+        raise NotImplementedError
+
+
+class RidgebackClient(ExecutorClient):
+    def statuses(self, execution_ids, modified_after=None):
+        cursor = now().isoformat()
+        data = {"job_ids": [str(execution_id) for execution_id in execution_ids]}
+        if modified_after:
+            data["modified_after"] = modified_after
+        response = requests.post(settings.RIDGEBACK_URL + "/v0/jobs/statuses/", data=data)
+        if response.status_code == 200:
+            logger.info("Job statuses checked")
+            result = response.json()
+            return result["jobs"], result.get("cursor", cursor)
+        logger.error("Failed to fetch job statuses with status code: %s" % response.status_code)
+        return None, None
+
+
+class LocalExecutorClient(ExecutorClient):
+    """
+    In-memory stand-in for the executor used in tests
+    """
+
+    jobs = dict()
+    modified = dict()
+    counter = 0
+
+    @classmethod
+    def set_status(cls, execution_id, status, outputs=None, message=None, started=None, submitted=None):
+        cls.counter += 1
+        cls.jobs[str(execution_id)] = {
+            "status": status,
+            "outputs": outputs or {},
+            "message": message or {},
+            "started": started,
+            "submitted": submitted,
+            "commandlinetooljob_set": [],
+        }
+        cls.modified[str(execution_id)] = cls.counter
+
+    @classmethod
+    def reset(cls):
+        cls.jobs = dict()
+        cls.modified = dict()
+        cls.counter = 0
+
+    def statuses(self, execution_ids, modified_after=None):
+        modified_after = int(modified_after) if modified_after else 0
+        jobs = dict()
+        for execution_id in execution_ids:
+            execution_id = str(execution_id)
+            if execution_id in self.jobs and self.modified[execution_id] > modified_after:
+                jobs[execution_id] = dict(self.jobs[execution_id])
+        return jobs, str(self.counter)
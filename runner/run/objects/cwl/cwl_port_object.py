@@ -26,17 +26,35 @@ class CWLPortObject(PortObject):
         notify = notify
         return cls(run_id, name, port_type, schema, secondary_files, db_value, value, files, notify)
 
-    def ready(self):
+    def ready(self, file_map=None):
+        """
+        :param file_map: Files resolved up front with FileProcessor.get_file_objs. When not passed,
+        every location in the port is resolved here with a single query
+        """
         self.schema = SchemaProcessor.resolve_cwl_type(self.schema)
+        if file_map is None:
+            file_map = FileProcessor.get_file_objs(PortProcessor.collect_locations(self.value))
         files = []
         self.db_value = PortProcessor.process_files(
-            copy.deepcopy(self.value), PortAction.CONVERT_TO_BID, file_list=files
+            copy.deepcopy(self.value), PortAction.CONVERT_TO_BID, file_list=files, file_map=file_map
+        )
+        self.value = PortProcessor.process_files(
+            copy.deepcopy(self.value), PortAction.CONVERT_TO_PATH, file_map=file_map
         )
-        self.value = PortProcessor.process_files(copy.deepcopy(self.value), PortAction.CONVERT_TO_PATH)
         self.files = files
 
-    def complete(self, value, group, job_group_notifier, output_metadata={}, request_id=None, samples=[]):
+    def complete(
+        self, value, group, job_group_notifier, output_metadata={}, request_id=None, samples=[], file_map=None
+    ):
+        """
+        :param file_map: output Files registered up front with FileProcessor.register_files. When not
+        passed, the files of this port are registered here in bulk
+        """
         self.value = value
+        if file_map is None:
+            file_map = FileProcessor.register_files(
+                PortProcessor.collect_files(self.value), str(group.id), output_metadata, request_id, samples
+            )
         files = []
         self.db_value = PortProcessor.process_files(
             copy.deepcopy(self.value),
@@ -46,6 +64,7 @@ class CWLPortObject(PortObject):
             metadata=output_metadata,
             request_id=request_id,
             samples=samples,
+            file_map=file_map,
         )
         if self.notify:
             PortProcessor.process_files(
@@ -72,7 +91,12 @@ class CWLPortObject(PortObject):
             notify=port.notify,
         )
 
-    def to_db(self):
+    def _get_file_objs(self, file_map=None):
+        if file_map is None:
+            file_map = FileProcessor.get_file_objs(self.files)
+        return [FileProcessor.get_file_obj(uri, file_map) for uri in self.files]
+
+    def to_db(self, file_map=None):
         if self.port_object:
             self.port_object.name = self.name
             self.port_object.port_type = self.port_type
@@ -81,7 +105,7 @@ class CWLPortObject(PortObject):
             self.port_object.db_value = self.db_value
             self.port_object.value = self.value
             self.port_object.save()
-            self.port_object.files.set([FileProcessor.get_file_obj(v) for v in self.files])
+            self.port_object.files.set(self._get_file_objs(file_map))
             self.port_object.notify = self.notify
             self.port_object.save()
         else:
@@ -100,7 +124,7 @@ class CWLPortObject(PortObject):
                 notify=self.name in run_object.notify_for_outputs,
             )
             new_port.save()
-            new_port.files.set([FileProcessor.get_file_obj(v) for v in self.files])
+            new_port.files.set(self._get_file_objs(file_map))
             new_port.save()
             self.port_object = new_port
 
@@ -1,9 +1,12 @@
 import os
+import time
 import logging
+from lib.logger import format_log
 from runner.run.objects.run_object import RunObject
 from runner.run.processors.file_processor import FileProcessor
 from runner.run.objects.cwl.cwl_port_object import CWLPortObject
 from runner.pipeline.pipeline_cache import PipelineCache
+from file_system.models import Sample
 from runner.models import PortType, RunStatus, Run, Port, ProtocolType
 from runner.run.processors.port_processor import PortProcessor, PortAction
 from runner.exceptions import PortProcessorException, RunCreateException, RunObjectConstructException
@@ -50,6 +53,7 @@ class CWLRunObject(RunObject):
             job_group_notifier,
             notify_for_outputs,
         )
+        self.file_map = dict()
 
     @classmethod
     def from_definition(cls, run_id, inputs):
@@ -95,15 +99,17 @@ class CWLRunObject(RunObject):
         )
 
     def ready(self):
-        [CWLPortObject.ready(p) for p in self.inputs]
-        samples = set()
+        locations = set()
+        for p in self.inputs + self.outputs:
+            PortProcessor.collect_locations(p.value, locations)
+        self.file_map = FileProcessor.get_file_objs(locations)
+        [CWLPortObject.ready(p, self.file_map) for p in self.inputs]
+        sample_ids = set()
         for p in self.inputs:
             for f in p.files:
-                file_obj = FileProcessor.get_file_obj(f)
-                for sample in file_obj.get_samples():
-                    samples.add(sample)
-        self.samples = list(samples)
-        [CWLPortObject.ready(p) for p in self.outputs]
+                sample_ids.update(FileProcessor.get_file_obj(f, self.file_map).samples or [])
+        self.samples = list(Sample.objects.filter(sample_id__in=sample_ids, latest=True))
+        [CWLPortObject.ready(p, self.file_map) for p in self.outputs]
         self.status = RunStatus.READY
 
     @classmethod
@@ -136,8 +142,9 @@ class CWLRunObject(RunObject):
     def to_db(self):
         self.run_obj.app = self.app
         self.run_obj.name = self.name
-        [CWLPortObject.to_db(p) for p in self.inputs]
-        [CWLPortObject.to_db(p) for p in self.outputs]
+        file_map = self._port_file_map()
+        [CWLPortObject.to_db(p, file_map) for p in self.inputs]
+        [CWLPortObject.to_db(p, file_map) for p in self.outputs]
         self.run_obj.status = self.status
         self.run_obj.samples.set(self.samples)
         self.run_obj.job_statuses = self.job_statuses
@@ -150,6 +157,16 @@ class CWLRunObject(RunObject):
         self.run_obj.notify_for_outputs = self.notify_for_outputs
         self.run_obj.save()
 
+    def _port_file_map(self):
+        """
+        Files of all ports, reusing the ones already resolved in ready()
+        """
+        file_map = dict(self.file_map)
+        missing = [f for p in self.inputs + self.outputs for f in p.files if f not in file_map]
+        if missing:
+            file_map.update(FileProcessor.get_file_objs(missing))
+        return file_map
+
     def equal(self, run):
         if self.run_obj.app != run.run_obj.app:
             self.logger.debug("Apps not same")
@@ -177,7 +194,16 @@ class CWLRunObject(RunObject):
         return True
 
     def complete(self, outputs):
-        request_id = self.run_obj.samples.first().request_id if self.run_obj.samples.first() else None
+        start = time.perf_counter()
+        samples = list(self.run_obj.samples.all())
+        request_id = samples[0].request_id if samples else None
+        sample_ids = [s.sample_id for s in samples]
+        output_files = []
+        for out in self.outputs:
+            PortProcessor.collect_files(outputs.get(out.name, None), output_files)
+        registered = FileProcessor.register_files(
+            output_files, str(self.output_file_group.id), self.output_metadata, request_id, sample_ids
+        )
         for out in self.outputs:
             out.complete(
                 outputs.get(out.name, None),
@@ -185,9 +211,17 @@ class CWLRunObject(RunObject):
                 self.job_group_notifier,
                 self.output_metadata,
                 request_id,
-                [s.sample_id for s in self.run_obj.samples.all()],
+                sample_ids,
+                registered,
             )
+        self.file_map.update({FileProcessor.get_bid_from_file(f): f for f in registered.values()})
         self.status = RunStatus.COMPLETED
+        self.logger.info(
+            format_log(
+                "Registered %s output files in %.2fs" % (len(registered), time.perf_counter() - start),
+                obj=self.run_obj,
+            )
+        )
 
     def dump_job(self, output_directory=None):
         app = {
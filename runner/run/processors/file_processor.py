@@ -1,8 +1,25 @@
 import os
+import uuid
 import logging
-from django.db import IntegrityError
-from file_system.models import File, FileType, FileGroup, FileMetadata
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.core.exceptions import ValidationError
+from file_system.models import (
+    File,
+    FileType,
+    FileGroup,
+    FileMetadata,
+    FileMetadataProjection,
+    Request,
+    Sample,
+    Patient,
+    RequestModelManager,
+    SampleModelManager,
+    PatientModelManager,
+)
 from file_system.serializers import UpdateFileSerializer
+from file_system.helper.stat_service import stat_service
 from runner.exceptions import FileHelperException, FileConflictException, FileUpdateException
 from django.contrib.auth.models import User
 
@@ -16,13 +33,13 @@ class FileProcessor(object):
         return file.sample
 
     @staticmethod
-    def get_file_id(uri):
-        file_obj = FileProcessor.get_file_obj(uri)
+    def get_file_id(uri, file_map=None):
+        file_obj = FileProcessor.get_file_obj(uri, file_map)
         return str(file_obj.id)
 
     @staticmethod
-    def get_file_path(uri):
-        file_obj = FileProcessor.get_file_obj(uri)
+    def get_file_path(uri, file_map=None):
+        file_obj = FileProcessor.get_file_obj(uri, file_map)
         return file_obj.path
 
     @staticmethod
@@ -55,11 +72,14 @@ class FileProcessor(object):
             raise FileHelperException("Unknown uri schema %s" % uri)
 
     @staticmethod
-    def get_file_obj(uri):
+    def get_file_obj(uri, file_map=None):
         """
         :param uri:
+        :param file_map: optional dict returned by get_file_objs, consulted before the database
         :return: File model. Throws UriParserException if File doesn't exist
         """
+        if file_map is not None and uri in file_map:
+            return file_map[uri]
         if uri.startswith("bid://"):
             beagle_id = uri.replace("bid://", "")
             try:
@@ -88,6 +108,44 @@ class FileProcessor(object):
         else:
             raise FileHelperException("Unknown uri schema %s" % uri)
 
+    @staticmethod
+    def get_file_objs(uris):
+        """
+        Resolve many uris with a single query
+        :param uris:
+        :return: dict mapping every resolved uri, and the bid:// uri of each file, to the File model.
+        Uris that don't match a File are left out
+        """
+        ids = dict()
+        paths = dict()
+        for uri in set(uris):
+            if uri.startswith("bid://"):
+                beagle_id = uri.replace("bid://", "")
+                try:
+                    ids[uri] = str(uuid.UUID(beagle_id))
+                except ValueError:
+                    continue
+            elif uri.startswith(("juno://", "iris://", "file://")):
+                paths[uri] = FileProcessor.parse_path_from_uri(uri)
+            else:
+                raise FileHelperException("Unknown uri schema %s" % uri)
+        if not ids and not paths:
+            return dict()
+        by_id = dict()
+        by_path = dict()
+        file_map = dict()
+        for file_obj in File.objects.filter(Q(id__in=ids.values()) | Q(path__in=paths.values())):
+            by_id[str(file_obj.id)] = file_obj
+            by_path.setdefault(file_obj.path, file_obj)
+            file_map[FileProcessor.get_bid_from_file(file_obj)] = file_obj
+        for uri, beagle_id in ids.items():
+            if beagle_id in by_id:
+                file_map[uri] = by_id[beagle_id]
+        for uri, path in paths.items():
+            if path in by_path:
+                file_map[uri] = by_path[path]
+        return file_map
+
     @staticmethod
     def create_file_obj(uri, size, checksum, group_id, metadata, request_id=None, samples=[]):
         file_path = FileProcessor.parse_path_from_uri(uri)
@@ -113,6 +171,78 @@ class FileProcessor(object):
         FileMetadata.objects.create_or_update(file=file_object, metadata=metadata)
         return file_object
 
+    @staticmethod
+    def register_files(file_objs, group_id, metadata, request_id=None, samples=[]):
+        """
+        Register output files in bulk. Files already registered under the same path in the
+        FileGroup are reused as they are, like in create_file_obj
+        :param file_objs: CWL File objects with location and optional checksum
+        :return: dict mapping location to the File model
+        """
+        try:
+            group_id_obj = FileGroup.objects.get(id=group_id)
+        except (FileGroup.DoesNotExist, ValidationError):
+            raise FileHelperException("Invalid FileGroup id: %s" % group_id)
+        paths = dict()
+        checksums = dict()
+        for file_obj in file_objs:
+            uri = file_obj.get("location")
+            if not uri:
+                continue
+            paths[uri] = FileProcessor.parse_path_from_uri(uri)
+            checksums[uri] = file_obj.get("checksum")
+        existing = dict()
+        for file_obj in File.objects.filter(path__in=set(paths.values()), file_group=group_id_obj):
+            existing.setdefault(file_obj.path, file_obj)
+        # None for files which can't be accessed, resolve_file_sizes fills them in later
+        sizes = stat_service.sizes([path for path in set(paths.values()) if path not in existing])
+        new_files = dict()
+        for uri, path in paths.items():
+            if path in existing or path in new_files:
+                continue
+            new_files[path] = File(
+                path=path,
+                file_name=os.path.basename(path),
+                checksum=checksums[uri],
+                file_type=FileProcessor.get_file_ext(os.path.basename(path)),
+                file_group=group_id_obj,
+                size=sizes[path],
+                request_id=request_id,
+                samples=samples,
+            )
+        with transaction.atomic():
+            File.objects.bulk_create(new_files.values())
+            file_metadata = FileMetadata.objects.bulk_create(
+                [FileMetadata(file=f, metadata=metadata, version=0, latest=True) for f in new_files.values()]
+            )
+            FileMetadataProjection.objects.sync_many(file_metadata)
+        if new_files:
+            FileProcessor._update_versioned_instances(metadata)
+        FileProcessor.logger.info(
+            "Registered %s output files, %s already registered" % (len(new_files), len(paths) - len(new_files))
+        )
+        existing.update(new_files)
+        return {uri: existing[path] for uri, path in paths.items()}
+
+    @staticmethod
+    def _update_versioned_instances(metadata):
+        """
+        All outputs of a run share the same metadata, so Request, Sample and Patient are
+        updated once instead of once per file
+        """
+        if metadata.get(settings.REQUEST_ID_METADATA_KEY):
+            Request.objects.create_or_update_instance(
+                **RequestModelManager.extract_from_metadata(metadata), from_file=True
+            )
+        if metadata.get(settings.SAMPLE_ID_METADATA_KEY):
+            Sample.objects.create_or_update_instance(
+                **SampleModelManager.extract_from_metadata(metadata), from_file=True
+            )
+        if metadata.get(settings.PATIENT_ID_METADATA_KEY):
+            Patient.objects.create_or_update_instance(
+                **PatientModelManager.extract_from_metadata(metadata), from_file=True
+            )
+
     @staticmethod
     def get_file_ext(filename):
         """
@@ -120,12 +250,7 @@ class FileProcessor(object):
         :param filename:
         :return:
         """
-        file_types = FileType.objects.all()
-        for file_type in file_types:
-            for ext in file_type.fileextension_set.all():
-                if filename.endswith(ext.extension):
-                    return file_type
-        return FileType.objects.get(name="unknown")
+        return FileType.objects.get_by_filename(filename)
 
     @staticmethod
     def update_file(file_object, path, metadata, user=None):
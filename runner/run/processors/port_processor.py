@@ -50,6 +50,37 @@ class PortProcessor(object):
         else:
             return value
 
+    @staticmethod
+    def collect_locations(port_value, locations=None):
+        """
+        Collect the location of every File in the port value, including secondaryFiles
+        """
+        if locations is None:
+            locations = set()
+        for file_obj in PortProcessor.collect_files(port_value):
+            if file_obj.get("location"):
+                locations.add(file_obj["location"])
+        return locations
+
+    @staticmethod
+    def collect_files(port_value, files=None):
+        """
+        Collect every File object in the port value, including secondaryFiles
+        """
+        if files is None:
+            files = []
+        if isinstance(port_value, dict):
+            if PortProcessor.is_file(port_value):
+                files.append(port_value)
+                PortProcessor.collect_files(port_value.get("secondaryFiles", []), files)
+            else:
+                for v in port_value.values():
+                    PortProcessor.collect_files(v, files)
+        elif isinstance(port_value, list):
+            for item in port_value:
+                PortProcessor.collect_files(item, files)
+        return files
+
     @staticmethod
     def is_uuid(val):
         try:
@@ -65,13 +96,13 @@ class PortProcessor(object):
     @staticmethod
     def _process_file(file_obj, action, **kwargs):
         if action == PortAction.CONVERT_TO_BID:
-            return PortProcessor._update_location_to_bid(file_obj, kwargs.get("file_list"))
+            return PortProcessor._update_location_to_bid(file_obj, kwargs.get("file_list"), kwargs.get("file_map"))
         if action == PortAction.FIX_DB_VALUES:
             return PortProcessor._fix_locations_in_db(file_obj, kwargs.get("file_list"))
         if action == PortAction.CONVERT_TO_PATH:
-            return PortProcessor._convert_to_path(file_obj)
+            return PortProcessor._convert_to_path(file_obj, kwargs.get("file_map"))
         if action == PortAction.CONVERT_TO_CWL_FORMAT:
-            return PortProcessor._covert_to_cwl_format(file_obj)
+            return PortProcessor._covert_to_cwl_format(file_obj, kwargs.get("file_map"))
         if action == PortAction.REGISTER_OUTPUT_FILES:
             return PortProcessor._register_file(
                 file_obj,
@@ -81,6 +112,7 @@ class PortProcessor(object):
                 kwargs.get("file_list"),
                 kwargs.get("request_id"),
                 kwargs.get("samples", []),
+                kwargs.get("file_map"),
             )
         if action == PortAction.SEND_AS_NOTIFICATION:
             return PortProcessor._send_as_notification(file_obj, kwargs.get("job_group"))
@@ -90,18 +122,18 @@ class PortProcessor(object):
             raise PortProcessorException("Unknown PortProcessor action: %s" % action)
 
     @staticmethod
-    def _update_location_to_bid(val, file_list):
+    def _update_location_to_bid(val, file_list, file_map=None):
         file_obj = copy.deepcopy(val)
         location = val.get("location")
         if not location and val.get("contents"):
             logger.debug("Processing file literal %s", str(val))
             return val
-        bid = FileProcessor.get_file_id(location)
+        bid = FileProcessor.get_file_id(location, file_map)
         file_obj["location"] = "bid://%s" % bid
         secondary_files = file_obj.pop("secondaryFiles", [])
         secondary_file_list = []
         secondary_files_obj = PortProcessor.process_files(
-            secondary_files, PortAction.CONVERT_TO_BID, file_list=secondary_file_list
+            secondary_files, PortAction.CONVERT_TO_BID, file_list=secondary_file_list, file_map=file_map
         )
         if secondary_files_obj:
             file_obj["secondaryFiles"] = secondary_files_obj
@@ -113,30 +145,32 @@ class PortProcessor(object):
         return file_obj
 
     @staticmethod
-    def _convert_to_path(val):
+    def _convert_to_path(val, file_map=None):
         file_obj = copy.deepcopy(val)
         location = file_obj.pop("location", None)
         if not location and val.get("contents"):
             logger.debug("Processing file literal %s", str(val))
             return val
         try:
-            path = FileProcessor.get_file_path(location)
+            path = FileProcessor.get_file_path(location, file_map)
         except FileHelperException as e:
             raise PortProcessorException("File %s not found" % location)
         secondary_files = file_obj.pop("secondaryFiles", [])
-        secondary_files_value = PortProcessor.process_files(secondary_files, PortAction.CONVERT_TO_PATH)
+        secondary_files_value = PortProcessor.process_files(
+            secondary_files, PortAction.CONVERT_TO_PATH, file_map=file_map
+        )
         if secondary_files_value:
             file_obj["secondaryFiles"] = secondary_files_value
         file_obj["path"] = path
         return file_obj
 
     @staticmethod
-    def _covert_to_cwl_format(val):
+    def _covert_to_cwl_format(val, file_map=None):
         file_obj = copy.deepcopy(val)
         location = file_obj.pop("location", None)
         if location:
             try:
-                file_db_object = FileProcessor.get_file_obj(location)
+                file_db_object = FileProcessor.get_file_obj(location, file_map)
             except FileHelperException as e:
                 raise PortProcessorException("File %s not found" % location)
             path = file_db_object.path
@@ -152,7 +186,9 @@ class PortProcessor(object):
             file_obj["nameroot"] = path_obj.stem
             file_obj["path"] = path
         secondary_files = file_obj.pop("secondaryFiles", [])
-        secondary_files_value = PortProcessor.process_files(secondary_files, PortAction.CONVERT_TO_CWL_FORMAT)
+        secondary_files_value = PortProcessor.process_files(
+            secondary_files, PortAction.CONVERT_TO_CWL_FORMAT, file_map=file_map
+        )
         if secondary_files_value:
             file_obj["secondaryFiles"] = secondary_files_value
 
@@ -193,20 +229,29 @@ class PortProcessor(object):
         return file_obj
 
     @staticmethod
-    def _register_file(val, size, group_id, metadata, file_list, request_id=None, samples=[]):
+    def _register_file(val, size, group_id, metadata, file_list, request_id=None, samples=[], file_map=None):
+        """
+        Register the output file, or take it from file_map when it was already registered with
+        FileProcessor.register_files
+        """
         file_obj = copy.deepcopy(val)
         file_obj.pop("basename", None)
         file_obj.pop("nameroot", None)
         file_obj.pop("nameext", None)
         uri = file_obj.pop("location", None)
         checksum = file_obj.pop("checksum", None)
-        try:
-            file_obj_db = FileProcessor.create_file_obj(uri, size, checksum, group_id, metadata, request_id, samples)
-        except FileConflictException as e:
-            logger.warning(str(e))
-            # TODO: Check what to do in case file already exist in DB.
-            file_obj_db = FileProcessor.get_file_obj(uri)
-            FileProcessor.update_file(file_obj_db, file_obj_db.path, metadata)
+        if file_map is not None and uri in file_map:
+            file_obj_db = file_map[uri]
+        else:
+            try:
+                file_obj_db = FileProcessor.create_file_obj(
+                    uri, size, checksum, group_id, metadata, request_id, samples
+                )
+            except FileConflictException as e:
+                logger.warning(str(e))
+                # TODO: Check what to do in case file already exist in DB.
+                file_obj_db = FileProcessor.get_file_obj(uri)
+                FileProcessor.update_file(file_obj_db, file_obj_db.path, metadata)
 
         secondary_files = file_obj.pop("secondaryFiles", [])
         secondary_file_list = []
@@ -216,12 +261,13 @@ class PortProcessor(object):
             group_id=group_id,
             metadata=metadata,
             file_list=secondary_file_list,
+            file_map=file_map,
         )
         if secondary_files_obj:
             file_obj["secondaryFiles"] = secondary_files_obj
         file_obj["location"] = FileProcessor.get_bid_from_file(file_obj_db)
         if file_list is not None:
-            file_list.append("bid://%s" % FileProcessor.get_bid_from_file(file_obj_db))
+            file_list.append(FileProcessor.get_bid_from_file(file_obj_db))
             file_list.extend([f["location"] for f in secondary_files_obj])
         return file_obj
 
@@ -273,6 +273,38 @@ class RunStatusUpdateSerializer(serializers.Serializer):
         instance.save()
 
 
+class RunStatusEventSerializer(serializers.Serializer):
+    execution_id = serializers.UUIDField(required=True)
+    status = serializers.ChoiceField(
+        choices=["CREATED", "PENDING", "RUNNING", "COMPLETED", "FAILED", "TERMINATED"], required=True
+    )
+    modified = serializers.DateTimeField(required=False)
+    started = serializers.DateTimeField(required=False, allow_null=True)
+    submitted = serializers.DateTimeField(required=False, allow_null=True)
+    outputs = serializers.JSONField(required=False, allow_null=True)
+    message = serializers.JSONField(required=False, allow_null=True)
+    commandlinetooljob_set = serializers.ListField(child=serializers.JSONField(), required=False, allow_empty=True)
+
+    def validate(self, attrs):
+        if attrs["status"] == "COMPLETED" and attrs.get("outputs") is None:
+            raise serializers.ValidationError("COMPLETED event of %s has no outputs" % attrs["execution_id"])
+        return attrs
+
+
+class RunStatusEventsSerializer(serializers.Serializer):
+    events = serializers.ListField(child=RunStatusEventSerializer(), allow_empty=False, max_length=5000)
+
+    def get_events(self):
+        """
+        Events in their JSON representation with only the fields the executor sent.
+        serializer.data sets omitted fields to None, which process_run_status_events would read as sent.
+        """
+        return [
+            {key: value for key, value in event.items() if key in validated}
+            for event, validated in zip(self.data["events"], self.validated_data["events"])
+        ]
+
+
 class RestartRunSerializer(serializers.Serializer):
     operator_run_id = serializers.UUIDField(required=True)
     clean = serializers.BooleanField(default=False)
@@ -7,8 +7,9 @@ from lib.memcache_lock import memcache_lock
 from urllib.parse import urljoin
 from celery import shared_task, chord
 from django.conf import settings
-from django.db.models import Count
+from django.core.cache import cache
 from runner.run.objects.run_object_factory import RunObjectFactory
+from runner.run.executor.executor_client import ExecutorClient
 from .models import Run, RunStatus, OperatorRun, TriggerAggregateConditionType, TriggerRunType, Pipeline
 from notifier.events import (
     RunFinishedEvent,
@@ -31,6 +32,7 @@ from beagle_etl.models import Operator
 from beagle_etl.jobs.notification_helper import _voyager_start_processing
 from notifier.models import JobGroup, JobGroupNotifier
 from notifier.helper import get_emails_to_notify, get_gene_panel, get_samples
+from file_system.helper.request_summary import get_request_summary
 from file_system.models import Request
 from file_system.repository import FileRepository
 from file_manager.file_manager import FileManager
@@ -124,7 +126,7 @@ def create_operator_run_from_jobs(
         logger.error(f"Exception in Operator get_jobs for: {operator}")
         logger.error(f"Traceback:\n{traceback.format_exc()}")
         gene_panel = get_gene_panel(operator.request_id)
-        number_of_samples = get_samples(operator.request_id).count()
+        number_of_samples = len(get_samples(operator.request_id))
         send_to = get_emails_to_notify(operator.request_id, "VoyagerActionRequiredForRunningEvent")
         for email in send_to:
             event = VoyagerActionRequiredForRunningEvent(
@@ -278,13 +280,13 @@ def stage_files(request_id=None, pairing=None, job_group_id=None):
         logger.info(format_log("No samples to stage", job_group_id=job_group_id))
         return staging_tasks, sample_jobs
 
-    file_manager = FileManager()
-    for sample in samples:
-        logger.info(format_log(f"Staging files for sample {sample}", request_id=request_id, job_group_id=job_group_id))
-        sample_job, task_sigs = file_manager.stage_sample(sample)
+    logger.info(
+        format_log(f"Staging files for {len(samples)} samples", request_id=request_id, job_group_id=job_group_id)
+    )
+    planned_jobs, staging_tasks = FileManager().stage_samples(samples)
+    for sample, sample_job in planned_jobs.items():
         if sample_job.total_files > 0:
             sample_jobs[sample] = sample_job
-            staging_tasks.extend(task_sigs)
             logger.info(
                 format_log(f"Sample {sample} requires staging of {sample_job.total_files} files", request_id=request_id)
             )
@@ -407,70 +409,37 @@ def _generate_summary(req):
 
 def generate_description(operator, job_group, job_group_notifier, request):
     links = operator.links_to_files()
-    files = FileRepository.filter(
-        metadata={settings.REQUEST_ID_METADATA_KEY: request, settings.IGO_COMPLETE_METADATA_KEY: True}
-    )
-    if files:
-        data = files.first().metadata
-        request_id = data[settings.REQUEST_ID_METADATA_KEY]
-        recipe = data[settings.RECIPE_METADATA_KEY]
-        a_name = data["dataAnalystName"]
-        a_email = data["dataAnalystEmail"]
-        i_name = data["investigatorName"]
-        i_email = data["investigatorEmail"]
-        l_name = data["labHeadName"]
-        l_email = data["labHeadEmail"]
-        p_email = data["piEmail"]
-        pm_name = data["projectManagerName"]
-        qc_emails = data["qcAccessEmails"] if "qcAccessEmails" in data else ""
-        data_access_emails = data["dataAccessEmails"] if "dataAccessEmails" in data else ""
-        other_contact_emails = data["otherContactEmails"] if "otherContactEmails" in data else ""
-
-        num_samples = len(files.order_by().values("metadata__ciTag").annotate(n=Count("pk")))
-        num_tumors = len(
-            FileRepository.filter(queryset=files, metadata={"tumorOrNormal": "Tumor"})
-            .order_by()
-            .values("metadata__ciTag")
-            .annotate(n=Count("pk"))
-        )
-        num_normals = len(
-            FileRepository.filter(queryset=files, metadata={"tumorOrNormal": "Normal"})
-            .order_by()
-            .values("metadata__ciTag")
-            .annotate(n=Count("pk"))
-        )
+    summary = get_request_summary(request)
+    if summary.complete_files:
+        contacts = summary.contacts
         operator_start_event = OperatorStartEvent(
             job_group_notifier,
             job_group,
-            request_id,
-            num_samples,
-            recipe,
-            a_name,
-            a_email,
-            i_name,
-            i_email,
-            l_name,
-            l_email,
-            p_email,
-            pm_name,
-            qc_emails,
-            num_tumors,
-            num_normals,
-            data_access_emails,
-            other_contact_emails,
+            request,
+            summary.complete_samples,
+            summary.recipe,
+            contacts["dataAnalystName"],
+            contacts["dataAnalystEmail"],
+            contacts["investigatorName"],
+            contacts["investigatorEmail"],
+            contacts["labHeadName"],
+            contacts["labHeadEmail"],
+            contacts["piEmail"],
+            contacts["projectManagerName"],
+            contacts["qcAccessEmails"] or "",
+            summary.complete_tumors,
+            summary.complete_normals,
+            contacts["dataAccessEmails"] or "",
+            contacts["otherContactEmails"] or "",
             links,
         ).to_dict()
         send_notification.delay(operator_start_event)
 
 
 def generate_label(job_group_id, request):
-    files = FileRepository.filter(
-        metadata={settings.REQUEST_ID_METADATA_KEY: request, settings.IGO_COMPLETE_METADATA_KEY: True}
-    )
-    if files:
-        data = files.first().metadata
-        recipe = data[settings.RECIPE_METADATA_KEY]
-        recipe_label_event = SetLabelEvent(job_group_id, recipe).to_dict()
+    summary = get_request_summary(request)
+    if summary.complete_files:
+        recipe_label_event = SetLabelEvent(job_group_id, summary.recipe).to_dict()
         send_notification.delay(recipe_label_event)
 
 
@@ -701,15 +670,6 @@ def terminate_job_on_ridgeback(job_id):
     return None
 
 
-def check_statuses_on_ridgeback(execution_ids):
-    response = requests.post(settings.RIDGEBACK_URL + "/v0/jobs/statuses/", data={"job_ids": execution_ids})
-    if response.status_code == 200:
-        logger.info("Job statuses checked")
-        return response.json()["jobs"]
-    logger.error("Failed to fetch job statuses with status code: %s" % response.status_code)
-    return None
-
-
 @shared_task(bind=True)
 def fail_job(self, run_id, error_message, run_log_location=None, input_json_location=None):
     lock_id = "run_lock_%s" % run_id
@@ -1013,87 +973,211 @@ def check_operator_run_alerts():
         single_operator_run.save()
 
 
+CHECK_JOB_STATUS_CURSOR = "check_jobs_status_cursor"
+CHECK_JOB_STATUS_FULL_SYNC = "check_jobs_status_full_sync"
+CHECK_JOB_STATUS_CHUNK = 800
+
+
+def _log_locations(status):
+    run_log_location = (status.get("message") or {}).get("log")
+    inputs_location = None
+    if run_log_location:
+        run_log_filename = os.path.basename(run_log_location)
+        inputs_location = run_log_location.replace(run_log_filename, "input.json")
+    return run_log_location, inputs_location
+
+
+def _dispatch_in_batches(task, jobs, batch_size=20):
+    for i in range(0, len(jobs), batch_size):
+        task.delay(jobs[i : i + batch_size])
+
+
+@shared_task
+def complete_jobs(jobs):
+    for run_id, outputs, run_log_location, inputs_location in jobs:
+        try:
+            complete_job(run_id, outputs, run_log_location, inputs_location)
+        except Exception:
+            logger.error(format_log(f"Failed to complete run: {traceback.format_exc()}", obj_id=run_id))
+
+
+@shared_task
+def fail_jobs(jobs):
+    for run_id, message, run_log_location, inputs_location in jobs:
+        try:
+            fail_job(run_id, message, run_log_location, inputs_location)
+        except Exception:
+            logger.error(format_log(f"Failed to fail run: {traceback.format_exc()}", obj_id=run_id))
+
+
+@shared_task
+def terminate_jobs(jobs):
+    for run_id, run_log_location, inputs_location in jobs:
+        try:
+            terminate_job(run_id, run_log_location, inputs_location)
+        except Exception:
+            logger.error(format_log(f"Failed to terminate run: {traceback.format_exc()}", obj_id=run_id))
+
+
+def _apply_job_statuses(changed, limit=800):
+    """
+    Apply executor statuses to runs. changed maps run id to (status, etag).
+    """
+    if not changed:
+        return
+    updated_runs = []
+    running = []
+    completed = []
+    failed = []
+    terminated = []
+    # status is read by Run.__init__, leaving it out would reload every run
+    runs = Run.objects.filter(id__in=changed.keys()).only(
+        "id",
+        "status",
+        "execution_id",
+        "execution_etag",
+        "operator_run",
+        "job_group",
+        "tags",
+        "message",
+        "started",
+        "submitted",
+        "job_statuses",
+    )
+    for run in runs.iterator(chunk_size=limit):
+        status, status_etag = changed[run.id]
+        run_id = str(run.id)
+        new_alert = (status.get("message") or {}).get("alerts")
+        old_alert = (run.message or {}).get("details", {}).get("alerts")
+        if old_alert != new_alert:
+            logger.error(format_log("Hanging Job detected", obj=run))
+            run.message = dict(details=status.get("message", {}))
+        if status.get("started") and not run.started:
+            run.started = status["started"]
+        if status.get("submitted") and not run.submitted:
+            run.submitted = status["submitted"]
+        if status.get("commandlinetooljob_set"):
+            update_commandline_job_status(run, status["commandlinetooljob_set"])
+
+        if status["status"] == "FAILED":
+            logger.error(format_log("Job failed ", obj=run))
+            failed.append((run_id, dict(details=status.get("message")), *_log_locations(status)))
+        elif status["status"] == "COMPLETED":
+            logger.info(format_log("Job completed", obj=run))
+            completed.append((run_id, status["outputs"], *_log_locations(status)))
+        elif status["status"] == "TERMINATED":
+            logger.info(format_log("Job terminated", obj=run))
+            terminated.append((run_id, *_log_locations(status)))
+        else:
+            if status["status"] == "RUNNING":
+                running.append(run.id)
+            # Finished runs keep the previous etag until they are processed, so a failed
+            # dispatch is retried on the next full poll
+            run.execution_etag = status_etag
+        updated_runs.append(run)
+
+    Run.objects.bulk_update(
+        updated_runs, ["execution_etag", "message", "started", "submitted", "job_statuses"], batch_size=limit
+    )
+    if running:
+        # Status counters on OperatorRun only track finished runs, so READY -> RUNNING is a plain update
+        Run.objects.filter(id__in=running, status=RunStatus.READY).update(status=RunStatus.RUNNING)
+    _dispatch_in_batches(complete_jobs, completed)
+    _dispatch_in_batches(fail_jobs, failed)
+    _dispatch_in_batches(terminate_jobs, terminated)
+    logger.info(
+        "Applied %s job statuses: %s running, %s completed, %s failed, %s terminated"
+        % (len(changed), len(running), len(completed), len(failed), len(terminated))
+    )
+
+
 @shared_task
 @memcache_lock("check_jobs_status")
 def check_jobs_status():
-    runs_queryset = Run.objects.filter(status__in=(RunStatus.RUNNING, RunStatus.READY), execution_id__isnull=False)
-
-    limit = 800
-    i = 0
-    while True:
-        runs = runs_queryset[i : i + limit]
-        i += limit
-        if not runs:
+    """
+    Poll the executor for RUNNING/READY runs and apply the changes.
+
+    Each run keeps the etag of the last status it was updated from, so unchanged statuses
+    are skipped without touching the database. With CHECK_JOB_STATUS_INCREMENTAL the executor
+    is asked only for jobs modified since the previous poll, and every
+    CHECK_JOB_STATUS_FULL_SYNC_PERIOD seconds a full poll reconciles anything missed.
+    Field updates are written with bulk_update, READY -> RUNNING transitions with a single
+    UPDATE, and finished runs are handed to complete_jobs/fail_jobs/terminate_jobs in batches.
+    """
+    client = ExecutorClient.get_client()
+    modified_after = None
+    if settings.CHECK_JOB_STATUS_INCREMENTAL and cache.get(CHECK_JOB_STATUS_FULL_SYNC):
+        modified_after = cache.get(CHECK_JOB_STATUS_CURSOR)
+
+    active_runs = list(
+        Run.objects.filter(status__in=(RunStatus.RUNNING, RunStatus.READY), execution_id__isnull=False).values_list(
+            "id", "execution_id", "execution_etag"
+        )
+    )
+
+    limit = CHECK_JOB_STATUS_CHUNK
+    cursor = None
+    changed = dict()
+    for i in range(0, len(active_runs), limit):
+        chunk = active_runs[i : i + limit]
+        remote_statuses, chunk_cursor = client.statuses([execution_id for _, execution_id, _ in chunk], modified_after)
+        if remote_statuses is None:
+            # Keep the previous cursor so the next poll asks for these jobs again
             return
+        if cursor is None:
+            # The cursor of the first request, jobs of earlier chunks which change while the
+            # later chunks are fetched are returned again by the next poll
+            cursor = chunk_cursor
+        for run_id, execution_id, etag in chunk:
+            status = remote_statuses.get(str(execution_id))
+            if status is None:
+                continue
+            status_etag = ExecutorClient.etag(status)
+            if status_etag != etag:
+                changed[run_id] = (status, status_etag)
+
+    if cursor is not None:
+        cache.set(CHECK_JOB_STATUS_CURSOR, cursor, None)
+        if not modified_after:
+            cache.set(CHECK_JOB_STATUS_FULL_SYNC, True, settings.CHECK_JOB_STATUS_FULL_SYNC_PERIOD)
+    logger.info("Checked %s runs: %s changed" % (len(active_runs), len(changed)))
+    _apply_job_statuses(changed)
 
-        remote_statuses = check_statuses_on_ridgeback(list(runs.values_list("execution_id")))
-        if not remote_statuses:
+
+def deduplicate_status_events(events):
+    """
+    Keep the latest event for each execution id. Events are ordered by "modified" when the
+    executor sends it, otherwise by their position in the batch.
+    """
+    latest = dict()
+    for event in events:
+        execution_id = str(event["execution_id"])
+        previous = latest.get(execution_id)
+        if previous and (previous.get("modified") or "") > (event.get("modified") or ""):
             continue
+        latest[execution_id] = event
+    return latest
 
-        for run in runs:
-            logger.info(format_log("Checking status for run", obj=run))
-            if str(run.execution_id) not in remote_statuses:
-                logger.info(format_log("Requested job status from executor that was not returned", obj=run))
-                continue
 
-            status = remote_statuses[str(run.execution_id)]
-            message = dict(details=status.get("message", {}))
-            new_alert = message.get("details", {}).get("alerts")
-            old_alert = run.message.get("details", {}).get("alerts")
-            if old_alert != new_alert:
-                logger.error(format_log("Hanging Job detected", obj=run))
-                run.message = dict(details=status.get("message", {}))
-                run.save(update_fields=("message",))
-                # send_hanging_job_alert(str(run.id), new_alert[0]["message"])
-
-            if status["started"] and not run.started:
-                run.started = status["started"]
-                run.save(update_fields=("started",))
-            if status["submitted"] and not run.submitted:
-                run.submitted = status["submitted"]
-                run.save(update_fields=("submitted",))
-
-            if status["commandlinetooljob_set"]:
-                update_commandline_job_status(run, status["commandlinetooljob_set"])
-            if status["status"] == "FAILED":
-                logger.error(format_log("Job failed ", obj=run))
-                message = dict(details=status.get("message"))
-                run_log_location = status.get("message", {}).get("log")
-                inputs_location = None
-                if run_log_location:
-                    run_log_filename = os.path.basename(run_log_location)
-                    inputs_location = run_log_location.replace(run_log_filename, "input.json")
-                fail_job.delay(str(run.id), message, run_log_location, inputs_location)
-                continue
-            if status["status"] == "COMPLETED":
-                logger.info(format_log("Job completed", obj=run))
-                run_log_location = status.get("message", {}).get("log")
-                inputs_location = None
-                if run_log_location:
-                    run_log_filename = os.path.basename(run_log_location)
-                    inputs_location = run_log_location.replace(run_log_filename, "input.json")
-                complete_job.delay(str(run.id), status["outputs"], run_log_location, inputs_location)
-                continue
-            if status["status"] == "CREATED":
-                logger.info(format_log("Job created", obj=run))
-                continue
-            if status["status"] == "PENDING":
-                logger.info(format_log("Job pending", obj=run))
-                continue
-            if status["status"] == "RUNNING":
-                logger.info(format_log("Job running", obj=run))
-                running_job.delay(str(run.id))
-                continue
-            if status["status"] == "TERMINATED":
-                logger.info(format_log("Job terminated", obj=run))
-                run_log_location = status.get("message", {}).get("log")
-                inputs_location = None
-                if run_log_location:
-                    run_log_filename = os.path.basename(run_log_location)
-                    inputs_location = run_log_location.replace(run_log_filename, "input.json")
-                terminate_job.delay(str(run.id), run_log_location, inputs_location)
-            else:
-                logger.info("Run lock not acquired for run: %s" % str(run.id))
+@shared_task
+def process_run_status_events(events):
+    """
+    Consume a batch of status-change events pushed by the executor. Runs that already have
+    the same status, or are no longer active, are skipped; check_jobs_status reconciles
+    anything that was missed.
+    """
+    latest = deduplicate_status_events(events)
+    runs = Run.objects.filter(
+        execution_id__in=latest.keys(), status__in=(RunStatus.RUNNING, RunStatus.READY)
+    ).values_list("id", "execution_id", "execution_etag")
+    changed = dict()
+    for run_id, execution_id, etag in runs:
+        status = latest[str(execution_id)]
+        status_etag = ExecutorClient.etag(status)
+        if status_etag != etag:
+            changed[run_id] = (status, status_etag)
+    logger.info("Received %s status events for %s jobs: %s changed" % (len(events), len(latest), len(changed)))
+    _apply_job_statuses(changed)
 
 
 def run_routine_operator_job(operator, job_group_id=None):
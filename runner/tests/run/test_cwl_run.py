@@ -293,6 +293,20 @@ class CWLRunObjectTest(APITestCase):
         self.assertTrue(self.sample_1 in run.samples)
         self.assertTrue(self.sample_2 in run.samples)
 
+    @patch("runner.pipeline.pipeline_cache.PipelineCache.get_pipeline")
+    def test_run_ready_resolves_files_once(self, mock_get_pipeline):
+        with open("runner/tests/run/pair-workflow.cwl", "r") as f:
+            app = json.load(f)
+        with open("runner/tests/run/inputs.json", "r") as f:
+            inputs = json.load(f)
+        mock_get_pipeline.return_value = app
+        run = RunObjectFactory.from_definition(str(self.run.id), inputs)
+        # One query for all File locations and one for the samples
+        with self.assertNumQueries(2):
+            run.ready()
+        self.assertTrue(self.sample_1 in run.samples)
+        self.assertTrue(self.sample_2 in run.samples)
+
     @patch("runner.pipeline.pipeline_cache.PipelineCache.get_pipeline")
     def test_run_to_db(self, mock_get_pipeline):
         with open("runner/tests/run/pair-workflow.cwl", "r") as f:
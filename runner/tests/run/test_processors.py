@@ -3,7 +3,7 @@ from dictdiffer import diff
 from runner.run.processors.file_processor import FileProcessor
 from runner.run.processors.port_processor import PortProcessor, PortAction
 from rest_framework.test import APITestCase
-from file_system.models import Storage, StorageType, FileGroup, File, FileType, FileExtension
+from file_system.models import Storage, StorageType, FileGroup, File, FileType, FileExtension, FileMetadata
 
 
 class ProcessorTest(APITestCase):
@@ -317,6 +317,31 @@ class ProcessorTest(APITestCase):
         )
         self.assertEqual(file_obj.file_type, self.file_type_unknown)
 
+    def test_get_file_ext_matches_longest_extension(self):
+        FileExtension.objects.create(extension="gz", file_type=self.file_type_txt)
+        FileProcessor.get_file_ext("warm.up")
+        with self.assertNumQueries(0):
+            self.assertEqual(FileProcessor.get_file_ext("S16_R1_001.fastq.gz"), self.file_type_fastq)
+            self.assertEqual(FileProcessor.get_file_ext("archive.tar.gz"), self.file_type_txt)
+            self.assertEqual(FileProcessor.get_file_ext("data.maf"), self.file_type_unknown)
+        FileExtension.objects.create(extension="maf", file_type=self.file_type_maf)
+        self.assertEqual(FileProcessor.get_file_ext("data.maf"), self.file_type_maf)
+
+    def test_register_files_in_bulk(self):
+        file_objs = [
+            {"class": "File", "location": "file:///output/sample.maf", "checksum": "sha1$maf"},
+            {"class": "File", "location": "juno://%s" % self.file1.path},
+            {"class": "File", "location": "file:///output/sample.maf"},
+        ]
+        registered = FileProcessor.register_files(file_objs, str(self.file_group.id), {"pipeline": "argos"})
+        self.assertEqual(registered["juno://%s" % self.file1.path], self.file1)
+        new_file = registered["file:///output/sample.maf"]
+        self.assertEqual(new_file.checksum, "sha1$maf")
+        # /output/sample.maf doesn't exist, its size is unknown until it can be stat-ed
+        self.assertIsNone(new_file.size)
+        self.assertEqual(FileMetadata.objects.get(file=new_file).metadata, {"pipeline": "argos"})
+        self.assertEqual(File.objects.filter(path="/output/sample.maf").count(), 1)
+
     def test_create_file_obj_bad_file_group(self):
         file_group_id = str(uuid.uuid4())
         with self.assertRaises(Exception) as context:
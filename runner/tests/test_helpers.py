@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.test import TestCase
-from runner.operator.helper import format_sample_name
+from file_system.repository import FileRepository
+from file_system.models import File, FileGroup, FileMetadata, FileType, Sample, Storage, StorageType
+from runner.operator.helper import format_sample_name, cohort_files_query, group_files_by_patient
 
 
 class TestHelper(TestCase):
@@ -18,3 +21,73 @@ class TestHelper(TestCase):
         )  # should be prefixed with 's_'
         self.assertEqual(format_sample_name(sample_name_ci_tag, "Primary"), sample_name_ci_tag)  # should be unchanged
         self.assertEqual(format_sample_name(sample_name_old, "Primary"), sample_name_ci_tag)  # should be converted
+
+
+class TestCohortFiles(TestCase):
+    def setUp(self):
+        storage = Storage.objects.create(name="test", type=StorageType.LOCAL)
+        self.file_group = FileGroup.objects.create(name="Test Files", storage=storage)
+        self.file_type = FileType.objects.create(name="fastq")
+
+    def _create_file(self, sample_id, patient_id="C-000001", **metadata):
+        file = File.objects.create(
+            path="/path/to/%s.fastq.gz" % sample_id,
+            file_name="%s.fastq.gz" % sample_id,
+            file_type=self.file_type,
+            file_group=self.file_group,
+            size=1234,
+            samples=[sample_id],
+        )
+        file_metadata = {
+            settings.SAMPLE_ID_METADATA_KEY: sample_id,
+            settings.RECIPE_METADATA_KEY: "IMPACT468",
+            settings.BAITSET_METADATA_KEY: "IMPACT468_BAITS",
+            settings.IGO_COMPLETE_METADATA_KEY: True,
+            settings.CMO_SAMPLE_TAG_METADATA_KEY: "s_%s" % sample_id,
+            settings.PATIENT_ID_METADATA_KEY: patient_id,
+        }
+        file_metadata.update(metadata)
+        # None leaves the key out of the metadata
+        file_metadata = {key: value for key, value in file_metadata.items() if value is not None}
+        FileMetadata.objects.create_or_update(file=file, metadata=file_metadata)
+        return file
+
+    def _cohort_files(self):
+        query = cohort_files_query(["IMPACT468"], ["IMPACT468_BAITS"], [settings.CMO_SAMPLE_TAG_METADATA_KEY])
+        return FileRepository.filter(filter_redact=True).filter(query)
+
+    def _sample_ids(self, files):
+        return sorted(f.metadata[settings.SAMPLE_ID_METADATA_KEY] for f in files)
+
+    def test_cohort_files_query(self):
+        self._create_file("sample_1")
+        self._create_file("sample_2", **{settings.RECIPE_METADATA_KEY: "HemePACT"})
+        self._create_file("sample_3", **{settings.BAITSET_METADATA_KEY: "HemePACT_BAITS"})
+        self._create_file("sample_4", **{settings.IGO_COMPLETE_METADATA_KEY: False})
+        self._create_file("sample_5", **{settings.CMO_SAMPLE_TAG_METADATA_KEY: None})
+        self._create_file("sample_6")
+        self.assertEqual(self._sample_ids(self._cohort_files()), ["sample_1", "sample_6"])
+
+        Sample.objects.filter(sample_id="sample_6", latest=True).update(latest=False)
+        Sample.objects.create(sample_id="sample_6", redact=True, version=1, latest=True)
+        self.assertEqual(self._sample_ids(self._cohort_files()), ["sample_1"])
+
+    def test_cohort_files_query_follows_latest_metadata(self):
+        file = self._create_file("sample_1", **{settings.IGO_COMPLETE_METADATA_KEY: False})
+        self.assertEqual(self._sample_ids(self._cohort_files()), [])
+        metadata = FileMetadata.objects.get(file=file, latest=True).metadata
+        metadata[settings.IGO_COMPLETE_METADATA_KEY] = True
+        FileMetadata.objects.create_or_update(file=file, metadata=metadata)
+        self.assertEqual(self._sample_ids(self._cohort_files()), ["sample_1"])
+
+    def test_group_files_by_patient(self):
+        self._create_file("sample_1", patient_id="C-000001")
+        self._create_file("sample_2", patient_id="C-000001")
+        self._create_file("sample_3", patient_id="C-000002")
+        self._create_file("sample_4", patient_id=None)
+        patient_files, no_patient_files = group_files_by_patient(self._cohort_files())
+        self.assertEqual(sorted(patient_files), ["C-000001", "C-000002"])
+        self.assertEqual(self._sample_ids(patient_files["C-000001"]), ["sample_1", "sample_2"])
+        self.assertEqual(self._sample_ids(patient_files["C-000002"]), ["sample_3"])
+        self.assertEqual(self._sample_ids(no_patient_files), ["sample_4"])
+        self.assertEqual(patient_files["C-000002"][0].file.path, "/path/to/sample_3.fastq.gz")
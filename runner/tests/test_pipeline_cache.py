@@ -0,0 +1,74 @@
+"""
+Tests for PipelineCache
+"""
+from datetime import timedelta
+from mock import patch
+from django.core.cache import cache
+from django.utils import timezone
+from django.test import TestCase
+from runner.models import Pipeline, ResolvedPipeline
+from runner.pipeline.pipeline_cache import PipelineCache
+
+
+class TestPipelineCache(TestCase):
+    fixtures = [
+        "file_system.filegroup.json",
+        "file_system.filetype.json",
+        "file_system.storage.json",
+        "beagle_etl.operator.json",
+        "runner.pipeline.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.pipeline = Pipeline.objects.filter(default=True).first()
+
+    @patch("runner.pipeline.cwl.cwl_resolver.CWLResolver.resolve")
+    def test_pipeline_is_resolved_once(self, resolve):
+        resolve.return_value = {"class": "Workflow"}
+        self.assertEqual(PipelineCache.get_pipeline(self.pipeline), {"class": "Workflow"})
+        self.assertEqual(ResolvedPipeline.objects.count(), 1)
+
+        # memcache eviction falls back to the store
+        cache.delete(PipelineCache._cache_key(PipelineCache.key(self.pipeline)))
+        self.assertEqual(PipelineCache.get_pipeline(self.pipeline), {"class": "Workflow"})
+        self.assertEqual(PipelineCache.get_pipeline(self.pipeline), {"class": "Workflow"})
+        self.assertEqual(resolve.call_count, 1)
+        metrics = PipelineCache.metrics()
+        self.assertEqual((metrics["miss"], metrics["store_hit"], metrics["hit"]), (1, 1, 1))
+
+    @patch("runner.pipeline.cwl.cwl_resolver.CWLResolver.resolve")
+    def test_waits_for_resolution_in_progress(self, resolve):
+        key = PipelineCache.key(self.pipeline)
+        cache.add("pipeline_resolve_%s" % key, 1)
+        from_store = [None, {"class": "Workflow"}]
+        with patch("runner.pipeline.pipeline_cache.PipelineCache._from_store", side_effect=from_store):
+            with patch("runner.pipeline.pipeline_cache.time.sleep"):
+                self.assertEqual(PipelineCache.get_pipeline(self.pipeline), {"class": "Workflow"})
+        resolve.assert_not_called()
+
+    @patch("runner.pipeline.cwl.cwl_resolver.CWLResolver.resolve")
+    def test_branch_is_resolved_again_after_ttl(self, resolve):
+        resolve.side_effect = [{"class": "Workflow", "id": "1"}, {"class": "Workflow", "id": "2"}]
+        self.pipeline.version = "master"
+        with self.settings(PIPELINE_CACHE_BRANCH_TTL=300):
+            self.assertEqual(PipelineCache.get_pipeline(self.pipeline)["id"], "1")
+            cache.clear()
+            self.assertEqual(PipelineCache.get_pipeline(self.pipeline)["id"], "1")
+            ResolvedPipeline.objects.update(modified_date=timezone.now() - timedelta(seconds=301))
+            cache.clear()
+            self.assertEqual(PipelineCache.get_pipeline(self.pipeline)["id"], "2")
+        self.assertEqual(resolve.call_count, 2)
+        self.assertEqual(ResolvedPipeline.objects.get().app["id"], "2")
+
+    @patch("runner.pipeline.cwl.cwl_resolver.CWLResolver.resolve")
+    def test_release_is_kept_until_refreshed(self, resolve):
+        resolve.return_value = {"class": "Workflow"}
+        for version in ("1.0.0", "v2.1.0-rc1", "3f2a9c1"):
+            self.pipeline.version = version
+            self.assertIsNone(PipelineCache.ttl(self.pipeline))
+            PipelineCache.get_pipeline(self.pipeline)
+        ResolvedPipeline.objects.update(modified_date=timezone.now() - timedelta(days=30))
+        cache.clear()
+        PipelineCache.get_pipeline(self.pipeline)
+        self.assertEqual(resolve.call_count, 3)
@@ -2,11 +2,15 @@
 Tests for Operator Trigger
 """
 import os
+import uuid
 from mock import patch
 from django.conf import settings
-from django.test import TestCase
-from runner.models import Run
-from runner.tasks import check_job_timeouts, check_operator_run_alerts
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from runner.models import Run, RunStatus
+from runner.run.executor.executor_client import LocalExecutorClient
+from runner.serializers import RunStatusEventsSerializer
+from runner.tasks import check_job_timeouts, check_operator_run_alerts, check_jobs_status, process_run_status_events
 from freezegun import freeze_time
 
 
@@ -41,3 +45,116 @@ class TestRunnerTasks(TestCase):
         check_operator_run_alerts()
         file_written = os.path.exists(settings.MANUAL_RESTART_REPORT_PATH)
         self.assertTrue(file_written)
+
+
+@override_settings(
+    EXECUTOR_CLIENT="runner.run.executor.executor_client.LocalExecutorClient", CHECK_JOB_STATUS_INCREMENTAL=True
+)
+class TestCheckJobsStatus(TestCase):
+    fixtures = [
+        "file_system.filegroup.json",
+        "file_system.filetype.json",
+        "file_system.storage.json",
+        "runner.pipeline.json",
+        "beagle_etl.operator.json",
+        "runner.operator_run.json",
+        "runner.run.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        LocalExecutorClient.reset()
+        self.runs = list(Run.objects.filter(operator_run_id=1).order_by("id"))
+        for run in self.runs:
+            run.execution_id = uuid.uuid4()
+            run.status = RunStatus.READY
+            run.save()
+            LocalExecutorClient.set_status(run.execution_id, "PENDING")
+
+    @patch("runner.tasks.terminate_jobs.delay")
+    @patch("runner.tasks.fail_jobs.delay")
+    @patch("runner.tasks.complete_jobs.delay")
+    def test_only_changed_jobs_are_applied(self, complete_jobs, fail_jobs, terminate_jobs):
+        check_jobs_status()
+        self.assertEqual(Run.objects.filter(operator_run_id=1, execution_etag__isnull=False).count(), 3)
+
+        LocalExecutorClient.set_status(self.runs[0].execution_id, "RUNNING", started="2024-01-01T00:00:00Z")
+        LocalExecutorClient.set_status(self.runs[1].execution_id, "COMPLETED", outputs={"out": "value"})
+        LocalExecutorClient.set_status(
+            self.runs[2].execution_id, "FAILED", message={"log": "/work/run/log.txt", "alerts": None}
+        )
+        with self.assertNumQueries(4):
+            check_jobs_status()
+
+        running = Run.objects.get(id=self.runs[0].id)
+        self.assertEqual(running.status, RunStatus.RUNNING)
+        self.assertIsNotNone(running.started)
+        complete_jobs.assert_called_once_with([(str(self.runs[1].id), {"out": "value"}, None, None)])
+        fail_jobs.assert_called_once_with(
+            [
+                (
+                    str(self.runs[2].id),
+                    {"details": {"log": "/work/run/log.txt", "alerts": None}},
+                    "/work/run/log.txt",
+                    "/work/run/input.json",
+                )
+            ]
+        )
+        terminate_jobs.assert_not_called()
+
+        complete_jobs.reset_mock()
+        with self.assertNumQueries(1):
+            check_jobs_status()
+        complete_jobs.assert_not_called()
+
+    @patch("runner.tasks.CHECK_JOB_STATUS_CHUNK", 1)
+    def test_cursor_covers_jobs_changed_during_poll(self):
+        check_jobs_status()
+        statuses = LocalExecutorClient.statuses
+        changed_during_poll = []
+
+        def statuses_changing_first_job(client, execution_ids, modified_after=None):
+            result = statuses(client, execution_ids, modified_after)
+            if not changed_during_poll:
+                # the job of the first chunk changes while the other chunks are fetched
+                changed_during_poll.append(execution_ids[0])
+                LocalExecutorClient.set_status(execution_ids[0], "RUNNING")
+            return result
+
+        with patch.object(LocalExecutorClient, "statuses", statuses_changing_first_job):
+            check_jobs_status()
+        self.assertEqual(Run.objects.get(execution_id=changed_during_poll[0]).status, RunStatus.READY)
+
+        check_jobs_status()
+        self.assertEqual(Run.objects.get(execution_id=changed_during_poll[0]).status, RunStatus.RUNNING)
+
+    @patch("runner.tasks.complete_jobs.delay")
+    def test_status_events_are_deduplicated(self, complete_jobs):
+        execution_id = str(self.runs[0].execution_id)
+        events = [
+            {"execution_id": execution_id, "status": "COMPLETED", "outputs": {}, "modified": "2024-01-01T00:00:02Z"},
+            {"execution_id": execution_id, "status": "RUNNING", "modified": "2024-01-01T00:00:01Z"},
+            {"execution_id": str(self.runs[1].execution_id), "status": "RUNNING"},
+        ]
+        process_run_status_events(events)
+        complete_jobs.assert_called_once_with([(str(self.runs[0].id), {}, None, None)])
+        self.assertEqual(Run.objects.get(id=self.runs[0].id).status, RunStatus.READY)
+        self.assertEqual(Run.objects.get(id=self.runs[1].id).status, RunStatus.RUNNING)
+
+    @patch("runner.tasks.fail_jobs.delay")
+    @patch("runner.tasks.complete_jobs.delay")
+    def test_status_events_from_serializer(self, complete_jobs, fail_jobs):
+        serializer = RunStatusEventsSerializer(
+            data={
+                "events": [
+                    {"execution_id": str(self.runs[0].execution_id), "status": "COMPLETED", "outputs": {"out": 1}},
+                    {"execution_id": str(self.runs[1].execution_id), "status": "FAILED"},
+                    {"execution_id": str(self.runs[2].execution_id), "status": "RUNNING"},
+                ]
+            }
+        )
+        self.assertTrue(serializer.is_valid())
+        process_run_status_events(serializer.get_events())
+        complete_jobs.assert_called_once_with([(str(self.runs[0].id), {"out": 1}, None, None)])
+        fail_jobs.assert_called_once_with([(str(self.runs[1].id), {"details": None}, None, None)])
+        self.assertEqual(Run.objects.get(id=self.runs[2].id).status, RunStatus.RUNNING)
@@ -0,0 +1,47 @@
+"""
+Tests for the run status events endpoint
+"""
+import uuid
+from mock import patch
+from rest_framework import status
+from rest_framework.test import APITestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+
+class TestRunStatusEvents(APITestCase):
+    def setUp(self):
+        admin_user = User.objects.create_superuser("admin", "sample_email", "password")
+        self.client.force_authenticate(user=admin_user)
+
+    @patch("runner.views.run_view.process_run_status_events.delay")
+    def test_events_are_deduplicated_before_queueing(self, process_run_status_events):
+        execution_id = str(uuid.uuid4())
+        events = [
+            {"execution_id": execution_id, "status": "RUNNING"},
+            {"execution_id": execution_id, "status": "COMPLETED", "outputs": {"out": 1}},
+        ]
+        response = self.client.post(reverse("run-status-events"), {"events": events}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json(), {"received": 2, "queued": 1})
+        queued = process_run_status_events.call_args[0][0]
+        self.assertEqual(len(queued), 1)
+        self.assertEqual(queued[0]["status"], "COMPLETED")
+
+    def test_invalid_status_is_rejected(self):
+        events = [{"execution_id": str(uuid.uuid4()), "status": "UNKNOWN"}]
+        response = self.client.post(reverse("run-status-events"), {"events": events}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_completed_event_without_outputs_is_rejected(self):
+        events = [{"execution_id": str(uuid.uuid4()), "status": "COMPLETED"}]
+        response = self.client.post(reverse("run-status-events"), {"events": events}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("runner.views.run_view.process_run_status_events.delay")
+    def test_omitted_fields_are_not_queued(self, process_run_status_events):
+        events = [{"execution_id": str(uuid.uuid4()), "status": "FAILED"}]
+        response = self.client.post(reverse("run-status-events"), {"events": events}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        queued = process_run_status_events.call_args[0][0]
+        self.assertEqual(set(queued[0].keys()), {"execution_id", "status"})
@@ -8,7 +8,14 @@ from django.db.models import Prefetch
 from rest_framework import status
 from rest_framework import mixins
 from runner.models import Run, Port, RunStatus
-from runner.serializers import RunSerializerFull, CreateRunSerializer, UpdateRunSerializer, RunStatusUpdateSerializer
+from runner.serializers import (
+    RunSerializerFull,
+    CreateRunSerializer,
+    UpdateRunSerializer,
+    RunStatusUpdateSerializer,
+    RunStatusEventsSerializer,
+)
+from runner.tasks import process_run_status_events, deduplicate_status_events
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.generics import GenericAPIView
@@ -73,3 +80,21 @@ class UpdateJob(GenericAPIView):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class RunStatusEvents(GenericAPIView):
+    """
+    Accept batched status-change events from the executor and hand them to
+    process_run_status_events
+    """
+
+    serializer_class = RunStatusEventsSerializer
+
+    def post(self, request):
+        serializer = RunStatusEventsSerializer(data=request.data)
+        if serializer.is_valid():
+            events = serializer.get_events()
+            latest = deduplicate_status_events(events)
+            process_run_status_events.delay(list(latest.values()))
+            return Response({"received": len(events), "queued": len(latest)}, status=status.HTTP_202_ACCEPTED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,89 @@
+import copy
+import time
+import argparse
+from django.conf import settings
+from django.db import transaction
+from beagle_etl.jobs.bulk_import import BulkFileImporter
+from beagle_etl.jobs.metadb_jobs import create_or_update_file
+
+#
+# Compare BulkFileImporter with the per-file import path on a synthetic request.
+# Both runs are rolled back, and checksum tasks are not enqueued.
+#
+# Example usage:
+#
+# python3 manage.py runscript benchmark_bulk_import --script-args "-f 10000 -s 400"
+#
+
+
+class Rollback(Exception):
+    pass
+
+
+def synthetic_request(request_id, number_of_fastqs, number_of_samples):
+    request_metadata = {
+        settings.REQUEST_ID_METADATA_KEY: request_id,
+        settings.PROJECT_ID_METADATA_KEY: request_id.split("_")[0],
+        settings.RECIPE_METADATA_KEY: "WholeExomeSequencing",
+        settings.LAB_HEAD_NAME_METADATA_KEY: "Lab Head",
+        settings.LAB_HEAD_EMAIL_METADATA_KEY: "labhead@mskcc.org",
+        settings.INVESTIGATOR_NAME_METADATA_KEY: "Investigator",
+        settings.INVESTIGATOR_EMAIL_METADATA_KEY: "investigator@mskcc.org",
+    }
+    for i in range(number_of_fastqs):
+        sample_number = i % number_of_samples
+        metadata = copy.deepcopy(request_metadata)
+        metadata.update(
+            {
+                settings.SAMPLE_ID_METADATA_KEY: f"{request_id}_{sample_number}",
+                settings.PATIENT_ID_METADATA_KEY: f"C-BENCH{sample_number // 2}",
+                settings.TUMOR_OR_NORMAL_METADATA_KEY: "Tumor" if sample_number % 2 else "Normal",
+                settings.BAITSET_METADATA_KEY: "IDT_Exome_v2_FP_b37_baits",
+                "runId": f"RUN_{i // (2 * number_of_samples)}",
+                "R": "R1" if i % 2 == 0 else "R2",
+            }
+        )
+        yield f"/benchmark/{request_id}/Sample_{sample_number}/fastq_{i}_R{i % 2 + 1}_001.fastq.gz", metadata
+
+
+def per_file_import(files):
+    for path, metadata in files:
+        create_or_update_file(path, metadata)
+
+
+def bulk_import(files):
+    importer = BulkFileImporter()
+    for path, metadata in files:
+        importer.add(path, metadata)
+    importer.run()
+
+
+def measure(name, func, files):
+    start = time.perf_counter()
+    try:
+        with transaction.atomic():
+            func(files)
+            raise Rollback()
+    except Rollback:
+        pass
+    elapsed = time.perf_counter() - start
+    print("%s: %.2fs (%.2fms per fastq)" % (name, elapsed, 1000 * elapsed / len(files)))
+    return elapsed
+
+
+def run(*args):
+    from unittest import mock
+
+    parser = argparse.ArgumentParser(description="Benchmark bulk import of a synthetic request")
+    parser.add_argument("-f", "--fastqs", type=int, default=10000)
+    parser.add_argument("-s", "--samples", type=int, default=400)
+    parser.add_argument("--skip-per-file", action="store_true")
+    arg_obj = parser.parse_args(args)
+    files = list(synthetic_request("99999_ZZ", arg_obj.fastqs, arg_obj.samples))
+    with mock.patch("beagle_etl.jobs.helper_jobs.calculate_checksum.delay"), mock.patch(
+        "beagle_etl.jobs.helper_jobs.calculate_checksums.delay"
+    ):
+        bulk = measure("BulkFileImporter", bulk_import, files)
+        if not arg_obj.skip_per_file:
+            per_file = measure("create_or_update_file", per_file_import, files)
+            print("Speedup: %.1fx" % (per_file / bulk))
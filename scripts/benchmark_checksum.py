@@ -0,0 +1,71 @@
+import os
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+from file_system.helper.checksum import sha1, sha1_many
+from file_manager.copy_service.copy_service import CopyService
+
+#
+# Compare checksum strategies on a synthetic set of large files:
+# sequential 1 MiB reads, larger and mmap buffers, a thread pool, and hashing while staging a copy.
+#
+# Example usage:
+#
+# python3 manage.py runscript benchmark_checksum --script-args "-f 4 -s 1024 -w 4"
+#
+
+
+def create_files(directory, files, size_mb):
+    chunk = os.urandom(1024 * 1024)
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, "file_%s.fastq.gz" % i)
+        with open(path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(chunk)
+        paths.append(path)
+    return paths
+
+
+def timed(name, total_mb, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print("%s: %.2fs, %.0f MiB/s" % (name, elapsed, total_mb / elapsed))
+
+
+def run(*args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--files", type=int, default=4)
+    parser.add_argument("-s", "--size", type=int, default=1024, help="file size in MiB")
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("-d", "--directory", default=None)
+    arguments = parser.parse_args(args)
+
+    directory = tempfile.mkdtemp(dir=arguments.directory)
+    try:
+        paths = create_files(directory, arguments.files, arguments.size)
+        total_mb = arguments.files * arguments.size
+        staged = os.path.join(directory, "staged")
+
+        timed("sequential 1 MiB", total_mb, lambda: [sha1(path, 1024 * 1024) for path in paths])
+        timed("sequential 8 MiB", total_mb, lambda: [sha1(path) for path in paths])
+        timed("sequential mmap", total_mb, lambda: [sha1(path, use_mmap=True) for path in paths])
+        timed("%s threads" % arguments.workers, total_mb, lambda: sha1_many(paths, workers=arguments.workers))
+
+        def copy_then_hash():
+            for path in paths:
+                CopyService.copy(path, os.path.join(staged, os.path.basename(path)))
+                sha1(path)
+
+        def hash_while_copying():
+            for path in paths:
+                CopyService.copy(path, os.path.join(staged, os.path.basename(path)), hasher=hashlib.sha1())
+
+        timed("copy, then hash", total_mb, copy_then_hash)
+        shutil.rmtree(staged)
+        timed("hash while copying", total_mb, hash_while_copying)
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,78 @@
+import copy
+import timeit
+import argparse
+from deepdiff import DeepDiff
+from file_system.helper.metadata_diff import flat_diff
+
+#
+# Compare flat_diff with DeepDiff(ignore_order=True) on SMILE-sized fastq metadata.
+#
+# Example usage:
+#
+# python3 manage.py runscript benchmark_metadata_diff --script-args "-n 10000"
+#
+
+
+def sample_metadata():
+    metadata = {
+        "igoRequestId": "12345_A",
+        "primaryId": "12345_A_1",
+        "cmoPatientId": "C-ABCDEF",
+        "cmoSampleName": "C-ABCDEF-T001-d01",
+        "sampleName": "sample_1",
+        "investigatorSampleId": "sample_1",
+        "baitSet": "IMPACT505_BAITS",
+        "genePanel": "IMPACT505",
+        "tumorOrNormal": "Tumor",
+        "sampleClass": "Primary",
+        "preservation": "Frozen",
+        "sex": "F",
+        "oncotreeCode": "LUAD",
+        "igoComplete": True,
+        "qcReports": [],
+        "sampleAliases": [{"value": "sample_1", "namespace": "investigatorId"}],
+        "patientAliases": [{"value": "C-ABCDEF", "namespace": "cmoId"}],
+        "libraries": [
+            {
+                "barcodeId": "DUAL_IDT_LIB_%s" % i,
+                "libraryVolume": 35.0,
+                "runs": [
+                    {
+                        "runId": "DIANA_%s" % j,
+                        "flowCellId": "HFTCNDSX%s" % j,
+                        "fastqs": ["/igo/delivery/FASTQ/R%s_%s.fastq.gz" % (j, k) for k in range(2)],
+                    }
+                    for j in range(2)
+                ],
+            }
+            for i in range(2)
+        ],
+    }
+    for i in range(40):
+        metadata["field_%s" % i] = "value_%s" % i
+    return metadata
+
+
+def run(*args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    arguments = parser.parse_args(args)
+
+    old = sample_metadata()
+    unchanged = copy.deepcopy(old)
+    changed = copy.deepcopy(old)
+    changed["sex"] = "M"
+    changed["libraries"] = list(reversed(changed["libraries"]))
+
+    for name, new in (("unchanged", unchanged), ("changed", changed)):
+        deepdiff_time = timeit.timeit(lambda: DeepDiff(new, old, ignore_order=True), number=arguments.number)
+        flat_diff_time = timeit.timeit(lambda: flat_diff(new, old), number=arguments.number)
+        print(
+            "%s: DeepDiff %.1fus, flat_diff %.1fus per diff (%.0fx)"
+            % (
+                name,
+                deepdiff_time / arguments.number * 1e6,
+                flat_diff_time / arguments.number * 1e6,
+                deepdiff_time / flat_diff_time,
+            )
+        )
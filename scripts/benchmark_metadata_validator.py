@@ -0,0 +1,38 @@
+import timeit
+import argparse
+from jsonschema import validate
+from django.conf import settings
+from beagle_etl.smile_message.metadata_validator import METADATA_SCHEMA, get_metadata_validator
+from scripts.benchmark_metadata_diff import sample_metadata
+
+#
+# Compare jsonschema.validate per file with the compiled MetadataValidator on a fastq import.
+#
+# Example usage:
+#
+# python3 manage.py runscript benchmark_metadata_validator --script-args "-n 10000"
+#
+
+
+def run(*args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=10000, help="number of fastq files")
+    arguments = parser.parse_args(args)
+
+    items = []
+    for i in range(arguments.number):
+        metadata = sample_metadata()
+        metadata[settings.SAMPLE_ID_METADATA_KEY] = "12345_A_%s" % i
+        items.append(metadata)
+
+    validate_time = timeit.timeit(lambda: [validate(instance=m, schema=METADATA_SCHEMA) for m in items], number=1)
+    compiled_time = timeit.timeit(lambda: get_metadata_validator().validate_many(items), number=1)
+    print(
+        "%s files: jsonschema.validate %.1fus, validate_many %.1fus per fastq (%.0fx)"
+        % (
+            arguments.number,
+            validate_time / arguments.number * 1e6,
+            compiled_time / arguments.number * 1e6,
+            validate_time / compiled_time,
+        )
+    )
@@ -0,0 +1,68 @@
+import time
+import argparse
+from notifier.models import JobGroup, JobGroupNotifier, Notifier
+from notifier.jira.jira_client import jira_client
+from notifier.jira.fake_jira_server import FakeJiraServer
+from notifier.event_handler.jira_event_handler.jira_event_handler import JiraEventHandler
+from notifier.events import SetLabelEvent, OperatorRunEvent, RunStartedEvent, AddPipelineToDescriptionEvent
+
+
+LINK = "https://github.com/mskcc/argos"
+
+#
+# Compare sending JIRA events of an operator run one by one with JiraEventHandler.process_batch,
+# against a local fake JIRA server answering with the given latency.
+#
+# Example usage:
+#
+# python3 manage.py runscript benchmark_notifier --script-args "-n 20 --latency 0.05"
+#
+
+
+def run(*args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=20, help="number of operator runs")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake JIRA takes per request")
+    arguments = parser.parse_args(args)
+
+    with FakeJiraServer(latency=arguments.latency) as jira:
+        notifier = Notifier.objects.create(notifier_type="JIRA", board="BENCHMARK")
+        job_group = JobGroup.objects.create()
+        try:
+            for name in ("one by one", "process_batch"):
+                job_group_notifier = JobGroupNotifier.objects.create(
+                    jira_id=jira.create(), job_group=job_group, notifier_type=notifier
+                )
+                events = _events(str(job_group_notifier.id), arguments.number)
+                jira_client.cache_clear()
+                jira.reset_requests()
+                handler = JiraEventHandler("BENCHMARK")
+                handler.client.url = jira.url
+                start = time.perf_counter()
+                if name == "one by one":
+                    for event in events:
+                        handler.process(dict(event))
+                else:
+                    handler.process_batch(events)
+                seconds = time.perf_counter() - start
+                print(
+                    "%s: %s events, %s JIRA calls, %.2fs (%.1f events/s)"
+                    % (name, len(events), len(jira.requests), seconds, len(events) / seconds)
+                )
+        finally:
+            JobGroupNotifier.objects.filter(job_group=job_group).delete()
+            job_group.delete()
+            notifier.delete()
+            jira_client.cache_clear()
+
+
+def _events(job_notifier, number):
+    events = []
+    for i in range(number):
+        run_id = "run_%s" % i
+        valid_run = {"run_id": run_id, "tags": {}, "output_directory": "/output"}
+        events.append(SetLabelEvent(job_notifier, "argos_%s" % i).to_dict())
+        events.append(AddPipelineToDescriptionEvent(job_notifier, "argos", "1.%s.0" % i, LINK).to_dict())
+        events.append(OperatorRunEvent(job_notifier, "REQUEST", "argos", LINK, [valid_run], i).to_dict())
+        events.append(RunStartedEvent(job_notifier, run_id, "argos", LINK, "/output", {}).to_dict())
+    return events
@@ -1,5 +1,5 @@
 from beagle_etl.models import SMILEMessage, SmileMessageStatus, Operator
-from file_system.models import FileGroup, Storage, StorageType, File, FileType, FileMetadata
+from file_system.models import FileGroup, Storage, StorageType, File, FileType, FileMetadata, FileMetadataProjection
 from runner.models import Pipeline, TriggerRunType, TriggerAggregateConditionType, OperatorTrigger, PipelineName
 from notifier.models import Notifier
 import os
@@ -226,6 +226,11 @@ def set_resource_files(resource_files):
                 File.objects.bulk_update(updated_file_list, ["file_name", "file_type", "path", "size", "file_group"])
             if updated_metadata_list:
                 FileMetadata.objects.bulk_update(updated_metadata_list, ["file", "metadata"])
+            # bulk writes skip FileMetadata.save, ids of rows inserted with ignore_conflicts aren't returned
+            metadata_paths = [metadata.file.path for metadata in new_metadata_list + updated_metadata_list]
+            if metadata_paths:
+                latest = FileMetadata.objects.filter(file__path__in=metadata_paths, latest=True)
+                FileMetadataProjection.objects.sync_many(list(latest.only("id", "file_id", "metadata")))
 
 
 def set_dmp2cmo_files(patient_ids):